@@ -1,31 +1,205 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
 import shared.celery_config as shared_celery_config
+from redis.exceptions import RedisError
 from shared.billing import BillingPlan
 from shared.celery_router import route_tasks_based_on_user_plan
+from shared.config import get_config
 
 from database.engine import get_db_session
 from database.models.core import Commit, CompareCommit, Owner, Repository
 from database.models.labelanalysis import LabelAnalysisRequest
 from database.models.profiling import ProfilingCommit, ProfilingUpload
 from database.models.staticanalysis import StaticAnalysisSuite
+from services.redis import get_redis_connection
+
+log = logging.getLogger(__name__)
+
+_missing = object()
+
+
+class _TTLCache(object):
+    """A small thread-safe LRU cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _missing
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return _missing
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class UserPlanCache(object):
+    """Caches the plans used to route tasks, so enqueueing a task doesn't have to
+        query the database to pick its queue
+
+    Routing a task maps its arguments (a repoid, a comparison_id...) to an owner,
+        and the owner to a plan. Both steps are cached, and only the second one
+        changes when a plan does, so `invalidate` only needs the ownerid.
+        With `use_redis`, plans are only kept in redis (not in the process), so
+        invalidating a plan takes effect in every process at once. Otherwise each
+        process keeps its own copy of them, and the other processes keep using
+        an invalidated plan until it expires.
+    """
+
+    def __init__(self, max_size: int, ttl: int, use_redis: bool = False):
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self._ownerids = _TTLCache(max_size, ttl)
+        self._plans = _TTLCache(max_size, ttl)
+
+    @staticmethod
+    def _redis_key(ownerid: int) -> str:
+        return f"task_routing_plan/{ownerid}"
+
+    def get_ownerid(self, key: Hashable) -> Any:
+        return self._ownerids.get(key)
+
+    def set_ownerid(self, key: Hashable, ownerid: int) -> None:
+        self._ownerids.set(key, ownerid)
+
+    def get_plan(self, ownerid: int) -> Any:
+        if not self.use_redis:
+            return self._plans.get(ownerid)
+        try:
+            redis_plan = get_redis_connection().get(self._redis_key(ownerid))
+        except RedisError:
+            log.warning("Unable to read cached plan", extra=dict(ownerid=ownerid))
+            return _missing
+        return redis_plan.decode() if redis_plan is not None else _missing
+
+    def set_plan(self, ownerid: int, plan: Optional[str]) -> None:
+        if not self.use_redis:
+            self._plans.set(ownerid, plan)
+        elif plan is not None:
+            try:
+                get_redis_connection().set(self._redis_key(ownerid), plan, ex=self.ttl)
+            except RedisError:
+                log.warning("Unable to cache plan", extra=dict(ownerid=ownerid))
+
+    def invalidate(self, ownerid: int) -> None:
+        self._plans.pop(ownerid)
+        if self.use_redis:
+            try:
+                get_redis_connection().delete(self._redis_key(ownerid))
+            except RedisError:
+                log.warning(
+                    "Unable to invalidate cached plan", extra=dict(ownerid=ownerid)
+                )
+
+
+_user_plan_cache: Optional[UserPlanCache] = None
+
+
+def get_user_plan_cache() -> Optional[UserPlanCache]:
+    """Returns the cache of this process, or None if it is turned off"""
+    global _user_plan_cache
+    if _user_plan_cache is None:
+        ttl = get_config("setup", "task_routing", "plan_cache", "ttl", default=300)
+        if not ttl:
+            return None
+        _user_plan_cache = UserPlanCache(
+            max_size=get_config(
+                "setup", "task_routing", "plan_cache", "max_size", default=10000
+            ),
+            ttl=ttl,
+            use_redis=get_config(
+                "setup", "task_routing", "plan_cache", "use_redis", default=False
+            ),
+        )
+    return _user_plan_cache
+
+
+def invalidate_user_plan(ownerid: int) -> None:
+    """Makes the next task routed for `ownerid` see its current plan
+
+    Call it once the plan change is committed, or a task routed in between could
+        cache the old plan again.
+    """
+    cache = get_user_plan_cache()
+    if cache is not None:
+        cache.invalidate(ownerid)
+
+
+def _get_cached_user_plan(
+    db_session, key: Hashable, query_owner: Callable[[], Any]
+) -> str:
+    """The plan of the owner `key` belongs to
+
+    Args:
+        key: What the owner is looked up by, like ("repoid", 123)
+        query_owner: Queries the (ownerid, plan) of that owner, or None if it
+            doesn't exist
+    """
+    cache = get_user_plan_cache()
+    if cache is not None:
+        ownerid = cache.get_ownerid(key)
+        if ownerid is not _missing:
+            plan = cache.get_plan(ownerid)
+            if plan is _missing:
+                result = (
+                    db_session.query(Owner.plan)
+                    .filter(Owner.ownerid == ownerid)
+                    .first()
+                )
+                if not result:
+                    return BillingPlan.users_basic.db_name
+                plan = result.plan
+                cache.set_plan(ownerid, plan)
+            return plan
+    result = query_owner()
+    if not result:
+        return BillingPlan.users_basic.db_name
+    if cache is not None:
+        cache.set_ownerid(key, result.ownerid)
+        cache.set_plan(result.ownerid, result.plan)
+    return result.plan
 
 
 def _get_user_plan_from_ownerid(db_session, ownerid, *args, **kwargs) -> str:
-    result = db_session.query(Owner.plan).filter(Owner.ownerid == ownerid).first()
-    if result:
-        return result.plan
-    return BillingPlan.users_basic.db_name
+    return _get_cached_user_plan(
+        db_session,
+        ("ownerid", ownerid),
+        lambda: db_session.query(Owner.ownerid, Owner.plan)
+        .filter(Owner.ownerid == ownerid)
+        .first(),
+    )
 
 
 def _get_user_plan_from_repoid(db_session, repoid, *args, **kwargs) -> str:
-    result = (
-        db_session.query(Owner.plan)
+    return _get_cached_user_plan(
+        db_session,
+        ("repoid", repoid),
+        lambda: db_session.query(Owner.ownerid, Owner.plan)
         .join(Repository.owner)
         .filter(Repository.repoid == repoid)
-        .first()
+        .first(),
     )
-    if result:
-        return result.plan
-    return BillingPlan.users_basic.db_name
 
 
 def _get_user_plan_from_org_ownerid(dbsession, org_ownerid, *args, **kwargs) -> str:
@@ -35,74 +209,79 @@ def _get_user_plan_from_org_ownerid(dbsession, org_ownerid, *args, **kwargs) ->
 def _get_user_plan_from_profiling_commit(
     dbsession, profiling_id, *args, **kwargs
 ) -> str:
-    result = (
-        dbsession.query(Owner.plan)
-        .join(ProfilingCommit.repository)
-        .join(Repository.owner)
-        .filter(ProfilingCommit.id == profiling_id)
-        .first()
+    return _get_cached_user_plan(
+        dbsession,
+        ("profiling_id", profiling_id),
+        lambda: (
+            dbsession.query(Owner.ownerid, Owner.plan)
+            .join(ProfilingCommit.repository)
+            .join(Repository.owner)
+            .filter(ProfilingCommit.id == profiling_id)
+            .first()
+        ),
     )
-    if result:
-        return result.plan
-    return BillingPlan.users_basic.db_name
 
 
 def _get_user_plan_from_profiling_upload(
     dbsession, profiling_upload_id, *args, **kwargs
 ) -> str:
-    result = (
-        dbsession.query(Owner.plan)
-        .join(ProfilingUpload.profiling_commit)
-        .join(ProfilingCommit.repository)
-        .join(Repository.owner)
-        .filter(ProfilingUpload.id == profiling_upload_id)
-        .first()
+    return _get_cached_user_plan(
+        dbsession,
+        ("profiling_upload_id", profiling_upload_id),
+        lambda: (
+            dbsession.query(Owner.ownerid, Owner.plan)
+            .join(ProfilingUpload.profiling_commit)
+            .join(ProfilingCommit.repository)
+            .join(Repository.owner)
+            .filter(ProfilingUpload.id == profiling_upload_id)
+            .first()
+        ),
     )
-    if result:
-        return result.plan
-    return BillingPlan.users_basic.db_name
 
 
 def _get_user_plan_from_comparison_id(dbsession, comparison_id, *args, **kwargs) -> str:
-    result = (
-        dbsession.query(Owner.plan)
-        .join(CompareCommit.compare_commit)
-        .join(Commit.repository)
-        .join(Repository.owner)
-        .filter(CompareCommit.id_ == comparison_id)
-        .first()
+    return _get_cached_user_plan(
+        dbsession,
+        ("comparison_id", comparison_id),
+        lambda: (
+            dbsession.query(Owner.ownerid, Owner.plan)
+            .join(CompareCommit.compare_commit)
+            .join(Commit.repository)
+            .join(Repository.owner)
+            .filter(CompareCommit.id_ == comparison_id)
+            .first()
+        ),
     )
-    if result:
-        return result.plan
-    return BillingPlan.users_basic.db_name
 
 
 def _get_user_plan_from_label_request_id(dbsession, request_id, *args, **kwargs) -> str:
-    result = (
-        dbsession.query(Owner.plan)
-        .join(LabelAnalysisRequest.head_commit)
-        .join(Commit.repository)
-        .join(Repository.owner)
-        .filter(LabelAnalysisRequest.id_ == request_id)
-        .first()
+    return _get_cached_user_plan(
+        dbsession,
+        ("request_id", request_id),
+        lambda: (
+            dbsession.query(Owner.ownerid, Owner.plan)
+            .join(LabelAnalysisRequest.head_commit)
+            .join(Commit.repository)
+            .join(Repository.owner)
+            .filter(LabelAnalysisRequest.id_ == request_id)
+            .first()
+        ),
     )
-    if result:
-        return result.plan
-    return BillingPlan.users_basic.db_name
 
 
 def _get_user_plan_from_suite_id(dbsession, suite_id, *args, **kwargs) -> str:
-    result = (
-        dbsession.query(Owner.plan)
-        .join(StaticAnalysisSuite.commit)
-        .join(Commit.repository)
-        .join(Repository.owner)
-        .filter(StaticAnalysisSuite.id_ == suite_id)
-        .first()
+    return _get_cached_user_plan(
+        dbsession,
+        ("suite_id", suite_id),
+        lambda: (
+            dbsession.query(Owner.ownerid, Owner.plan)
+            .join(StaticAnalysisSuite.commit)
+            .join(Commit.repository)
+            .join(Repository.owner)
+            .filter(StaticAnalysisSuite.id_ == suite_id)
+            .first()
+        ),
     )
-    if result:
-        return result.plan
-    return BillingPlan.users_basic.db_name
 
 
 def _get_user_plan_from_task(dbsession, task_name: str, task_kwargs: dict) -> str:
@@ -298,3 +298,23 @@ def mock_checkpoint_submit(mocker, request):
         "submit_subflow",
         mock_submit,
     )
+
+
+# Chunks cached by one test must not be read by the next one
+@pytest.fixture(autouse=True)
+def reset_chunks_cache():
+    from services.report import chunks_cache
+
+    chunks_cache._chunks_cache = None
+    yield
+    chunks_cache._chunks_cache = None
+
+
+# Plans cached by one test must not be used to route the tasks of the next one
+@pytest.fixture(autouse=True)
+def reset_user_plan_cache():
+    import celery_task_router
+
+    celery_task_router._user_plan_cache = None
+    yield
+    celery_task_router._user_plan_cache = None
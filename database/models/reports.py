@@ -238,6 +238,14 @@ class CompareFlag(MixinBaseClass, CodecovBaseModel):
     commit_comparison = relationship(CompareCommit, foreign_keys=[commit_comparison_id])
     repositoryflag = relationship(RepositoryFlag, foreign_keys=[repositoryflag_id])
 
+    __table_args__ = (
+        UniqueConstraint(
+            "commit_comparison_id",
+            "repositoryflag_id",
+            name="unique_comparison_between_flag",
+        ),
+    )
+
 
 class CompareComponent(MixinBaseClass, CodecovBaseModel):
     __tablename__ = "compare_componentcomparison"
@@ -252,6 +260,14 @@ class CompareComponent(MixinBaseClass, CodecovBaseModel):
 
     commit_comparison = relationship(CompareCommit, foreign_keys=[commit_comparison_id])
 
+    __table_args__ = (
+        UniqueConstraint(
+            "commit_comparison_id",
+            "component_id",
+            name="unique_comparison_between_component",
+        ),
+    )
+
 
 class Test(CodecovBaseModel):
     __tablename__ = "reports_test"
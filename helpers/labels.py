@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Set, Union
+from typing import Dict, Set, Union
 
 import sentry_sdk
 from shared.reports.resources import Report
@@ -56,6 +56,40 @@ def get_labels_per_session(report: Report, sess_id: int) -> Union[Set[str], Set[
     )
 
 
+@sentry_sdk.trace
+def get_labels_per_session_index(
+    report: Report,
+) -> Dict[int, Union[Set[str], Set[int]]]:
+    """Returns, for every session of report with labels, the labels present in it,
+    EXCLUDING the SpecialLabel.
+
+    Same as calling `get_labels_per_session` for each session, but going over the
+    report only once. Use it when asking for the labels of more than one session.
+    Sessions without labels are not in the returned dict.
+    """
+    labels_per_session: Dict[int, Union[Set[str], Set[int]]] = {}
+    for rf in report:
+        for _, line in rf.lines:
+            if line.datapoints:
+                for datapoint in line.datapoints:
+                    if datapoint.label_ids:
+                        labels = labels_per_session.get(datapoint.sessionid)
+                        if labels is None:
+                            labels = labels_per_session[datapoint.sessionid] = set()
+                        labels.update(datapoint.label_ids)
+    special_labels = set(
+        [
+            SpecialLabelsEnum.CODECOV_ALL_LABELS_PLACEHOLDER.corresponding_label,
+            SpecialLabelsEnum.CODECOV_ALL_LABELS_PLACEHOLDER.corresponding_index,
+        ]
+    )
+    for sess_id in list(labels_per_session):
+        labels_per_session[sess_id] -= special_labels
+        if not labels_per_session[sess_id]:
+            del labels_per_session[sess_id]
+    return labels_per_session
+
+
 @sentry_sdk.trace
 def get_all_report_labels(report: Report) -> Union[Set[str], Set[int]]:
     """Returns a Set with the labels present in report EXCLUDING the SpecialLabel.
@@ -1,5 +1,4 @@
 import collections
-import operator
 from difflib import SequenceMatcher
 
 from .utils import _extract_match
@@ -37,15 +36,23 @@ class Tree:
         :list: possibilities - Collected possibilities
         """
 
-        # Map out similarity of possible paths with the path being looked up
-        similarity = list(
-            map(lambda x: SequenceMatcher(None, path, x).ratio(), possibilities)
-        )
-
-        # Get the index, value of the most similar path
-        index, value = max(enumerate(similarity), key=operator.itemgetter(1))
-
-        return possibilities[index]
+        if path in possibilities:
+            return path
+
+        # Find the most similar path, the first one on ties. The quick upper bounds
+        # rule out most possibilities without computing the actual ratio
+        matcher = SequenceMatcher(None, path)
+        best, best_ratio = possibilities[0], -1.0
+        for possibility in possibilities:
+            matcher.set_seq2(possibility)
+            if matcher.real_quick_ratio() <= best_ratio:
+                continue
+            if matcher.quick_ratio() <= best_ratio:
+                continue
+            ratio = matcher.ratio()
+            if ratio > best_ratio:
+                best, best_ratio = possibility, ratio
+        return best
 
     def _drill(self, d, results):
         """
@@ -88,7 +95,8 @@ class Tree:
         root = d.get(key)
         if root:
             if root.get(self._END):
-                results = root.get(self._ORIG)
+                # a copy, so extending the results doesn't change the tree
+                results = list(root.get(self._ORIG))
             return self._recursive_lookup(
                 root, lis, results, i + 1, root.get(self._END), True
             )
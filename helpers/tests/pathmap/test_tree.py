@@ -27,6 +27,22 @@ class TestTree(object):
 
         assert match == "c/bB.py"
 
+    def test_get_best_match_exact(self):
+        possibilities = ["c/bB.py", "a/bB.py", "d/Bb.py"]
+        assert self.tree._get_best_match("a/bB.py", possibilities) == "a/bB.py"
+
+    def test_lookup_does_not_change_tree(self):
+        toc = ["b.py", "x/y/b.py"]
+        self.tree.construct_tree(toc)
+        assert self.tree.lookup("y/b.py") == "x/y/b.py"
+        assert self.tree.instance == self._build_tree(toc).instance
+        assert self.tree.lookup("b.py") == "b.py"
+
+    def _build_tree(self, toc):
+        tree = Tree()
+        tree.construct_tree(toc)
+        return tree
+
     def test_drill(self):
         """
         Test drilling a branch of tree
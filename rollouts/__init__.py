@@ -12,3 +12,21 @@ BULK_INSERT_TEST_INSTANCES = Feature("bulk_insert_test_instances")
 USE_LABEL_INDEX_IN_REPORT_PROCESSING_BY_REPO_ID = Feature(
     "use_label_index_in_report_processing"
 )
+
+# Parses uploads before acquiring the upload processing lock, so that only the
+# merge into the commit report is serialized
+PARSE_UPLOADS_OUTSIDE_LOCK_BY_REPO_ID = Feature("parse_uploads_outside_lock")
+
+# Loads the existing commit report without decoding every file up front when none of
+# the uploads being processed can overwrite carried forward sessions
+LAZY_EXISTING_REPORT_BY_REPO_ID = Feature("lazy_existing_report")
+
+# Passes the commit report between the links of an upload processing chain through
+# redis, so only the last link saves it to storage and the database
+DEFER_REPORT_SAVE_IN_UPLOAD_CHAIN_BY_REPO_ID = Feature(
+    "defer_report_save_in_upload_chain"
+)
+
+# Sizes the batches of uploads given to each processor task from the size of the
+# uploads instead of always putting 3 of them together
+ADAPTIVE_UPLOAD_BATCHING_BY_REPO_ID = Feature("adaptive_upload_batching")
@@ -255,6 +255,16 @@ class ArchiveService(object):
         )
         return contents
 
+    """
+    Returns the size in bytes of a file in the archive, or None if it doesn't exist
+    """
+
+    def get_file_size(self, path) -> Optional[int]:
+        for obj in self.storage.list_folder_contents(self.root, path):
+            if obj["name"] == path:
+                return obj["size"]
+        return None
+
     """
     Generic method to delete a file from the archive.
     """
@@ -1,7 +1,7 @@
 import asyncio
 import logging
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from shared.reports.changes import get_changes_using_rust, run_comparison_using_rust
 from shared.reports.types import Change
@@ -31,6 +31,43 @@ class NotificationContext(object):
     all_tests_passed: bool
 
 
+def _filter_key(values) -> Optional[Tuple[str, ...]]:
+    return tuple(sorted(set(values))) if values else None
+
+
+class DiffTotalsCache(object):
+    """
+    Memoizes `apply_diff` on the reports of a comparison, so the notifiers and
+        section writers of one notify run don't each go over the report again.
+
+    The diffs are held on to, the cache is keyed by their identity (they are the
+        ones `ComparisonProxy.get_diff` keeps around anyway).
+    """
+
+    def __init__(self):
+        self._results: Dict[Tuple[Any, int], Tuple[Any, Any, bool]] = {}
+
+    def get_report_diff_totals(self, key, report, diff, _save=True):
+        cache_key = (key, id(diff))
+        cached = self._results.get(cache_key)
+        # a result computed with `_save=False` didn't save the diff totals on the
+        # report, so it has to be computed again if they're needed
+        if cached is not None and cached[0] is diff and (cached[2] or not _save):
+            return cached[1]
+        totals = report.apply_diff(diff, _save=_save)
+        self._results[cache_key] = (diff, totals, _save)
+        return totals
+
+    def get_flag_diff_totals(self, flag, diff):
+        cache_key = (("flag", flag.name), id(diff))
+        cached = self._results.get(cache_key)
+        if cached is not None and cached[0] is diff:
+            return cached[1]
+        totals = flag.apply_diff(diff)
+        self._results[cache_key] = (diff, totals, True)
+        return totals
+
+
 class ComparisonProxy(object):
 
     """The idea of this class is to produce a wrapper around Comparison with functionalities that
@@ -67,6 +104,8 @@ class ComparisonProxy(object):
         self._behind_by_lock = asyncio.Lock()
         self._archive_service = None
         self._overlays = {}
+        self._filtered_comparisons = {}
+        self._diff_totals = DiffTotalsCache()
         self.context = context
 
     def get_archive_service(self):
@@ -80,7 +119,22 @@ class ComparisonProxy(object):
     def get_filtered_comparison(self, flags, path_patterns):
         if not flags and not path_patterns:
             return self
-        return FilteredComparison(self, flags=flags, path_patterns=path_patterns)
+        key = (_filter_key(flags), _filter_key(path_patterns))
+        if key not in self._filtered_comparisons:
+            self._filtered_comparisons[key] = FilteredComparison(
+                self, flags=flags, path_patterns=path_patterns
+            )
+        return self._filtered_comparisons[key]
+
+    def get_diff_totals(self, diff, _save=True):
+        """`self.head.report.apply_diff(diff)`, computed once per diff"""
+        return self._diff_totals.get_report_diff_totals(
+            "head", self.head.report, diff, _save=_save
+        )
+
+    def get_flag_diff_totals(self, flag, diff):
+        """`flag.apply_diff(diff)` for a flag of the head report, computed once per diff"""
+        return self._diff_totals.get_flag_diff_totals(flag, diff)
 
     @property
     def repository_service(self):
@@ -298,6 +352,17 @@ class FilteredComparison(object):
             report=real_comparison.head.report.filter(flags=flags, paths=path_patterns),
         )
         self._changes_lock = asyncio.Lock()
+        self._diff_totals = DiffTotalsCache()
+
+    def get_diff_totals(self, diff, _save=True):
+        """`self.head.report.apply_diff(diff)`, computed once per diff"""
+        return self._diff_totals.get_report_diff_totals(
+            "head", self.head.report, diff, _save=_save
+        )
+
+    def get_flag_diff_totals(self, flag, diff):
+        """`flag.apply_diff(diff)` for a flag of the head report, computed once per diff"""
+        return self._diff_totals.get_flag_diff_totals(flag, diff)
 
     async def get_impacted_files(self):
         return await self.real_comparison.get_impacted_files()
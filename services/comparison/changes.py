@@ -1,5 +1,6 @@
 import dataclasses
 import logging
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
 from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple, Union
 
@@ -143,6 +144,7 @@ def get_changes(
             continue
 
         diff = diff_json["files"].get(filename) if diff_json is not None else None
+        segment_offsets = None
         base_report_file = base_report.get(
             (diff.get("before") or filename) if diff else filename
         )
@@ -165,8 +167,8 @@ def get_changes(
                 # Diff says it's because it's new
                 # This is expected
                 continue
-            _, additions, _ = get_segment_offsets(diff["segments"])
-            additions = set(additions)
+            segment_offsets = get_segment_offsets(diff["segments"])
+            additions = set(segment_offsets[1])
             if any(ln not in additions for ln, _ in _file.lines):
                 # file has new coverage lines that are not accounted by the diff
                 new_files.add(filename)
@@ -178,6 +180,7 @@ def get_changes(
                 head_report_file=_file,
                 diff=diff,
                 yield_line_numbers=False,
+                segment_offsets=segment_offsets,
             )
         )
 
@@ -239,46 +242,78 @@ def get_totals_from_list(lst) -> ReportTotals:
     return ReportTotals(hits=lst.count(0), misses=lst.count(1), partials=lst.count(2))
 
 
+def _line_number_shifts(offsets, last_ln) -> List[Tuple[int, int, int]]:
+    """
+    Splits the head line numbers 1..last_ln in ranges (first, last, shift) where the
+        base line number of each head line number `ln` is `ln + shift`
+    """
+    shifts = []
+    first, shift = 1, 0
+    for ln in sorted(k for k in (offsets or {}) if 1 <= k <= last_ln):
+        if ln > first:
+            shifts.append((first, ln - 1, shift))
+        shift += offsets[ln]
+        first = ln
+    if first <= last_ln:
+        shifts.append((first, last_ln, shift))
+    return shifts
+
+
 def iter_changed_lines(
-    base_report_file, head_report_file, diff=None, yield_line_numbers=True
+    base_report_file,
+    head_report_file,
+    diff=None,
+    yield_line_numbers=True,
+    segment_offsets=None,
 ) -> Iterator[Union[int, Tuple[Any, Any]]]:
     """
     streams line numbers that changed as integers > 0
+
+    Only the lines that have coverage on head, or whose matching line on base has
+        coverage, are looked at.
+
+    Args:
+        segment_offsets: `get_segment_offsets` of the diff, if the caller already has it
     """
     if not diff or diff["type"] == "modified":
-        offsets, skip_lines, removed_lines = (
-            get_segment_offsets(diff["segments"]) if diff else (None, None, None)
-        )
-        base_ln = 0
+        if diff and segment_offsets is None:
+            segment_offsets = get_segment_offsets(diff["segments"])
+        offsets, skip_lines, removed_lines = segment_offsets or (None, None, None)
         base_report_file_eof = (
             base_report_file.eof if base_report_file is not None else 0
         )
-        for ln in range(
-            1,
-            max(
-                (
-                    base_report_file_eof,
-                    base_report_file_eof
-                    + len(skip_lines or [])
-                    - len(removed_lines or []),
-                    head_report_file.eof,
-                )
+        last_ln = max(
+            (
+                base_report_file_eof,
+                base_report_file_eof + len(skip_lines or []) - len(removed_lines or []),
+                head_report_file.eof,
             )
-            + 1,
-        ):
-            if offsets:
-                base_ln += 1
-                _offset = offsets.get(ln)
-                if _offset is not None:
-                    base_ln += _offset
-
-            if not skip_lines or ln not in skip_lines:
-                base_line = (
-                    base_report_file.get(base_ln or ln)
-                    if base_report_file is not None
-                    else None
-                )
-                head_line = head_report_file.get(ln)
+        )
+        skip_lines = set(skip_lines or [])
+        base_lines = dict(base_report_file.lines) if base_report_file else {}
+        head_lines = dict(head_report_file.lines)
+        base_lns = sorted(base_lines)
+        head_lns = sorted(head_lines)
+        for first, last, shift in _line_number_shifts(offsets, last_ln):
+            candidates = set(
+                head_lns[bisect_left(head_lns, first) : bisect_right(head_lns, last)]
+            )
+            candidates.update(
+                base_ln - shift
+                for base_ln in base_lns[
+                    bisect_left(base_lns, first + shift) : bisect_right(
+                        base_lns, last + shift
+                    )
+                ]
+            )
+            if first <= -shift <= last and -shift in base_lines:
+                # no base line number, the head one is used instead
+                candidates.add(-shift)
+            for ln in sorted(candidates):
+                if ln in skip_lines:
+                    continue
+                base_line = base_lines.get((ln + shift) or ln)
+                head_line = head_lines.get(ln)
                 # if a base line exist we can compare against
                 if base_line:
                     if head_line:
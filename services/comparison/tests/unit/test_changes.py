@@ -7,6 +7,7 @@ from services.comparison.changes import (
     diff_totals,
     get_changes,
     get_segment_offsets,
+    iter_changed_lines,
 )
 
 
@@ -462,3 +463,71 @@ class TestChanges(object):
         for r in res:
             print(r)
         assert res == []
+
+
+class TestIterChangedLines(object):
+    def test_iter_changed_lines_with_diff(self):
+        diff = {
+            "type": "modified",
+            "segments": [{"header": ["3", "2", "3", "3"], "lines": ["-", "+", "+"]}],
+        }
+        base_file = ReportFile("file.py")
+        head_file = ReportFile("file.py")
+        for ln, coverage in [(1, 1), (3, 0), (5, 1), (90000, 1)]:
+            base_file.append(ln, ReportLine.create(coverage=coverage))
+        # line 3 was replaced by lines 3 and 4, the rest moved down by one
+        for ln, coverage in [(1, 1), (3, 1), (4, 1), (6, 0), (90001, 0)]:
+            head_file.append(ln, ReportLine.create(coverage=coverage))
+        assert list(iter_changed_lines(base_file, head_file, diff)) == [6, 90001]
+        assert list(
+            iter_changed_lines(base_file, head_file, diff, yield_line_numbers=False)
+        ) == [(1, 0), (1, 0)]
+
+    def test_iter_changed_lines_no_diff(self):
+        base_file = ReportFile("file.py")
+        head_file = ReportFile("file.py")
+        base_file.append(2, ReportLine.create(coverage=1))
+        base_file.append(7, ReportLine.create(coverage=0))
+        head_file.append(2, ReportLine.create(coverage=1))
+        head_file.append(5, ReportLine.create(coverage="1/2"))
+        assert list(iter_changed_lines(base_file, head_file)) == [5, 7]
+        assert list(iter_changed_lines(None, head_file)) == [2, 5]
+
+
+class TestChangesLargeReports(object):
+    """Big synthetic reports, to keep an eye on how long comparisons take"""
+
+    number_files = 2000
+    lines_per_file = 400
+
+    def _build_report(self, changed_files=(), shifted_files=()):
+        report = Report()
+        for i in range(self.number_files):
+            report_file = ReportFile(f"folder_{i % 50}/file_{i}.py")
+            shift = 2 if i in shifted_files else 0
+            for ln in range(1, self.lines_per_file + 1, 3):
+                coverage = ln % 2
+                if i in changed_files and ln == 100:
+                    coverage = "1/2"
+                report_file.append(ln + shift, ReportLine.create(coverage=coverage))
+            report.append(report_file)
+        return report
+
+    def test_get_changes_large_reports(self):
+        base_report = self._build_report()
+        head_report = self._build_report(changed_files={10, 1500}, shifted_files={700})
+        diff = {
+            "files": {
+                "folder_0/file_700.py": {
+                    "type": "modified",
+                    "before": None,
+                    "segments": [{"header": ["1", "0", "1", "2"], "lines": ["+", "+"]}],
+                }
+            }
+        }
+        res = get_changes(base_report, head_report, diff)
+        assert sorted(change.path for change in res) == [
+            "folder_0/file_1500.py",
+            "folder_10/file_10.py",
+        ]
+        assert all(not change.in_diff for change in res)
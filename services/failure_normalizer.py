@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import List, Optional
 
 import regex
@@ -43,6 +44,10 @@ class FailureNormalizer:
 
     If the users
 
+    Each pattern is substituted in a single pass over the message, in key order,
+    so later patterns see what the earlier ones replaced. Normalized messages are
+    cached (up to `cache_size` of them), the same failure tends to show up many times
+
     Usage:
 
     dict_of_regex_strings = [
@@ -73,7 +78,8 @@ class FailureNormalizer:
         ignore_predefined=False,
         override_predefined=False,
         *,
-        key_analysis_order: Optional[List[str]] = None
+        key_analysis_order: Optional[List[str]] = None,
+        cache_size: int = 4096,
     ):
         flags = regex.MULTILINE
 
@@ -98,16 +104,24 @@ class FailureNormalizer:
                 for regex_string in list_of_regex_string
             ]
 
-    @trace
+        key_ordering = self.key_analysis_order or self.dict_of_regex.keys()
+        self._ordered_regexes = [
+            (key, compiled_regex)
+            for key in key_ordering
+            for compiled_regex in self.dict_of_regex[key]
+        ]
+        self._cached_normalize = lru_cache(maxsize=cache_size)(self._normalize)
+
     def normalize_failure_message(self, failure_message: str):
+        return self._cached_normalize(failure_message)
+
+    @trace
+    def _normalize(self, failure_message: str) -> str:
         with metrics.timing("failure_normalizer.normalize_failure_message"):
-            key_ordering = self.key_analysis_order or self.dict_of_regex.keys()
-            for key in key_ordering:
-                list_of_compiled_regex = self.dict_of_regex[key]
-                for compiled_regex in list_of_compiled_regex:
-                    for match_obj in compiled_regex.finditer(failure_message):
-                        actual_match = match_obj.group()
-                        # Limit number of replaces to 1 so one match doesn't interfere
-                        # With future matches
-                        failure_message = failure_message.replace(actual_match, key, 1)
+            for key, compiled_regex in self._ordered_regexes:
+                # A function as the replacement so `key` is used as is, even if
+                # it has backslashes in it
+                failure_message = compiled_regex.sub(
+                    lambda _match, key=key: key, failure_message
+                )
         return failure_message
@@ -1,10 +1,10 @@
+import json
 from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
 from logging import getLogger
-from sys import getsizeof
-from typing import List, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 from sentry_sdk import metrics, trace
 from test_results_parser import Outcome
@@ -14,6 +14,10 @@ from database.models.reports import CommitReport, Test, TestInstance, Upload
 
 log = getLogger(__name__)
 
+FLAKE_DETECTION_WINDOW = timedelta(days=30)
+# How many test instances are fetched from the database at a time
+FLAKE_DETECTION_BATCH_SIZE = 1000
+
 
 @dataclass
 class FlakeDetectionObject:
@@ -30,18 +34,75 @@ class FlakeType(Enum):
 
 @dataclass
 class FlakeDetectionContext:
-    is_curr_flake = False
-    curr_test_id = None
-    flake_dict = defaultdict(FlakeDetectionObject)
-    commit_to_outcome = dict()
+    is_curr_flake: bool = False
+    curr_test_id: Optional[str] = None
+    last_instance_at: Optional[datetime] = None
+    flake_dict: Dict[str, FlakeDetectionObject] = field(
+        default_factory=lambda: defaultdict(FlakeDetectionObject)
+    )
+    commit_to_outcome: Dict[str, str] = field(default_factory=dict)
 
     def reset(self, test_id):
         self.curr_test_id = test_id
         self.is_curr_flake = False
+        self.last_instance_at = None
         self.flake_dict.clear()
         self.commit_to_outcome.clear()
 
 
+@dataclass
+class FlakeState:
+    flake_type: FlakeType
+    # When the test last ran, the flake is forgotten once this is out of the window
+    last_instance_at: datetime
+
+
+class FlakeStateStore(object):
+    """Keeps the flakes found on a repo between runs of the `FlakeDetector`
+
+    With it, a run only has to look at the tests that ran since the previous one,
+        the flakes found before for the other tests still stand.
+    """
+
+    def __init__(self, redis_connection, repoid):
+        self.redis_connection = redis_connection
+        self.key = f"flake_detection/{repoid}"
+
+    def load(self) -> Tuple[Optional[datetime], Dict[str, FlakeState]]:
+        """Returns when the last run started, and the flakes it left"""
+        data = self.redis_connection.get(self.key)
+        if data is None:
+            return None, {}
+        content = json.loads(data)
+        return (
+            datetime.fromisoformat(content["last_run"]),
+            {
+                test_id: FlakeState(
+                    flake_type=FlakeType(state["flake_type"]),
+                    last_instance_at=datetime.fromisoformat(state["last_instance_at"]),
+                )
+                for test_id, state in content["flakes"].items()
+            },
+        )
+
+    def save(self, run_started_at: datetime, flakes: Dict[str, FlakeState]) -> None:
+        content = {
+            "last_run": run_started_at.isoformat(),
+            "flakes": {
+                test_id: {
+                    "flake_type": state.flake_type.value,
+                    "last_instance_at": state.last_instance_at.isoformat(),
+                }
+                for test_id, state in flakes.items()
+            },
+        }
+        self.redis_connection.set(
+            self.key,
+            json.dumps(content),
+            ex=int(FLAKE_DETECTION_WINDOW.total_seconds()),
+        )
+
+
 class FlakeDetector:
     def __init__(
         self, db_session, repoid, default_branch=None, failure_normalizer=None
@@ -59,9 +120,13 @@ class FlakeDetector:
             )
         self.failure_normalizer = failure_normalizer
         self.resulting_flakes = dict()
+        # When each flaky test last ran
+        self.flakes_last_instance_at: Dict[str, datetime] = dict()
+        # The tests whose instances went through `detect_flakes`
+        self.evaluated_tests: Set[str] = set()
 
     @trace
-    def populate(self, db_session):
+    def populate(self, db_session, since: Optional[datetime] = None):
         """
         Populate test_instances_ordered_by_test with:
         Test instances on a given repo that were uploaded in the past
@@ -70,8 +135,14 @@ class FlakeDetector:
         They are ordered by test id because we want to be able to fetch
         all the test instances in one query but we want them to be separated by
         test id so we can process one test id at a time
+
+        The instances are streamed from the database as `detect_flakes` goes
+        through them, never all of them are in memory at once
+
+        If `since` is given, only the tests that ran since then are looked at
+        (but with all their instances in the past 30 days)
         """
-        self.test_instances_ordered_by_test = (
+        query = (
             db_session.query(
                 TestInstance.test_id.label("test_id"),
                 TestInstance.outcome,
@@ -88,17 +159,21 @@ class FlakeDetector:
             .join(Repository, Repository.repoid == Test.repoid)
             .filter(
                 Repository.repoid == self.repoid,
-                Upload.created_at >= (datetime.now() - timedelta(days=30)),
+                Upload.created_at >= (datetime.now() - FLAKE_DETECTION_WINDOW),
             )
-            .order_by(TestInstance.test_id)
-            .all()
-        )
-        memory_used_kb = getsizeof(self.test_instances_ordered_by_test) // 1024
-        metrics.gauge(
-            key="flake_detection.populate.aux_memory_used",
-            value=memory_used_kb,
-            unit="kilobytes",
         )
+        if since is not None:
+            tests_that_ran_since = (
+                db_session.query(TestInstance.test_id)
+                .join(Test)
+                .join(Upload, TestInstance.upload_id == Upload.id_)
+                .filter(Test.repoid == self.repoid, Upload.created_at >= since)
+                .distinct()
+            )
+            query = query.filter(TestInstance.test_id.in_(tests_that_ran_since))
+        self.test_instances_ordered_by_test = query.order_by(
+            TestInstance.test_id
+        ).yield_per(FLAKE_DETECTION_BATCH_SIZE)
 
     def check_if_failed_on_default(
         self, curr_test_context: FlakeDetectionContext, instance: TestInstance
@@ -186,62 +261,102 @@ class FlakeDetector:
         Returns a list of tuples of flaky test id and type of flake
         """
         curr_test_context = FlakeDetectionContext()
+        number_of_test_instances = 0
 
-        metrics.distribution(
-            "flake_detection.detect_flakes.number_of_test_instances",
-            len(self.test_instances_ordered_by_test),
-            unit="test_instance",
-        )
         with metrics.timing("flake_detection.detect_flakes.total_time_taken"):
             for instance in self.test_instances_ordered_by_test:
+                number_of_test_instances += 1
                 # because the query above orders by test_id, if we see a new test
                 # we are now trying to determine if the next test is flaky
                 if instance.test_id != curr_test_context.curr_test_id:
+                    self._finish_test(curr_test_context)
                     curr_test_context.reset(instance.test_id)
+                    self.evaluated_tests.add(instance.test_id)
+
+                if (
+                    curr_test_context.last_instance_at is None
+                    or instance.created_at > curr_test_context.last_instance_at
+                ):
+                    curr_test_context.last_instance_at = instance.created_at
 
                 # if we've already determined the current test to be a flake
                 # we don't have to keep examining instances of this test
                 if curr_test_context.is_curr_flake:
                     continue
 
-                with metrics.timing(
-                    "flake_detection.detect_flakes.process_individual_test_instance"
+                # check if failed on default branch
+                # should probably automatically create an issue here
+                if self.check_if_failed_on_default(curr_test_context, instance):
+                    metrics.incr(
+                        "flake_detection.detect_flakes.flake_detected",
+                        1,
+                        tags={"flake_type": str(FlakeType.FAILED_IN_DEFAULT_BRANCH)},
+                    )
+                # else check if consecutive fails, ignoring skips
+                elif self.check_if_consecutive_diff_outcomes(
+                    curr_test_context, instance
                 ):
-                    # check if failed on default branch
-                    # should probably automatically create an issue here
-                    if self.check_if_failed_on_default(curr_test_context, instance):
-                        metrics.incr(
-                            "flake_detection.detect_flakes.flake_detected",
-                            1,
-                            tags={
-                                "flake_type": str(FlakeType.FAILED_IN_DEFAULT_BRANCH)
-                            },
-                        )
-                    # else check if consecutive fails, ignoring skips
-                    elif self.check_if_consecutive_diff_outcomes(
+                    metrics.incr(
+                        "flake_detection.detect_flakes.flake_detected",
+                        1,
+                        tags={"flake_type": str(FlakeType.CONSECUTIVE_DIFF_OUTCOMES)},
+                    )
+
+                # else check if meets other requirements for flakes
+                elif (
+                    instance.failure_message is not None
+                    and self.check_if_failure_messages_match(
                         curr_test_context, instance
-                    ):
-                        metrics.incr(
-                            "flake_detection.detect_flakes.flake_detected",
-                            1,
-                            tags={
-                                "flake_type": str(FlakeType.CONSECUTIVE_DIFF_OUTCOMES)
-                            },
-                        )
-
-                    # else check if meets other requirements for flakes
-                    elif (
-                        instance.failure_message is not None
-                        and self.check_if_failure_messages_match(
-                            curr_test_context, instance
-                        )
-                    ):
-                        metrics.incr(
-                            "flake_detection.detect_flakes.flake_detected",
-                            1,
-                            tags={
-                                "flake_type": str(FlakeType.UNRELATED_MATCHING_FAILURES)
-                            },
-                        )
+                    )
+                ):
+                    metrics.incr(
+                        "flake_detection.detect_flakes.flake_detected",
+                        1,
+                        tags={"flake_type": str(FlakeType.UNRELATED_MATCHING_FAILURES)},
+                    )
+            self._finish_test(curr_test_context)
 
+        metrics.distribution(
+            "flake_detection.detect_flakes.number_of_test_instances",
+            number_of_test_instances,
+            unit="test_instance",
+        )
         return self.resulting_flakes
+
+    def _finish_test(self, curr_test_context: FlakeDetectionContext):
+        if curr_test_context.is_curr_flake:
+            self.flakes_last_instance_at[
+                curr_test_context.curr_test_id
+            ] = curr_test_context.last_instance_at
+
+    @trace
+    def detect_flakes_incrementally(
+        self, db_session, state_store: FlakeStateStore
+    ) -> dict[str, FlakeType]:
+        """
+        Same as `populate` + `detect_flakes`, but only looking at the tests that
+        ran since the last time this was called for the repo. The flakes found
+        back then for the other tests are taken from `state_store`, and the
+        updated flakes are saved there for the next run.
+
+        The first run (or one after the state expired) looks at every test.
+        """
+        run_started_at = datetime.now()
+        last_run, previous_flakes = state_store.load()
+        self.populate(db_session, since=last_run)
+        self.detect_flakes()
+        window_start = run_started_at - FLAKE_DETECTION_WINDOW
+        flakes = {
+            test_id: state
+            for test_id, state in previous_flakes.items()
+            if test_id not in self.evaluated_tests
+            # comparing timestamps, the database gives timezone aware datetimes
+            and state.last_instance_at.timestamp() >= window_start.timestamp()
+        }
+        for test_id, flake_type in self.resulting_flakes.items():
+            flakes[test_id] = FlakeState(
+                flake_type=flake_type,
+                last_instance_at=self.flakes_last_instance_at[test_id],
+            )
+        state_store.save(run_started_at, flakes)
+        return {test_id: state.flake_type for test_id, state in flakes.items()}
@@ -7,11 +7,13 @@ This packages uses the following services:
 import asyncio
 import dataclasses
 import logging
-from typing import Iterator, List
+import time
+from typing import Dict, Iterator, List, Optional
 
 from celery.exceptions import CeleryError, SoftTimeLimitExceeded
 from shared.config import get_config
 from shared.helpers.yaml import default_if_true
+from shared.torngit.exceptions import TorngitRateLimitError
 from shared.yaml import UserYaml
 
 from database.models.core import GITHUB_APP_INSTALLATION_DEFAULT_NAME
@@ -35,12 +37,51 @@ from services.notification.notifiers.checks.checks_with_fallback import (
     ChecksWithFallback,
 )
 from services.notification.notifiers.codecov_slack_app import CodecovSlackAppNotifier
+from services.notification.notifiers.comment import CommentNotifier
+from services.notification.notifiers.status.base import StatusNotifier
 from services.yaml import read_yaml_field
 from services.yaml.reader import get_components_from_yaml
 
 log = logging.getLogger(__name__)
 
 
+def get_max_concurrent_notifiers() -> int:
+    return get_config(
+        "setup", "notifications", "max_concurrent_notifiers_per_provider", default=3
+    )
+
+
+def get_max_rate_limit_wait() -> float:
+    """How long (in seconds) notifiers wait for a provider rate limit to reset
+    before giving up"""
+    return get_config("setup", "notifications", "max_rate_limit_wait", default=10)
+
+
+class NotifierGate(object):
+    """Bounds how many notifiers talk to the same provider at once, and holds them
+    back while the provider is rate limiting us"""
+
+    def __init__(self, max_concurrent: int):
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.blocked_until: float = 0
+
+    def block_for(self, seconds: float) -> None:
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def remaining_block(self) -> float:
+        return max(self.blocked_until - time.monotonic(), 0)
+
+
+def _get_rate_limit_wait(exc: TorngitRateLimitError) -> Optional[float]:
+    retry_after = getattr(exc, "retry_after", None)
+    if retry_after is not None:
+        return float(retry_after)
+    reset = getattr(exc, "reset", None)
+    if reset is not None:
+        return max(float(reset) - time.time(), 0)
+    return None
+
+
 class NotificationService(object):
     def __init__(
         self,
@@ -218,19 +259,67 @@ class NotificationService(object):
         for notifier in self.get_notifiers_instances():
             if notifier.is_enabled():
                 notification_instances.append(notifier)
-        results = []
-        chunk_size = 3
-        for i in range(0, len(notification_instances), chunk_size):
-            notification_instances_chunk = notification_instances[i : i + chunk_size]
-            task_chunk = [
-                self.notify_individual_notifier(notifier, comparison)
-                for notifier in notification_instances_chunk
-            ]
-            results.extend(await asyncio.gather(*task_chunk))
-        return results
+        gates: Dict[str, NotifierGate] = {}
+        max_concurrent = get_max_concurrent_notifiers()
+        tasks = []
+        for notifier in notification_instances:
+            gate_key = self._get_notifier_gate_key(notifier)
+            if gate_key not in gates:
+                gates[gate_key] = NotifierGate(max_concurrent)
+            tasks.append(
+                self._notify_through_gate(notifier, comparison, gates[gate_key])
+            )
+        return list(await asyncio.gather(*tasks))
+
+    def _get_notifier_gate_key(self, notifier: AbstractBaseNotifier) -> str:
+        # notifiers that talk to the git provider share its limits, the others
+        # (slack, webhooks...) each talk to their own service
+        if isinstance(notifier, (ChecksWithFallback, StatusNotifier, CommentNotifier)):
+            return self.repository.service
+        return notifier.name
+
+    async def _notify_through_gate(
+        self,
+        notifier: AbstractBaseNotifier,
+        comparison: ComparisonProxy,
+        gate: NotifierGate,
+    ):
+        queued_at = time.monotonic()
+        async with gate.semaphore:
+            wait = gate.remaining_block()
+            if wait > get_max_rate_limit_wait():
+                log.warning(
+                    "Not sending notification because the provider is rate limiting us",
+                    extra=dict(
+                        repoid=comparison.head.commit.repoid,
+                        commit=comparison.head.commit.commitid,
+                        notifier=notifier.name,
+                        notifier_title=notifier.title,
+                        wait=wait,
+                    ),
+                )
+                return {
+                    "notifier": notifier.name,
+                    "title": notifier.title,
+                    "result": None,
+                }
+            if wait > 0:
+                await asyncio.sleep(wait)
+            queued_ms = (time.monotonic() - queued_at) * 1000
+            metrics.timing(
+                f"worker.services.notifications.notifiers.{notifier.name}.queued",
+                queued_ms,
+            )
+            return await self.notify_individual_notifier(
+                notifier, comparison, gate=gate, queued_ms=queued_ms
+            )
 
     async def notify_individual_notifier(
-        self, notifier: AbstractBaseNotifier, comparison: ComparisonProxy
+        self,
+        notifier: AbstractBaseNotifier,
+        comparison: ComparisonProxy,
+        gate: Optional[NotifierGate] = None,
+        queued_ms: Optional[float] = None,
     ) -> NotificationResult:
         commit = comparison.head.commit
         base_commit = comparison.project_coverage_base.commit
@@ -261,6 +350,7 @@ class NotificationService(object):
                 "Individual notification done",
                 extra=dict(
                     timing_ms=notify_timer.ms,
+                    queued_ms=queued_ms,
                     individual_result=individual_result,
                     commit=commit.commitid,
                     base_commit=base_commit.commitid
@@ -295,6 +385,25 @@ class NotificationService(object):
                 ),
             )
             return individual_result
+        except TorngitRateLimitError as e:
+            individual_result = {
+                "notifier": notifier.name,
+                "title": notifier.title,
+                "result": None,
+            }
+            wait = _get_rate_limit_wait(e)
+            if gate is not None and wait is not None:
+                gate.block_for(wait)
+            log.warning(
+                "Individual notifier was rate limited",
+                extra=dict(
+                    repoid=commit.repoid,
+                    commit=commit.commitid,
+                    individual_result=individual_result,
+                    wait=wait,
+                ),
+            )
+            return individual_result
         except asyncio.CancelledError as e:
             log.warning(
                 "Individual notifier cancelled",
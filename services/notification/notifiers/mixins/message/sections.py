@@ -117,7 +117,7 @@ class NewHeaderSectionWriter(BaseSectionWriter):
         pull_dict = comparison.enriched_pull.provider_pull
         repo_service = comparison.repository_service.service
 
-        diff_totals = head_report.apply_diff(diff)
+        diff_totals = comparison.get_diff_totals(diff)
         if diff_totals:
             misses_and_partials = diff_totals.misses + diff_totals.partials
             patch_coverage = diff_totals.coverage
@@ -265,7 +265,7 @@ class HeaderSectionWriter(BaseSectionWriter):
                 f"> Report is {behind_by} commits behind head on {pull_dict['base']['branch']}."
             )
 
-        diff_totals = head_report.apply_diff(diff)
+        diff_totals = comparison.get_diff_totals(diff)
         if diff_totals and diff_totals.coverage is not None:
             yield (
                 "> The diff coverage is `{0}%`.".format(
@@ -664,7 +664,9 @@ class FlagSectionWriter(BaseSectionWriter):
                         "before": get_totals_from_file_in_reports(base_flags, name),
                         "after": flag.totals,
                         "diff": (
-                            flag.apply_diff(diff) if walk(diff, ("files",)) else None
+                            comparison.get_flag_diff_totals(flag, diff)
+                            if walk(diff, ("files",))
+                            else None
                         ),
                         "carriedforward": flag.carriedforward,
                         "carriedforward_from": flag.carriedforward_from,
@@ -789,9 +791,7 @@ class ComponentsSectionWriter(BaseSectionWriter):
                         else None
                     ),
                     "after": filtered_comparison.head.report.totals,
-                    "diff": filtered_comparison.head.report.apply_diff(
-                        diff, _save=False
-                    ),
+                    "diff": filtered_comparison.get_diff_totals(diff, _save=False),
                 }
             )
         return component_data
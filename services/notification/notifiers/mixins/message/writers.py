@@ -26,8 +26,7 @@ class TeamPlanWriter:
     def header_lines(self, comparison: ComparisonProxy, diff, settings) -> List[str]:
         lines = []
 
-        head_report = comparison.head.report
-        diff_totals = head_report.apply_diff(diff)
+        diff_totals = comparison.get_diff_totals(diff)
 
         if diff_totals:
             misses_and_partials = diff_totals.misses + diff_totals.partials
@@ -12,7 +12,7 @@ class StatusPatchMixin(object):
     async def get_patch_status(self, comparison) -> Tuple[str, str]:
         threshold = Decimal(self.notifier_yaml_settings.get("threshold") or "0.0")
         diff = await comparison.get_diff(use_original_base=True)
-        totals = comparison.head.report.apply_diff(diff)
+        totals = comparison.get_diff_totals(diff)
         if self.notifier_yaml_settings.get("target") not in ("auto", None):
             target_coverage = Decimal(
                 str(self.notifier_yaml_settings.get("target")).replace("%", "")
@@ -250,7 +250,7 @@ class StatusProjectMixin(object):
             )
             return None
         diff = await comparison.get_diff(use_original_base=True)
-        patch_totals = comparison.head.report.apply_diff(diff)
+        patch_totals = comparison.get_diff_totals(diff)
         if patch_totals is None or patch_totals.lines == 0:
             # Coverage was not changed by patch
             return ("success", ", passed because coverage was not affected by patch")
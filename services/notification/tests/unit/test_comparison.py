@@ -32,3 +32,48 @@ class TestFilteredComparison(object):
         res = await comparison.get_changes()
         expected_result = [Change(path="apple"), Change(path="pear")]
         assert expected_result == res
+
+    def test_get_filtered_comparison_memoized(self, mocker):
+        comparison = ComparisonProxy(mocker.MagicMock())
+        filtered_comparison = comparison.get_filtered_comparison(["b", "a"], None)
+        assert comparison.get_filtered_comparison(["a", "b"], None) is (
+            filtered_comparison
+        )
+        assert comparison.get_filtered_comparison(["a"], None) is not (
+            filtered_comparison
+        )
+        assert comparison.get_filtered_comparison(None, None) is comparison
+        # each filtered report only gets built once
+        assert comparison.comparison.head.report.filter.call_count == 2
+
+    def test_get_diff_totals_memoized(self, mocker):
+        comparison = ComparisonProxy(mocker.MagicMock())
+        apply_diff = comparison.comparison.head.report.apply_diff
+        diff, other_diff = {"files": {}}, {"files": {}}
+        res = comparison.get_diff_totals(diff, _save=False)
+        assert res == apply_diff.return_value
+        assert comparison.get_diff_totals(diff, _save=False) == res
+        assert apply_diff.call_count == 1
+        # the totals weren't saved on the report the first time
+        assert comparison.get_diff_totals(diff) == res
+        assert comparison.get_diff_totals(diff) == res
+        assert comparison.get_diff_totals(diff, _save=False) == res
+        assert apply_diff.call_count == 2
+        comparison.get_diff_totals(other_diff)
+        assert apply_diff.call_count == 3
+
+    def test_get_flag_diff_totals_memoized(self, mocker):
+        comparison = ComparisonProxy(mocker.MagicMock())
+        filtered_comparison = comparison.get_filtered_comparison(["unit"], None)
+        flag, other_flag = mocker.MagicMock(), mocker.MagicMock()
+        flag.name, other_flag.name = "unit", "integration"
+        diff = {"files": {}}
+        for _ in range(2):
+            assert comparison.get_flag_diff_totals(flag, diff) == (
+                flag.apply_diff.return_value
+            )
+            comparison.get_flag_diff_totals(other_flag, diff)
+            filtered_comparison.get_flag_diff_totals(flag, diff)
+        flag.apply_diff.assert_has_calls([mocker.call(diff), mocker.call(diff)])
+        assert flag.apply_diff.call_count == 2
+        assert other_flag.apply_diff.call_count == 1
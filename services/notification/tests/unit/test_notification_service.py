@@ -1,3 +1,4 @@
+import asyncio
 import os
 from asyncio import CancelledError
 from asyncio import TimeoutError as AsyncioTimeoutError
@@ -6,6 +7,7 @@ import mock
 import pytest
 from celery.exceptions import SoftTimeLimitExceeded
 from shared.reports.resources import Report, ReportFile, ReportLine
+from shared.torngit.exceptions import TorngitRateLimitError
 from shared.yaml import UserYaml
 
 from database.enums import Decoration, Notification, NotificationState
@@ -22,6 +24,8 @@ from services.notification.notifiers.checks import ProjectChecksNotifier
 from services.notification.notifiers.checks.checks_with_fallback import (
     ChecksWithFallback,
 )
+from services.notification.notifiers.slack import SlackNotifier
+from services.notification.notifiers.status import ProjectStatusNotifier
 
 
 @pytest.fixture
@@ -338,6 +342,85 @@ class TestNotificationService(object):
         res = await notifications_service.notify(sample_comparison)
         assert expected_result == res
 
+    @pytest.mark.asyncio
+    async def test_notify_concurrency_per_provider(
+        self, mocker, dbsession, sample_comparison, mock_configuration
+    ):
+        mock_configuration.params["setup"]["notifications"] = {
+            "max_concurrent_notifiers_per_provider": 2
+        }
+        running = {"github": 0, "slack": 0}
+        max_running = {"github": 0, "slack": 0}
+
+        def make_notifier(notifier_class, name, key):
+            async def notify(comparison):
+                running[key] += 1
+                max_running[key] = max(max_running[key], running[key])
+                await asyncio.sleep(0.01)
+                running[key] -= 1
+                return NotificationResult(
+                    notification_attempted=False, notification_successful=None
+                )
+
+            notifier = mocker.MagicMock(
+                notifier_class,
+                is_enabled=mocker.MagicMock(return_value=True),
+                title=name,
+                notification_type=Notification.status_project,
+                decoration_type=Decoration.standard,
+                notify=notify,
+            )
+            notifier.name = name
+            return notifier
+
+        notifiers = [
+            make_notifier(ProjectStatusNotifier, f"status_{i}", "github")
+            for i in range(5)
+        ] + [make_notifier(SlackNotifier, "slack", "slack") for i in range(2)]
+        mocker.patch.object(
+            NotificationService, "get_notifiers_instances", return_value=notifiers
+        )
+        commit = sample_comparison.head.commit
+        notifications_service = NotificationService(commit.repository, {})
+        res = await notifications_service.notify(sample_comparison)
+        assert [r["title"] for r in res] == [n.title for n in notifiers]
+        assert max_running == {"github": 2, "slack": 2}
+
+    @pytest.mark.asyncio
+    async def test_notify_rate_limited(
+        self, mocker, dbsession, sample_comparison, mock_configuration
+    ):
+        mock_configuration.params["setup"]["notifications"] = {
+            "max_concurrent_notifiers_per_provider": 1
+        }
+        rate_limit_error = TorngitRateLimitError.__new__(TorngitRateLimitError)
+        rate_limit_error.retry_after = 600
+        notifiers = []
+        for i in range(3):
+            notifier = mocker.MagicMock(
+                ProjectStatusNotifier,
+                is_enabled=mocker.MagicMock(return_value=True),
+                title=f"status_{i}",
+                notification_type=Notification.status_project,
+                decoration_type=Decoration.standard,
+                notify=mock.AsyncMock(side_effect=rate_limit_error),
+            )
+            notifier.name = f"status_{i}"
+            notifiers.append(notifier)
+        mocker.patch.object(
+            NotificationService, "get_notifiers_instances", return_value=notifiers
+        )
+        commit = sample_comparison.head.commit
+        notifications_service = NotificationService(commit.repository, {})
+        res = await notifications_service.notify(sample_comparison)
+        assert res == [
+            {"notifier": f"status_{i}", "title": f"status_{i}", "result": None}
+            for i in range(3)
+        ]
+        assert notifiers[0].notify.called
+        assert not notifiers[1].notify.called
+        assert not notifiers[2].notify.called
+
     @pytest.mark.asyncio
     async def test_notify_individual_notifier_timeout(self, mocker, sample_comparison):
         current_yaml = {}
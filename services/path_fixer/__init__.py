@@ -3,8 +3,9 @@ import os.path
 import random
 import typing
 from collections import defaultdict
+from functools import lru_cache
 from pathlib import PurePath
-from typing import Optional, Sequence
+from typing import Dict, Optional, Sequence, Tuple
 
 from helpers.pathmap import _resolve_path
 from helpers.pathmap.tree import Tree
@@ -23,6 +24,32 @@ def invert_pattern(string: str) -> str:
         return "!%s" % string
 
 
+class TocIndex(object):
+    """
+    The paths of a TOC, indexed by their components in reverse order (`Tree`) so
+        a path can be looked up by its suffix. The lookups are memoized, the same
+        paths show up again and again in the uploads of a commit.
+    """
+
+    def __init__(self, toc: Sequence[str]) -> None:
+        self.tree = Tree()
+        self.tree.construct_tree(toc)
+        self._resolved: Dict[Tuple[str, Optional[int]], Optional[str]] = {}
+
+    def resolve(self, path: str, ancestors=None) -> Optional[str]:
+        key = (path, ancestors)
+        if key not in self._resolved:
+            self._resolved[key] = _resolve_path(self.tree, path, ancestors)
+        return self._resolved[key]
+
+
+@lru_cache(maxsize=4)
+def _get_toc_index(toc: Tuple[str, ...]) -> TocIndex:
+    # Every upload of a commit usually carries the same TOC, so the index is built
+    # once and shared by their path fixers
+    return TocIndex(toc)
+
+
 class PathFixer(object):
     """
     Applies default path fixes and any fixes specified in the codecov yaml file to resolve file paths in coverage reports.
@@ -73,13 +100,18 @@ class PathFixer(object):
     def initialize(self) -> None:
         self.custom_fixes = UserPathFixes(self.yaml_fixes)
         self.path_matcher = UserPathIncludes(self.path_patterns)
-        self.tree = Tree()
-        self.tree.construct_tree(self.toc)
+        self.toc_index = _get_toc_index(tuple(self.toc))
         self.calculated_paths = defaultdict(set)
+        self._cleaned_paths: Dict[str, Optional[str]] = {}
 
     def clean_path(self, path: str) -> Optional[str]:
         if not path:
             return None
+        if path not in self._cleaned_paths:
+            self._cleaned_paths[path] = self._clean_path(path)
+        return self._cleaned_paths[path]
+
+    def _clean_path(self, path: str) -> Optional[str]:
         path = os.path.relpath(path.replace("\\", "/").lstrip("./").lstrip("../"))
         if self.yaml_fixes:
             # applies pre
@@ -99,7 +131,7 @@ class PathFixer(object):
         return path
 
     def resolver(self, path: str, ancestors=None):
-        return _resolve_path(self.tree, path, ancestors)
+        return self.toc_index.resolve(path, ancestors)
 
     def __call__(self, path: str, bases_to_try=None) -> str:
         res = self.clean_path(path)
@@ -1,5 +1,30 @@
+import re
+from typing import List, Pattern, Sequence
+
+# backreferences would point to the wrong group once patterns are joined, and inline
+# flags would apply to all of them
+_unjoinable = re.compile(r"\\[1-9]|\(\?P=|\(\?[aiLmsux-]")
+
+
 def regexp_match_one(regexp_patterns, path) -> bool:
     for pattern in regexp_patterns:
         if pattern.match(path):
             return True
     return False
+
+
+def combine_patterns(patterns: Sequence[str]) -> List[Pattern]:
+    """
+    Compiles `patterns` into a list of regexes for `regexp_match_one`
+
+    When possible, the list holds a single regex matching wherever any of the patterns
+        would, so a path is checked against all of them in one go. Otherwise the
+        patterns are compiled one by one.
+    """
+    compiled = [re.compile(pattern) for pattern in patterns]
+    if len(compiled) < 2 or any(_unjoinable.search(p) for p in patterns):
+        return compiled
+    try:
+        return [re.compile("|".join("(?:%s)" % pattern for pattern in patterns))]
+    except re.error:
+        return compiled
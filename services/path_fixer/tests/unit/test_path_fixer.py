@@ -143,3 +143,22 @@ class TestBasePathAwarePathFixer(object):
             "original_path_fixer_result": None,
             "base_path_aware_result": "project/__init__.py",
         }
+
+    def test_path_fixers_share_toc_index(self, mocker):
+        toc = ["project/__init__.py", "tests/__init__.py", "tests/test_project.py"]
+        pf = PathFixer.init_from_user_yaml({}, toc, [])
+        other_pf = PathFixer.init_from_user_yaml(UserYaml({}), list(toc), ["unit"])
+        assert pf.toc_index is other_pf.toc_index
+        assert PathFixer.init_from_user_yaml({}, toc[:2], []).toc_index is not (
+            pf.toc_index
+        )
+        resolve_path = mocker.patch(
+            "services.path_fixer._resolve_path", return_value="tests/test_project.py"
+        )
+        pf = PathFixer([], [], ["some/other/test_project.py"])
+        assert pf("test_project.py") == "tests/test_project.py"
+        assert pf("test_project.py") == "tests/test_project.py"
+        other_pf = PathFixer([], [], ["some/other/test_project.py"])
+        assert other_pf("test_project.py") == "tests/test_project.py"
+        assert resolve_path.call_count == 1
+        assert pf.calculated_paths == {"tests/test_project.py": {"test_project.py"}}
@@ -29,3 +29,23 @@ class TestUserPathIncludes(BaseTestCase):
         assert upi("normal/sample/path/file.py")
         assert upi("normal/sample/path/file.pyc")
         assert not upi("any/to/file.cpp")
+
+    def test_user_path_many_patterns(self):
+        path_patterns = ["src/.*", "lib/[^/]+\\.py", "!src/vendor/.*", "!.*_test\\.py"]
+        upi = UserPathIncludes(path_patterns)
+        assert len(upi.includes) == 1
+        assert len(upi.excludes) == 1
+        assert upi("src/file.py")
+        assert upi("lib/file.py")
+        assert not upi("lib/inner/file.py")
+        assert not upi("src/vendor/file.py")
+        assert not upi("src/file_test.py")
+        assert not upi("other/file.py")
+
+    def test_user_path_patterns_not_joined(self):
+        path_patterns = ["(src)/\\1/.*", "lib/.*"]
+        upi = UserPathIncludes(path_patterns)
+        assert len(upi.includes) == 2
+        assert upi("src/src/file.py")
+        assert upi("lib/file.py")
+        assert not upi("src/lib/file.py")
@@ -1,7 +1,6 @@
-import re
 import typing
 
-from services.path_fixer.match import regexp_match_one
+from services.path_fixer.match import combine_patterns, regexp_match_one
 
 
 class UserPathIncludes(object):
@@ -40,16 +39,13 @@ class UserPathIncludes(object):
             self.include_all = True
         else:
             self.include_all = False
-            self.includes = list(map(re.compile, self.includes))
+            self.includes = combine_patterns(list(self.includes))
 
         if "!.*" in self.path_patterns:
             self.exclude_all = False
         else:
-            self.excludes = list(
-                map(
-                    lambda p: re.compile(p[1:]),
-                    filter(lambda p: p.startswith("!"), self.path_patterns),
-                )
+            self.excludes = combine_patterns(
+                [p[1:] for p in self.path_patterns if p.startswith("!")]
             )
 
     def __call__(self, value: str) -> bool:
@@ -1,6 +1,7 @@
 import logging
+import threading
 import zlib
-from typing import Optional
+from typing import Dict, Optional
 
 from redis import Redis
 from shared.config import get_config
@@ -17,13 +18,31 @@ def get_redis_url() -> str:
     return f"redis://{hostname}:{port}"
 
 
+# clients shared by everything in this process, by url. Each one has its own
+# connection pool, which redis-py resets in forked children
+_redis_instances: Dict[str, Redis] = {}
+_redis_instances_lock = threading.Lock()
+
+
 def get_redis_connection() -> Redis:
     url = get_redis_url()
     return _get_redis_instance_from_url(url)
 
 
 def _get_redis_instance_from_url(url) -> Redis:
-    return Redis.from_url(url)
+    redis_instance = _redis_instances.get(url)
+    if redis_instance is None:
+        with _redis_instances_lock:
+            redis_instance = _redis_instances.get(url)
+            if redis_instance is None:
+                redis_instance = Redis.from_url(
+                    url,
+                    health_check_interval=get_config(
+                        "setup", "redis", "health_check_interval", default=30
+                    ),
+                )
+                _redis_instances[url] = redis_instance
+    return redis_instance
 
 
 def download_archive_from_redis(
@@ -1,3 +1,4 @@
+import asyncio
 import copy
 import itertools
 import logging
@@ -22,6 +23,7 @@ from shared.storage.exceptions import FileNotInStorageError
 from shared.torngit.exceptions import TorngitError
 from shared.utils.sessions import Session, SessionType
 from shared.yaml import UserYaml
+from sqlalchemy.orm import selectinload
 
 from database.enums import ReportType
 from database.models import Commit, Repository, Upload, UploadError
@@ -40,11 +42,22 @@ from helpers.exceptions import (
     ReportExpiredException,
     RepositoryWithoutValidBotError,
 )
-from helpers.labels import get_labels_per_session
+from helpers.labels import get_labels_per_session_index
 from services.archive import ArchiveService
+from services.report.chunks_cache import (
+    ChunksCache,
+    ChunksCacheKey,
+    get_chunks_cache,
+    get_chunks_cache_key,
+)
 from services.report.parser import get_proper_parser
 from services.report.parser.types import ParsedRawReport
-from services.report.raw_upload_processor import process_raw_upload
+from services.report.raw_upload_processor import (
+    ParsedUpload,
+    merge_parsed_upload,
+    parse_raw_upload,
+    process_raw_upload,
+)
 from services.repository import get_repo_provider_service
 from services.yaml.reader import get_paths_from_flags
 
@@ -68,6 +81,7 @@ class ProcessingResult(object):
     partially_deleted_sessions: typing.List[int]
     raw_report: ParsedRawReport
     upload_obj: Upload
+    parsed_upload: Optional[ParsedUpload] = None
 
     def as_dict(self):
         # Weird flow for now in order to keep things compatible with previous logging
@@ -178,9 +192,26 @@ class BaseReportService:
 class ReportService(BaseReportService):
     metrics_prefix = "services.report"
 
-    def __init__(self, current_yaml: UserYaml):
+    def __init__(
+        self,
+        current_yaml: UserYaml,
+        cache_reports: bool = False,
+        use_chunks_cache: bool = False,
+    ):
         super().__init__(current_yaml)
         self.flag_dict = None
+        # Reports loaded by `get_existing_report_for_commit`, by commit, report_code and
+        # report class. Only for services that don't change the reports they load
+        self._report_cache: Optional[Dict[tuple, Optional[Report]]] = (
+            {} if cache_reports else None
+        )
+        # Chunks read ahead of time by `prefetch_chunks`, used (once) instead of
+        # reading them from storage again
+        self._prefetched_chunks: Dict[tuple, str] = {}
+        # Whether chunks are read through the worker's chunks cache. Only for
+        # services that don't save the reports they load, so a report is never
+        # rebuilt and saved from chunks that are not the latest ones
+        self._use_chunks_cache = use_chunks_cache
 
     def has_initialized_report(self, commit: Commit) -> bool:
         """Says whether a commit has already initialized its report or not
@@ -401,9 +432,16 @@ class ReportService(BaseReportService):
             return sessions
 
         db_session = commit.get_db_session()
-        report_uploads = db_session.query(Upload).filter(
-            (Upload.report_id == commit_report.id_)
-            & ((Upload.state == "processed") | (Upload.state == "complete"))
+        # the totals and flags of all uploads are loaded with one query each,
+        # instead of a couple of lazy loads per upload
+        report_uploads = (
+            db_session.query(Upload)
+            .filter(
+                (Upload.report_id == commit_report.id_)
+                & ((Upload.state == "processed") | (Upload.state == "complete"))
+            )
+            .options(selectinload(Upload.totals), selectinload(Upload.flags))
+            .all()
         )
 
         for upload in report_uploads:
@@ -425,27 +463,31 @@ class ReportService(BaseReportService):
             "Building report sessions from upload records",
             extra=dict(
                 commit=commit.commitid,
-                upload_count=report_uploads.count(),
+                upload_count=len(report_uploads),
                 session_ids=list(sessions.keys()),
             ),
         )
 
         return sessions
 
+    def get_report_class(self, sessions) -> type:
+        report_class = Report
+        for sess in sessions.values():
+            if isinstance(sess, Session):
+                if sess.session_type == SessionType.carriedforward:
+                    report_class = EditableReport
+            else:
+                # sess is an encoded dict
+                if sess.get("st") == "carriedforward":
+                    report_class = EditableReport
+        return report_class
+
     @sentry_sdk.trace
     def build_report(
         self, chunks, files, sessions, totals, report_class=None
     ) -> Report:
         if report_class is None:
-            report_class = Report
-            for sess in sessions.values():
-                if isinstance(sess, Session):
-                    if sess.session_type == SessionType.carriedforward:
-                        report_class = EditableReport
-                else:
-                    # sess is an encoded dict
-                    if sess.get("st") == "carriedforward":
-                        report_class = EditableReport
+            report_class = self.get_report_class(sessions)
         with metrics.timer(
             f"services.report.ReportService.build_report.{report_class.__name__}"
         ):
@@ -459,6 +501,91 @@ class ReportService(BaseReportService):
     async def build_report_from_commit(self, commit) -> Report:
         return await self._do_build_report_from_commit(commit)
 
+    def _get_chunks_cache(self) -> Optional[ChunksCache]:
+        if not self._use_chunks_cache:
+            return None
+        return get_chunks_cache()
+
+    def _read_chunks(
+        self, archive_service: ArchiveService, commit: Commit, report_code=None
+    ) -> str:
+        chunks = self._prefetched_chunks.pop((commit.commitid, report_code), None)
+        if chunks is not None:
+            return chunks
+        chunks_cache = self._get_chunks_cache()
+        if chunks_cache is None:
+            return archive_service.read_chunks(commit.commitid, report_code)
+        return self._read_chunks_through_cache(
+            chunks_cache,
+            get_chunks_cache_key(commit, report_code),
+            archive_service,
+            commit.commitid,
+            report_code,
+        )
+
+    def _read_chunks_through_cache(
+        self,
+        chunks_cache: Optional[ChunksCache],
+        cache_key: Optional[ChunksCacheKey],
+        archive_service: ArchiveService,
+        commitid: str,
+        report_code=None,
+    ) -> str:
+        if chunks_cache is not None:
+            chunks = chunks_cache.get(cache_key)
+            if chunks is not None:
+                return chunks
+        chunks = archive_service.read_chunks(commitid, report_code)
+        if chunks_cache is not None and chunks is not None:
+            chunks_cache.set(cache_key, chunks)
+        return chunks
+
+    async def prefetch_chunks(self, commit: Commit, report_code=None) -> None:
+        """Reads the chunks of `commit` from storage in a thread, so it can overlap
+        with other I/O, for the next `get_existing_report_for_commit` to use
+
+        Only the storage read happens outside of the calling thread, the database
+        is not touched from there.
+        The report may never be used, so this never fails: if the chunks can't be read
+        here, they are read again (and fail there) when the report is needed.
+        """
+        key = (commit.commitid, report_code)
+        if key in self._prefetched_chunks:
+            return
+        chunks_cache = self._get_chunks_cache()
+        cache_key = (
+            get_chunks_cache_key(commit, report_code)
+            if chunks_cache is not None
+            else None
+        )
+        try:
+            archive_service = self.get_archive_service(commit.repository)
+            chunks = await asyncio.to_thread(
+                self._read_chunks_through_cache,
+                chunks_cache,
+                cache_key,
+                archive_service,
+                commit.commitid,
+                report_code,
+            )
+        except FileNotInStorageError:
+            return
+        except SoftTimeLimitExceeded:
+            raise
+        except Exception:
+            log.warning(
+                "Unable to prefetch report chunks",
+                extra=dict(
+                    repoid=commit.repoid,
+                    commit=commit.commitid,
+                    report_code=report_code,
+                ),
+                exc_info=True,
+            )
+            return
+        if chunks is not None:
+            self._prefetched_chunks[key] = chunks
+
     def get_existing_report_for_commit_from_legacy_data(
         self, commit: Commit, report_class=None, *, report_code=None
     ) -> Optional[Report]:
@@ -467,7 +594,7 @@ class ReportService(BaseReportService):
             return None
         try:
             archive_service = self.get_archive_service(commit.repository)
-            chunks = archive_service.read_chunks(commitid, report_code)
+            chunks = self._read_chunks(archive_service, commit, report_code)
         except FileNotInStorageError:
             log.warning(
                 "File for chunks not found in storage",
@@ -486,6 +613,19 @@ class ReportService(BaseReportService):
         )
         return res
 
+    def uploads_may_overwrite_carriedforward_sessions(
+        self, uploads: Sequence[Upload]
+    ) -> bool:
+        """Whether merging `uploads` into a report can delete (part of) its carried
+        forward sessions, which is the one thing upload processing needs an
+        `EditableReport` for
+        """
+        return any(
+            self.current_yaml.flag_has_carryfoward(flag)
+            for upload in uploads
+            for flag in upload.flag_names
+        )
+
     def _is_labels_flags(self, flags: Sequence[str]) -> bool:
         return len(flags) > 0 and all(
             [
@@ -500,6 +640,24 @@ class ReportService(BaseReportService):
     @sentry_sdk.trace
     def get_existing_report_for_commit(
         self, commit: Commit, report_class=None, *, report_code=None
+    ) -> Optional[Report]:
+        if self._report_cache is None:
+            return self._get_existing_report_for_commit(
+                commit, report_class=report_class, report_code=report_code
+            )
+        key = (commit.commitid, report_code, report_class)
+        if key in self._report_cache:
+            metrics.incr("services.report.ReportService.report_cache.hit")
+            return self._report_cache[key]
+        metrics.incr("services.report.ReportService.report_cache.miss")
+        report = self._get_existing_report_for_commit(
+            commit, report_class=report_class, report_code=report_code
+        )
+        self._report_cache[key] = report
+        return report
+
+    def _get_existing_report_for_commit(
+        self, commit: Commit, report_class=None, *, report_code=None
     ) -> Optional[Report]:
         commit_report = commit.report
         if commit_report is None:
@@ -534,7 +692,7 @@ class ReportService(BaseReportService):
             totals = self.build_totals(commit_report.totals)
         try:
             archive_service = self.get_archive_service(commit.repository)
-            chunks = archive_service.read_chunks(commitid, report_code)
+            chunks = self._read_chunks(archive_service, commit, report_code)
         except FileNotInStorageError:
             log.warning(
                 "File for chunks not found in storage",
@@ -551,6 +709,7 @@ class ReportService(BaseReportService):
         )
 
         sessions_to_delete = []
+        labels_per_session = None
         for sid, session in report.sessions.items():
             # this mimics behavior in the `adjust_sessions` function from
             # `services/report/raw_upload_processor.py` - we need to delete
@@ -559,8 +718,9 @@ class ReportService(BaseReportService):
             # `PARTIALLY_OVERWRITTEN` and `FULLY_OVERWRITTEN` states are being saved
             labels_session = self._is_labels_flags(session.flags)
             if labels_session:
-                labels = get_labels_per_session(report, sid)
-                if not labels:
+                if labels_per_session is None:
+                    labels_per_session = get_labels_per_session_index(report)
+                if not labels_per_session.get(sid):
                     sessions_to_delete.append(sid)
 
         if len(sessions_to_delete) > 0:
@@ -908,6 +1068,139 @@ class ReportService(BaseReportService):
                 upload_obj=upload,
             )
 
+    @sentry_sdk.trace
+    def parse_upload(self, upload: Upload) -> ProcessingResult:
+        """
+            Runs the language processors over an upload without merging it into
+                any report, so it can be done without holding the upload processing lock
+
+            The returned result carries the `parsed_upload`, which should later be
+                merged into the commit report via `merge_parsed_upload_into_report`
+
+        Args:
+            upload (Upload): The upload made by the user that we are processing
+        """
+        commit = upload.report.commit
+        session = self._build_processing_session(upload)
+        try:
+            raw_uploaded_report = self.parse_raw_report_from_storage(
+                commit.repository, upload
+            )
+        except FileNotInStorageError:
+            return self._failed_processing_result(
+                session,
+                upload,
+                ProcessingError(
+                    code="file_not_in_storage",
+                    params={"location": upload.storage_path},
+                    is_retryable=True,
+                ),
+            )
+        try:
+            with metrics.timer(f"{self.metrics_prefix}.parse_upload") as t:
+                parsed_upload = parse_raw_upload(
+                    self.current_yaml,
+                    raw_uploaded_report,
+                    upload.flag_names,
+                    # Placeholder, the actual sessionid is only known when merging
+                    0,
+                    session=session,
+                    upload=upload,
+                )
+            log.info(
+                "Successfully parsed report",
+                extra=dict(
+                    repoid=commit.repoid,
+                    commit=commit.commitid,
+                    reportid=upload.external_id,
+                    timing_ms=t.ms,
+                    content_len=raw_uploaded_report.size,
+                ),
+            )
+        except ReportExpiredException:
+            log.info(
+                "Report %s is expired",
+                upload.external_id,
+                extra=dict(repoid=commit.repoid, commit=commit.commitid),
+            )
+            return self._failed_processing_result(
+                session, upload, ProcessingError(code="report_expired", params={})
+            )
+        except ReportEmptyError:
+            log.warning(
+                "Report %s is empty",
+                upload.external_id,
+                extra=dict(repoid=commit.repoid, commit=commit.commitid),
+            )
+            return self._failed_processing_result(
+                session, upload, ProcessingError(code="report_empty", params={})
+            )
+        return ProcessingResult(
+            report=None,
+            session=session,
+            error=None,
+            fully_deleted_sessions=None,
+            partially_deleted_sessions=None,
+            raw_report=raw_uploaded_report,
+            upload_obj=upload,
+            parsed_upload=parsed_upload,
+        )
+
+    @sentry_sdk.trace
+    def merge_parsed_upload_into_report(
+        self, master: Optional[Report], parsing_result: ProcessingResult
+    ) -> ProcessingResult:
+        """
+            Merges the result of `parse_upload` on top of an existing report `master`.
+                This needs exclusive access to `master`, so it's meant to be called
+                inside the upload processing lock
+
+        Args:
+            master (Optional[Report]): The current report we are building on top of
+            parsing_result (ProcessingResult): The result from `parse_upload`
+        """
+        if parsing_result.error is not None:
+            return parsing_result
+        upload = parsing_result.upload_obj
+        with metrics.timer(f"{self.metrics_prefix}.merge_parsed_upload"):
+            result = merge_parsed_upload(
+                self.current_yaml, master, parsing_result.parsed_upload, upload=upload
+            )
+        return ProcessingResult(
+            report=result.report,
+            session=parsing_result.parsed_upload.session,
+            error=None,
+            fully_deleted_sessions=result.fully_deleted_sessions,
+            partially_deleted_sessions=result.partially_deleted_sessions,
+            raw_report=result.raw_report,
+            upload_obj=upload,
+        )
+
+    def _build_processing_session(self, upload: Upload) -> Session:
+        return Session(
+            provider=upload.provider,
+            build=upload.build_code,
+            job=upload.job_code,
+            name=upload.name,
+            time=int(time()),
+            flags=upload.flag_names,
+            archive=upload.storage_path,
+            url=upload.build_url,
+        )
+
+    def _failed_processing_result(
+        self, session: Session, upload: Upload, error: ProcessingError
+    ) -> ProcessingResult:
+        return ProcessingResult(
+            report=None,
+            session=session,
+            error=error,
+            fully_deleted_sessions=None,
+            partially_deleted_sessions=None,
+            raw_report=None,
+            upload_obj=upload,
+        )
+
     def update_upload_with_processing_result(
         self, upload_obj: Upload, processing_result: ProcessingResult
     ):
@@ -954,6 +1247,9 @@ class ReportService(BaseReportService):
         network = loads(network_json_str)
         archive_data = report.to_archive().encode()
         url = archive_service.write_chunks(commit.commitid, archive_data, report_code)
+        chunks_cache = get_chunks_cache()
+        if chunks_cache is not None:
+            chunks_cache.invalidate(commit.repoid, commit.commitid, report_code)
         commit.state = "complete" if report else "error"
         commit.totals = totals
         if (
@@ -0,0 +1,112 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from json import dumps
+from typing import Optional, Tuple
+
+from shared.config import get_config
+from shared.metrics import metrics
+
+from database.models import Commit
+
+log = logging.getLogger(__name__)
+
+ChunksCacheKey = Tuple[int, str, Optional[str], str]
+
+
+def get_chunks_cache_key(commit: Commit, report_code=None) -> ChunksCacheKey:
+    """The key the chunks of `commit` are cached under
+
+    Saving a report changes the commit totals (and usually its updatestamp), so
+        the chunks cached for the old version of the report are never used again,
+        even by workers that didn't save it themselves.
+    """
+    version = dumps([str(commit.updatestamp), commit.totals], sort_keys=True)
+    return (commit.repoid, commit.commitid, report_code, version)
+
+
+class ChunksCache(object):
+    """A worker-process LRU cache of the chunks of reports read from storage
+
+    Many commits are the base of lots of comparisons (think the tip of `main`
+        and its open pulls), so the tasks comparing against them keep downloading
+        the same chunks. The cache keeps the chunks, not the built reports, since
+        reports get modified by whoever uses them (`apply_diff` stores the diff
+        totals in them, for example).
+
+    Attributes:
+        max_bytes (int): How many characters of chunks the cache holds at most
+        ttl (int): Seconds after which an entry is not used anymore
+    """
+
+    def __init__(self, max_bytes: int, ttl: int):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.current_bytes = 0
+        self._entries: "OrderedDict[ChunksCacheKey, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: ChunksCacheKey) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                metrics.incr("services.report.chunks_cache.miss")
+                return None
+            self._entries.move_to_end(key)
+        metrics.incr("services.report.chunks_cache.hit")
+        return entry[1]
+
+    def set(self, key: ChunksCacheKey, chunks: str) -> None:
+        size = len(chunks)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, chunks)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                metrics.incr("services.report.chunks_cache.evicted")
+
+    def invalidate(self, repoid: int, commitid: str, report_code=None) -> None:
+        with self._lock:
+            for key in [
+                key
+                for key in self._entries
+                if key[:3] == (repoid, commitid, report_code)
+            ]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key: ChunksCacheKey) -> None:
+        _, chunks = self._entries.pop(key)
+        self.current_bytes -= len(chunks)
+
+
+_chunks_cache: Optional[ChunksCache] = None
+
+
+def get_chunks_cache() -> Optional[ChunksCache]:
+    """Returns the cache of this process, or None if it is turned off (the default)
+
+    Every worker process has its own cache, so a worker with a concurrency of N
+        can use up to N times `max_bytes` for it.
+    """
+    global _chunks_cache
+    if _chunks_cache is None:
+        max_bytes = get_config("setup", "report_chunks_cache", "max_bytes", default=0)
+        if not max_bytes:
+            return None
+        ttl = get_config("setup", "report_chunks_cache", "ttl", default=60 * 10)
+        _chunks_cache = ChunksCache(max_bytes, ttl)
+    return _chunks_cache
@@ -0,0 +1,138 @@
+import logging
+import uuid
+import zlib
+from json import dumps, loads
+from typing import Dict, Optional, Tuple
+
+from redis import Redis
+from shared.config import get_config
+from shared.reports.resources import Report
+
+from helpers.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+# The last in-progress report this worker process saved, with its token. If the next
+# link of the chain runs in the same process, it can take the report object as is
+# instead of decoding it again. Only one is kept, these can be big
+_local_reports: Dict[str, Tuple[str, Report]] = {}
+
+
+def get_in_progress_report_ttl() -> int:
+    return get_config(
+        "setup", "upload_processing", "in_progress_report_ttl", default=60 * 60 * 4
+    )
+
+
+class InProgressReportMissingError(Exception):
+    """The in-progress report a chain of `UploadProcessorTask`s left for its next link
+    is gone without having been saved (it expired)
+    """
+
+    pass
+
+
+class InProgressReport(object):
+    """A commit report that is still being built by a chain of `UploadProcessorTask`s
+
+    The links of the chain that aren't the last one keep the report here (in redis, so
+        whichever worker runs the next link can get it) instead of saving it to storage
+        and the database. While it exists, this copy is newer than the saved report, so
+        it is the one every processor task of the commit has to load, whichever chain
+        it is part of. The first task that doesn't defer saving the report saves it for
+        good, clears it and leaves a marker saying so, which is how the next link of a
+        chain tells a report saved by another task from one that expired.
+    """
+
+    def __init__(
+        self,
+        redis_connection: Redis,
+        repoid: int,
+        commitid: str,
+        report_code: Optional[str] = None,
+    ):
+        self.redis_connection = redis_connection
+        self.key = f"in_progress_report/{repoid}/{commitid}"
+        if report_code:
+            self.key = f"{self.key}/{report_code}"
+        self.token_key = f"{self.key}/token"
+        self.saved_key = f"{self.key}/saved"
+
+    def load(self, report_service, report_class=None) -> Optional[Report]:
+        """Returns the in-progress report, or None if there is none
+
+        Args:
+            report_service (ReportService): To build the report
+            report_class (type): Same as in `ReportService.get_existing_report_for_commit`
+        """
+        # Whoever loads the report is going to change it, so the local copy can't be
+        # used again even if the task fails before saving a new one
+        token, local_report = _local_reports.pop(self.key, (None, None))
+        current_token = self.redis_connection.get(self.token_key)
+        if current_token is None:
+            return None
+        if local_report is not None and token == current_token.decode():
+            expected_class = report_class or report_service.get_report_class(
+                local_report.sessions
+            )
+            if isinstance(local_report, expected_class):
+                metrics.incr("services.report.in_progress_report.local_hit")
+                return local_report
+        data = self.redis_connection.get(self.key)
+        if data is None:
+            log.warning(
+                "In-progress report expired before the chain finished",
+                extra=dict(key=self.key),
+            )
+            return None
+        metrics.incr("services.report.in_progress_report.redis_hit")
+        with metrics.timer("services.report.in_progress_report.decode"):
+            content = loads(zlib.decompress(data))
+            report_json = loads(content["report_json"])
+            return report_service.build_report(
+                content["chunks"],
+                report_json["files"],
+                report_json["sessions"],
+                content["totals"],
+                report_class=report_class,
+            )
+
+    def save(self, report: Report) -> None:
+        with metrics.timer("services.report.in_progress_report.encode"):
+            totals, report_json = report.to_database()
+            data = zlib.compress(
+                dumps(
+                    {
+                        "chunks": report.to_archive(),
+                        "report_json": report_json,
+                        "totals": totals,
+                    }
+                ).encode()
+            )
+        token = uuid.uuid4().hex
+        ttl = get_in_progress_report_ttl()
+        pipeline = self.redis_connection.pipeline()
+        pipeline.set(self.key, data, ex=ttl)
+        pipeline.set(self.token_key, token, ex=ttl)
+        pipeline.delete(self.saved_key)
+        pipeline.execute()
+        _local_reports.clear()
+        _local_reports[self.key] = (token, report)
+        log.info(
+            "Saved in-progress report",
+            extra=dict(key=self.key, size=len(data)),
+        )
+
+    def clear(self) -> None:
+        """Removes the in-progress report once it has been saved for good"""
+        _local_reports.pop(self.key, None)
+        pipeline = self.redis_connection.pipeline()
+        pipeline.delete(self.key, self.token_key)
+        pipeline.set(self.saved_key, "1", ex=get_in_progress_report_ttl())
+        pipeline.execute()
+
+    def was_saved(self) -> bool:
+        """Whether the last in-progress report was saved for good (and cleared), as
+        opposed to having expired
+        """
+        return self.redis_connection.get(self.saved_key) is not None
@@ -1,5 +1,5 @@
 import typing
-from typing import Any, Callable, Mapping
+from typing import Any, Callable, FrozenSet, Mapping, Optional
 
 from shared.reports.resources import Report
 
@@ -7,6 +7,11 @@ from services.report.report_builder import ReportBuilder
 
 
 class BaseLanguageProcessor(object):
+    # The XML root tags (or top-level JSON keys) this processor's reports have at least
+    #   one of. It is a promise that `matches_content` is False for anything else, which
+    #   lets the report processor skip asking. `None` means it has to always be asked
+    signatures: Optional[FrozenSet[str]] = None
+
     @property
     def name(self):
         return self.get_processor_name()
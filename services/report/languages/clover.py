@@ -1,10 +1,12 @@
 import typing
+from typing import Dict
 
-from shared.reports.resources import Report
+from shared.reports.resources import Report, ReportFile
 from timestring import Date
 
 from helpers.exceptions import ReportExpiredException
 from services.report.languages.base import BaseLanguageProcessor
+from services.report.languages.helpers import XmlStream, iter_xml_elements
 from services.report.report_builder import (
     CoverageType,
     ReportBuilder,
@@ -14,13 +16,21 @@ from services.yaml import read_yaml_field
 
 
 class CloverProcessor(BaseLanguageProcessor):
+    signatures = frozenset(("coverage",))
+
     def matches_content(self, content, first_line, name):
+        if isinstance(content, XmlStream):
+            return bool(
+                content.root_tag == "coverage" and content.root_attrib.get("generated")
+            )
         return bool(content.tag == "coverage" and content.attrib.get("generated"))
 
     def process(
         self, name: str, content: typing.Any, report_builder: ReportBuilder
     ) -> Report:
         report_builder_session = report_builder.create_report_builder_session(name)
+        if isinstance(content, XmlStream):
+            return from_xml_stream(content, report_builder_session)
         return from_xml(content, report_builder_session)
 
 
@@ -38,90 +48,114 @@ def get_end_of_file(filename, xmlfile):
                 pass
 
 
-def from_xml(xml, report_builder_session: ReportBuilderSession) -> Report:
-    path_fixer, ignored_lines, sessionid, yaml = (
-        report_builder_session.path_fixer,
-        report_builder_session.ignored_lines,
-        report_builder_session.sessionid,
-        report_builder_session.current_yaml,
-    )
+def _check_report_age(timestamp: str, yaml) -> None:
+    if "-" in timestamp:
+        t = timestamp.split("-")
+        timestamp = t[1] + "-" + t[0] + "-" + t[2]
+    if timestamp and Date(timestamp) < read_yaml_field(
+        yaml, ("codecov", "max_report_age"), "12h ago"
+    ):
+        # report expired over 12 hours ago
+        raise ReportExpiredException("Clover report expired %s" % timestamp)
+
+
+def _process_file(
+    f, report_builder_session: ReportBuilderSession, files: Dict[str, ReportFile]
+) -> None:
+    filename = f.attrib.get("path") or f.attrib["name"]
+
+    # skip empty file documents
+    if (
+        "{" in filename
+        or ("/vendor/" in ("/" + filename) and filename.endswith(".php"))
+        or f.find("line") is None
+    ):
+        return
+
+    if filename not in files:
+        files[filename] = report_builder_session.file_class(filename)
+
+    _file = files[filename]
 
+    # fix extra lines
+    eof = get_end_of_file(filename, f)
+
+    # process coverage
+    for line in f.iter("line"):
+        attribs = line.attrib
+        ln = int(attribs["num"])
+        complexity = None
+
+        # skip line
+        if ln < 1 or (eof and ln > eof):
+            continue
+
+        # [typescript] https://github.com/gotwarlost/istanbul/blob/89e338fcb1c8a7dea3b9e8f851aa55de2bc3abee/lib/report/clover.js#L108-L110
+        if attribs["type"] == "cond":
+            _type = CoverageType.branch
+            t, f = int(attribs["truecount"]), int(attribs["falsecount"])
+            if t == f == 0:
+                coverage = "0/2"
+            elif t == 0 or f == 0:
+                coverage = "1/2"
+            else:
+                coverage = "2/2"
+
+        elif attribs["type"] == "method":
+            coverage = int(attribs.get("count") or 0)
+            _type = CoverageType.method
+            complexity = int(attribs.get("complexity") or 0)
+            # <line num="44" type="method" name="doRun" visibility="public" complexity="5" crap="5.20" count="1"/>
+
+        else:
+            coverage = int(attribs.get("count") or 0)
+            _type = CoverageType.line
+
+        # add line to report
+        _file[ln] = report_builder_session.create_coverage_line(
+            coverage=coverage,
+            coverage_type=_type,
+            filename=filename,
+            complexity=complexity,
+        )
+
+
+def _output_report(
+    report_builder_session: ReportBuilderSession, files: Dict[str, ReportFile]
+) -> Report:
+    path_fixer = report_builder_session.path_fixer
+    for f in files.values():
+        report_builder_session.append((f))
+    report_builder_session.resolve_paths([(f, path_fixer(f)) for f in files.keys()])
+    report_builder_session.ignore_lines(report_builder_session.ignored_lines)
+
+    return report_builder_session.output_report()
+
+
+def from_xml(xml, report_builder_session: ReportBuilderSession) -> Report:
+    yaml = report_builder_session.current_yaml
     if read_yaml_field(yaml, ("codecov", "max_report_age"), "12h ago"):
         try:
-            timestamp = next(xml.iter("coverage")).get("generated")
-            if "-" in timestamp:
-                t = timestamp.split("-")
-                timestamp = t[1] + "-" + t[0] + "-" + t[2]
-            if timestamp and Date(timestamp) < read_yaml_field(
-                yaml, ("codecov", "max_report_age"), "12h ago"
-            ):
-                # report expired over 12 hours ago
-                raise ReportExpiredException("Clover report expired %s" % timestamp)
+            _check_report_age(next(xml.iter("coverage")).get("generated"), yaml)
         except StopIteration:
             pass
 
     files = {}
     for f in xml.iter("file"):
-        filename = f.attrib.get("path") or f.attrib["name"]
-
-        # skip empty file documents
-        if (
-            "{" in filename
-            or ("/vendor/" in ("/" + filename) and filename.endswith(".php"))
-            or f.find("line") is None
-        ):
-            continue
+        _process_file(f, report_builder_session, files)
 
-        if filename not in files:
-            files[filename] = report_builder_session.file_class(filename)
-
-        _file = files[filename]
-
-        # fix extra lines
-        eof = get_end_of_file(filename, f)
-
-        # process coverage
-        for line in f.iter("line"):
-            attribs = line.attrib
-            ln = int(attribs["num"])
-            complexity = None
-
-            # skip line
-            if ln < 1 or (eof and ln > eof):
-                continue
-
-            # [typescript] https://github.com/gotwarlost/istanbul/blob/89e338fcb1c8a7dea3b9e8f851aa55de2bc3abee/lib/report/clover.js#L108-L110
-            if attribs["type"] == "cond":
-                _type = CoverageType.branch
-                t, f = int(attribs["truecount"]), int(attribs["falsecount"])
-                if t == f == 0:
-                    coverage = "0/2"
-                elif t == 0 or f == 0:
-                    coverage = "1/2"
-                else:
-                    coverage = "2/2"
-
-            elif attribs["type"] == "method":
-                coverage = int(attribs.get("count") or 0)
-                _type = CoverageType.method
-                complexity = int(attribs.get("complexity") or 0)
-                # <line num="44" type="method" name="doRun" visibility="public" complexity="5" crap="5.20" count="1"/>
+    return _output_report(report_builder_session, files)
 
-            else:
-                coverage = int(attribs.get("count") or 0)
-                _type = CoverageType.line
-
-            # add line to report
-            _file[ln] = report_builder_session.create_coverage_line(
-                coverage=coverage,
-                coverage_type=_type,
-                filename=filename,
-                complexity=complexity,
-            )
 
-    for f in files.values():
-        report_builder_session.append((f))
-    report_builder_session.resolve_paths([(f, path_fixer(f)) for f in files.keys()])
-    report_builder_session.ignore_lines(ignored_lines)
+def from_xml_stream(
+    xml_stream: XmlStream, report_builder_session: ReportBuilderSession
+) -> Report:
+    yaml = report_builder_session.current_yaml
+    if read_yaml_field(yaml, ("codecov", "max_report_age"), "12h ago"):
+        _check_report_age(xml_stream.root_attrib["generated"], yaml)
 
-    return report_builder_session.output_report()
+    files = {}
+    for f in iter_xml_elements(xml_stream.contents, ("file",)):
+        _process_file(f, report_builder_session, files)
+
+    return _output_report(report_builder_session, files)
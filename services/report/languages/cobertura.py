@@ -2,13 +2,14 @@ import logging
 import re
 import typing
 from os import path
-from typing import List
+from typing import List, Optional
 
 from shared.reports.resources import Report
 from timestring import Date, TimestringInvalid
 
 from helpers.exceptions import ReportExpiredException
 from services.report.languages.base import BaseLanguageProcessor
+from services.report.languages.helpers import XmlStream, iter_xml_elements
 from services.report.report_builder import (
     CoverageType,
     ReportBuilder,
@@ -21,14 +22,23 @@ log = logging.getLogger(__name__)
 
 class CoberturaProcessor(BaseLanguageProcessor):
     def matches_content(self, content, first_line, name):
-        if bool(list(content.iter("coverage"))):
+        if isinstance(content, XmlStream):
+            # Other formats also use a <coverage> root (e.g. mono), so only stream
+            # the documents that are laid out like a cobertura report
+            return content.root_tag == "coverage" and content.first_child_tag in (
+                "sources",
+                "packages",
+            )
+        if next(content.iter("coverage"), None) is not None:
             return True
-        return bool(list(content.iter("scoverage")))
+        return next(content.iter("scoverage"), None) is not None
 
     def process(
         self, name: str, content: typing.Any, report_builder: ReportBuilder
     ) -> Report:
         report_builder_session = report_builder.create_report_builder_session(name)
+        if isinstance(content, XmlStream):
+            return from_xml_stream(content, report_builder_session)
         return from_xml(content, report_builder_session)
 
 
@@ -40,28 +50,160 @@ def Int(value):
 
 
 def get_sources_to_attempt(xml) -> List[str]:
-    sources = [source.text for source in xml.iter("source")]
+    return _absolute_sources([source.text for source in xml.iter("source")])
+
+
+def _absolute_sources(sources: List[Optional[str]]) -> List[str]:
     return [s for s in sources if isinstance(s, str) and s.startswith("/")]
 
 
-def from_xml(xml, report_builder_session: ReportBuilderSession) -> Report:
-    path_fixer, ignored_lines, sessionid, repo_yaml = (
-        report_builder_session.path_fixer,
-        report_builder_session.ignored_lines,
-        report_builder_session.sessionid,
-        report_builder_session.current_yaml,
-    )
+def _process_class(_class, report_builder_session: ReportBuilderSession) -> str:
+    repo_yaml = report_builder_session.current_yaml
+    filename = _class.attrib["filename"]
+    _file = report_builder_session.file_class(name=filename)
 
-    # # process timestamp
-    if read_yaml_field(repo_yaml, ("codecov", "max_report_age"), "12h ago"):
-        try:
-            timestamp = next(xml.iter("coverage")).get("timestamp")
-        except StopIteration:
-            try:
-                timestamp = next(xml.iter("scoverage")).get("timestamp")
-            except StopIteration:
-                timestamp = None
+    for line in _class.iter("line"):
+        _line = line.attrib
+        ln = _line["number"]
+        if ln == "undefined":
+            continue
+        ln = int(ln)
+        if ln > 0:
+            coverage = None
+            _type = CoverageType.line
+            missing_branches = None
+
+            # coverage
+            branch = _line.get("branch", "")
+            condition_coverage = _line.get("condition-coverage", "")
+            if (
+                branch.lower() == "true"
+                and re.search("\(\d+\/\d+\)", condition_coverage) is not None
+            ):
+                coverage = condition_coverage.split(" ", 1)[1][1:-1]  # 1/2
+                _type = CoverageType.branch
+            else:
+                coverage = Int(_line.get("hits"))
+
+            # [python] [scoverage] [groovy] Conditions
+            conditions = _line.get("missing-branches", None)
+            if conditions:
+                conditions = conditions.split(",")
+                if len(conditions) > 1 and set(conditions) == set(("exit",)):
+                    # python: "return [...] missed"
+                    conditions = ["loop", "exit"]
+                missing_branches = conditions
+
+            else:
+                # [groovy] embedded conditions
+                conditions = [
+                    "%(number)s:%(type)s" % _.attrib
+                    for _ in line.iter("condition")
+                    if _.attrib.get("coverage") != "100%"
+                ]
+                if read_yaml_field(
+                    repo_yaml,
+                    ("parsers", "cobertura", "handle_missing_conditions"),
+                    False,
+                ):
+                    if type(coverage) is str:
+                        covered_conditions, total_conditions = coverage.split("/")
+                        if len(conditions) < int(total_conditions):
+                            # <line number="23" hits="0" branch="true" condition-coverage="0% (0/2)">
+                            #     <conditions>
+                            #         <condition number="0" type="jump" coverage="0%"/>
+                            #     </conditions>
+                            # </line>
+
+                            # <line number="3" hits="0" branch="true" condition-coverage="50% (1/2)"/>
+
+                            coverage_difference = int(total_conditions) - int(
+                                covered_conditions
+                            )
+                            missing_condition_elements = range(
+                                len(conditions), coverage_difference
+                            )
+                            conditions.extend(
+                                [
+                                    str(condition)
+                                    for condition in missing_condition_elements
+                                ]
+                            )
+                else:  # previous behaviour
+                    if (
+                        type(coverage) is str
+                        and coverage[0] == "0"
+                        and len(conditions) < int(coverage.split("/")[1])
+                    ):
+                        # <line number="23" hits="0" branch="true" condition-coverage="0% (0/2)">
+                        #     <conditions>
+                        #         <condition number="0" type="jump" coverage="0%"/>
+                        #     </conditions>
+                        # </line>
+                        conditions.extend(
+                            map(
+                                str,
+                                range(len(conditions), int(coverage.split("/")[1])),
+                            )
+                        )
+                if conditions:
+                    missing_branches = conditions
+            if (
+                type(coverage) is str
+                and not coverage[0] == "0"
+                and read_yaml_field(
+                    repo_yaml,
+                    ("parsers", "cobertura", "partials_as_hits"),
+                    False,
+                )
+            ):  # if coverage[0] is 0 this is a miss
+                missing_branches = None
+                coverage = 1
+                _type = CoverageType.line
 
+            _file.append(
+                ln,
+                report_builder_session.create_coverage_line(
+                    filename=filename,
+                    coverage=coverage,
+                    coverage_type=_type,
+                    missing_branches=missing_branches,
+                ),
+            )
+
+    # [scala] [scoverage]
+    for stmt in _class.iter("statement"):
+        # scoverage will have repeated data
+        stmt = stmt.attrib
+        if stmt.get("ignored") == "true":
+            continue
+        coverage = Int(stmt["invocation-count"])
+        if stmt["branch"] == "true":
+            _file.append(
+                int(stmt["line"]),
+                report_builder_session.create_coverage_line(
+                    filename=filename,
+                    coverage=coverage,
+                    coverage_type=CoverageType.branch,
+                ),
+            )
+        else:
+            _file.append(
+                int(stmt["line"]),
+                report_builder_session.create_coverage_line(
+                    filename=filename,
+                    coverage=coverage,
+                    coverage_type=CoverageType.method
+                    if stmt["method"]
+                    else CoverageType.line,
+                ),
+            )
+    report_builder_session.append(_file)
+    return filename
+
+
+def _check_report_age(timestamp: Optional[str], repo_yaml) -> None:
+    if read_yaml_field(repo_yaml, ("codecov", "max_report_age"), "12h ago"):
         try:
             parsed_datetime = Date(timestamp)
             is_valid_timestamp = True
@@ -78,160 +220,62 @@ def from_xml(xml, report_builder_session: ReportBuilderSession) -> Report:
             # report expired over 12 hours ago
             raise ReportExpiredException("Cobertura report expired " + timestamp)
 
-    for _class in xml.iter("class"):
-        filename = _class.attrib["filename"]
-        _file = report_builder_session.file_class(name=filename)
-
-        for line in _class.iter("line"):
-            _line = line.attrib
-            ln = _line["number"]
-            if ln == "undefined":
-                continue
-            ln = int(ln)
-            if ln > 0:
-                coverage = None
-                _type = CoverageType.line
-                missing_branches = None
 
-                # coverage
-                branch = _line.get("branch", "")
-                condition_coverage = _line.get("condition-coverage", "")
-                if (
-                    branch.lower() == "true"
-                    and re.search("\(\d+\/\d+\)", condition_coverage) is not None
-                ):
-                    coverage = condition_coverage.split(" ", 1)[1][1:-1]  # 1/2
-                    _type = CoverageType.branch
-                else:
-                    coverage = Int(_line.get("hits"))
+def _resolve_paths(
+    report_builder_session: ReportBuilderSession,
+    filenames: List[str],
+    source_path_list: List[str],
+) -> None:
+    path_fixer = report_builder_session.path_fixer
+    path_name_fixing = [
+        (filename, path_fixer(filename, bases_to_try=source_path_list))
+        for filename in filenames
+    ]
+    _set = set(("dist-packages", "site-packages"))
+    report_builder_session.resolve_paths(
+        sorted(path_name_fixing, key=lambda a: _set & set(a[0].split("/")))
+    )
 
-                # [python] [scoverage] [groovy] Conditions
-                conditions = _line.get("missing-branches", None)
-                if conditions:
-                    conditions = conditions.split(",")
-                    if len(conditions) > 1 and set(conditions) == set(("exit",)):
-                        # python: "return [...] missed"
-                        conditions = ["loop", "exit"]
-                    missing_branches = conditions
 
-                else:
-                    # [groovy] embedded conditions
-                    conditions = [
-                        "%(number)s:%(type)s" % _.attrib
-                        for _ in line.iter("condition")
-                        if _.attrib.get("coverage") != "100%"
-                    ]
-                    if read_yaml_field(
-                        repo_yaml,
-                        ("parsers", "cobertura", "handle_missing_conditions"),
-                        False,
-                    ):
-                        if type(coverage) is str:
-                            covered_conditions, total_conditions = coverage.split("/")
-                            if len(conditions) < int(total_conditions):
-                                # <line number="23" hits="0" branch="true" condition-coverage="0% (0/2)">
-                                #     <conditions>
-                                #         <condition number="0" type="jump" coverage="0%"/>
-                                #     </conditions>
-                                # </line>
-
-                                # <line number="3" hits="0" branch="true" condition-coverage="50% (1/2)"/>
-
-                                coverage_difference = int(total_conditions) - int(
-                                    covered_conditions
-                                )
-                                missing_condition_elements = range(
-                                    len(conditions), coverage_difference
-                                )
-                                conditions.extend(
-                                    [
-                                        str(condition)
-                                        for condition in missing_condition_elements
-                                    ]
-                                )
-                    else:  # previous behaviour
-                        if (
-                            type(coverage) is str
-                            and coverage[0] == "0"
-                            and len(conditions) < int(coverage.split("/")[1])
-                        ):
-                            # <line number="23" hits="0" branch="true" condition-coverage="0% (0/2)">
-                            #     <conditions>
-                            #         <condition number="0" type="jump" coverage="0%"/>
-                            #     </conditions>
-                            # </line>
-                            conditions.extend(
-                                map(
-                                    str,
-                                    range(len(conditions), int(coverage.split("/")[1])),
-                                )
-                            )
-                    if conditions:
-                        missing_branches = conditions
-                if (
-                    type(coverage) is str
-                    and not coverage[0] == "0"
-                    and read_yaml_field(
-                        repo_yaml,
-                        ("parsers", "cobertura", "partials_as_hits"),
-                        False,
-                    )
-                ):  # if coverage[0] is 0 this is a miss
-                    missing_branches = None
-                    coverage = 1
-                    _type = CoverageType.line
-
-                _file.append(
-                    ln,
-                    report_builder_session.create_coverage_line(
-                        filename=filename,
-                        coverage=coverage,
-                        coverage_type=_type,
-                        missing_branches=missing_branches,
-                    ),
-                )
+def from_xml(xml, report_builder_session: ReportBuilderSession) -> Report:
+    # # process timestamp
+    try:
+        timestamp = next(xml.iter("coverage")).get("timestamp")
+    except StopIteration:
+        try:
+            timestamp = next(xml.iter("scoverage")).get("timestamp")
+        except StopIteration:
+            timestamp = None
+    _check_report_age(timestamp, report_builder_session.current_yaml)
 
-        # [scala] [scoverage]
-        for stmt in _class.iter("statement"):
-            # scoverage will have repeated data
-            stmt = stmt.attrib
-            if stmt.get("ignored") == "true":
-                continue
-            coverage = Int(stmt["invocation-count"])
-            if stmt["branch"] == "true":
-                _file.append(
-                    int(stmt["line"]),
-                    report_builder_session.create_coverage_line(
-                        filename=filename,
-                        coverage=coverage,
-                        coverage_type=CoverageType.branch,
-                    ),
-                )
-            else:
-                _file.append(
-                    int(stmt["line"]),
-                    report_builder_session.create_coverage_line(
-                        filename=filename,
-                        coverage=coverage,
-                        coverage_type=CoverageType.method
-                        if stmt["method"]
-                        else CoverageType.line,
-                    ),
-                )
-        report_builder_session.append(_file)
+    filenames = [
+        _process_class(_class, report_builder_session) for _class in xml.iter("class")
+    ]
 
     # path rename
-    path_name_fixing = []
-    source_path_list = get_sources_to_attempt(xml)
-    for _class in xml.iter("class"):
-        filename = _class.attrib["filename"]
-        fixed_name = path_fixer(filename, bases_to_try=source_path_list)
-        path_name_fixing.append((filename, fixed_name))
+    _resolve_paths(report_builder_session, filenames, get_sources_to_attempt(xml))
 
-    _set = set(("dist-packages", "site-packages"))
-    report_builder_session.resolve_paths(
-        sorted(path_name_fixing, key=lambda a: _set & set(a[0].split("/")))
+    report_builder_session.ignore_lines(report_builder_session.ignored_lines)
+    return report_builder_session.output_report()
+
+
+def from_xml_stream(
+    xml_stream: XmlStream, report_builder_session: ReportBuilderSession
+) -> Report:
+    _check_report_age(
+        xml_stream.root_attrib.get("timestamp"), report_builder_session.current_yaml
     )
 
-    report_builder_session.ignore_lines(ignored_lines)
+    filenames = []
+    sources = []
+    for element in iter_xml_elements(xml_stream.contents, ("class", "source")):
+        if element.tag == "source":
+            sources.append(element.text)
+        else:
+            filenames.append(_process_class(element, report_builder_session))
+
+    # path rename
+    _resolve_paths(report_builder_session, filenames, _absolute_sources(sources))
+
+    report_builder_session.ignore_lines(report_builder_session.ignored_lines)
     return report_builder_session.output_report()
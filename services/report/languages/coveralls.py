@@ -11,6 +11,8 @@ from services.report.report_builder import (
 
 
 class CoverallsProcessor(BaseLanguageProcessor):
+    signatures = frozenset(("source_files",))
+
     def matches_content(self, content, first_line, name):
         return detect(content)
 
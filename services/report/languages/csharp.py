@@ -15,6 +15,8 @@ from services.report.report_builder import (
 
 
 class CSharpProcessor(BaseLanguageProcessor):
+    signatures = frozenset(("CoverageSession",))
+
     def matches_content(self, content, first_line, name):
         return bool(content.tag == "CoverageSession")
 
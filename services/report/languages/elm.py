@@ -11,6 +11,8 @@ from services.report.report_builder import (
 
 
 class ElmProcessor(BaseLanguageProcessor):
+    signatures = frozenset(("coverageData",))
+
     def matches_content(self, content, first_line, name):
         return isinstance(content, dict) and bool(content.get("coverageData"))
 
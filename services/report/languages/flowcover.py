@@ -11,6 +11,8 @@ from services.report.report_builder import (
 
 
 class FlowcoverProcessor(BaseLanguageProcessor):
+    signatures = frozenset(("flowStatus",))
+
     def matches_content(self, content, first_line, name):
         return isinstance(content, dict) and bool(content.get("flowStatus"))
 
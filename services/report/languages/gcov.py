@@ -30,8 +30,11 @@ detect_loop = re.compile(r"^\s+(for|while)\s?\(").match
 detect_conditional = re.compile(r"^\s+((if\s?\()|(\} else if\s?\())").match
 
 
-def detect(report):
-    return b"0:Source:" in report.split(b"\n", 1)[0]
+def detect(report: bytes):
+    first_line_end = report.find(b"\n")
+    if first_line_end < 0:
+        return b"0:Source:" in report
+    return report.find(b"0:Source:", 0, first_line_end) >= 0
 
 
 def from_txt(string: bytes, report_builder_session: ReportBuilderSession) -> Report:
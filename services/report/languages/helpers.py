@@ -1,4 +1,78 @@
+from io import BytesIO
+from typing import Dict, Iterable, Iterator, Optional
+
+from lxml import etree
+
+
 def remove_non_ascii(string, replace_with=""):
     # ASCII control characters <=31, 127
     # Extended ASCII characters: >=128
     return "".join([i if 31 < ord(i) < 127 else replace_with for i in string])
+
+
+def split_records(content: bytes, separator: bytes) -> Iterator[bytes]:
+    """Lazy version of `content.split(separator)`
+
+    Only one record is copied out of `content` at a time, so processing a big report
+        record by record doesn't need memory for a second copy of the whole report
+    """
+    start = 0
+    while True:
+        end = content.find(separator, start)
+        if end < 0:
+            yield content[start:]
+            return
+        yield content[start:end]
+        start = end + len(separator)
+
+
+class XmlStream(object):
+    """A big XML report that is processed element by element with `iter_xml_elements`
+        instead of being parsed into a whole tree up front
+
+    Attributes
+    ----------
+    contents
+        the raw XML report
+    root_tag
+        the tag of the root element
+    root_attrib
+        the attributes of the root element
+    first_child_tag
+        the tag of the first element under the root, if there is one
+    """
+
+    def __init__(
+        self,
+        contents: bytes,
+        root_tag: str,
+        root_attrib: Dict[str, str],
+        first_child_tag: Optional[str],
+    ):
+        self.contents = contents
+        self.root_tag = root_tag
+        self.root_attrib = root_attrib
+        self.first_child_tag = first_child_tag
+
+
+def iter_xml_elements(content: bytes, tags: Iterable[str]) -> Iterator[etree._Element]:
+    """Yields every element with one of `tags`, in document order of their end tags,
+        once it has been completely parsed
+
+    Each element is cleared (together with whatever came before it under the same
+        parent) as soon as the caller moves on, so only the element being processed
+        is kept in memory instead of the whole document
+    """
+    for _, element in etree.iterparse(
+        BytesIO(content),
+        events=("end",),
+        tag=tuple(tags),
+        recover=True,
+        resolve_entities=False,
+    ):
+        yield element
+        element.clear(keep_tail=True)
+        parent = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
@@ -1,5 +1,6 @@
 import typing
 from collections import defaultdict
+from typing import Optional
 
 from shared.reports.resources import Report
 from shared.utils.merge import LineType, branch_type
@@ -7,6 +8,7 @@ from timestring import Date
 
 from helpers.exceptions import ReportExpiredException
 from services.report.languages.base import BaseLanguageProcessor
+from services.report.languages.helpers import XmlStream, iter_xml_elements
 from services.report.report_builder import (
     CoverageType,
     ReportBuilder,
@@ -16,44 +18,32 @@ from services.yaml import read_yaml_field
 
 
 class JacocoProcessor(BaseLanguageProcessor):
+    signatures = frozenset(("report",))
+
     def matches_content(self, content, first_line, name):
+        if isinstance(content, XmlStream):
+            return content.root_tag == "report"
         return bool(content.tag == "report")
 
     def process(
         self, name: str, content: typing.Any, report_builder: ReportBuilder
     ) -> Report:
         report_builder_session = report_builder.create_report_builder_session(name)
+        if isinstance(content, XmlStream):
+            return from_xml_stream(content, report_builder_session)
         return from_xml(content, report_builder_session)
 
 
-def from_xml(xml, report_builder_session: ReportBuilderSession):
-    """
-    nr = line number
-    mi = missed instructions
-    ci = covered instructions
-    mb = missed branches
-    cb = covered branches
-    """
-    path_fixer = report_builder_session.path_fixer
-    yaml = report_builder_session.current_yaml
-    ignored_lines = report_builder_session.ignored_lines
-    sessionid = report_builder_session.sessionid
-    if read_yaml_field(yaml, ("codecov", "max_report_age"), "12h ago"):
-        try:
-            timestamp = next(xml.iter("sessioninfo")).get("start")
-            if timestamp and Date(timestamp) < read_yaml_field(
-                yaml, ("codecov", "max_report_age"), "12h ago"
-            ):
-                # report expired over 12 hours ago
-                raise ReportExpiredException("Jacoco report expired %s" % timestamp)
-
-        except StopIteration:
-            pass
+def _check_report_age(timestamp: Optional[str], yaml) -> None:
+    if timestamp and Date(timestamp) < read_yaml_field(
+        yaml, ("codecov", "max_report_age"), "12h ago"
+    ):
+        # report expired over 12 hours ago
+        raise ReportExpiredException("Jacoco report expired %s" % timestamp)
 
-    project = xml.attrib.get("name", "")
-    project = "" if " " in project else project.strip("/")
 
-    jacoco_parser_settings = read_yaml_field(yaml, ("parsers", "jacoco")) or {}
+def _get_path_fixer(path_fixer, project_name: str):
+    project = "" if " " in project_name else project_name.strip("/")
 
     def try_to_fix_path(path):
         if project:
@@ -70,73 +60,135 @@ def from_xml(xml, report_builder_session: ReportBuilderSession):
         # package/path
         return path_fixer(path)
 
-    for package in xml.iter("package"):
-        base_name = package.attrib["name"]
-
-        file_method_complixity = defaultdict(dict)
-        # Classes complexity
-        for _class in package.iter("class"):
-            class_name = _class.attrib["name"]
-            if "$" not in class_name:
-                method_complixity = file_method_complixity[class_name]
-                # Method Complexity
-                for method in _class.iter("method"):
-                    ln = int(method.attrib.get("line", 0))
-                    if ln > 0:
-                        for counter in method.iter("counter"):
-                            if counter.attrib["type"] == "COMPLEXITY":
-                                m = int(counter.attrib["missed"])
-                                c = int(counter.attrib["covered"])
-                                method_complixity[ln] = (c, m + c)
-                                break
-
-        # Statements
-        for source in package.iter("sourcefile"):
-            source_name = "%s/%s" % (base_name, source.attrib["name"])
-            filename = try_to_fix_path(source_name)
-            if filename is None:
-                continue
-
-            method_complixity = file_method_complixity[source_name.split(".")[0]]
-
-            report_file_obj = report_builder_session.file_class(
-                filename, ignore=ignored_lines.get(filename)
+    return try_to_fix_path
+
+
+def _process_package(
+    package,
+    report_builder_session: ReportBuilderSession,
+    try_to_fix_path,
+    jacoco_parser_settings: dict,
+) -> None:
+    ignored_lines = report_builder_session.ignored_lines
+    base_name = package.attrib["name"]
+
+    file_method_complixity = defaultdict(dict)
+    # Classes complexity
+    for _class in package.iter("class"):
+        class_name = _class.attrib["name"]
+        if "$" not in class_name:
+            method_complixity = file_method_complixity[class_name]
+            # Method Complexity
+            for method in _class.iter("method"):
+                ln = int(method.attrib.get("line", 0))
+                if ln > 0:
+                    for counter in method.iter("counter"):
+                        if counter.attrib["type"] == "COMPLEXITY":
+                            m = int(counter.attrib["missed"])
+                            c = int(counter.attrib["covered"])
+                            method_complixity[ln] = (c, m + c)
+                            break
+
+    # Statements
+    for source in package.iter("sourcefile"):
+        source_name = "%s/%s" % (base_name, source.attrib["name"])
+        filename = try_to_fix_path(source_name)
+        if filename is None:
+            continue
+
+        method_complixity = file_method_complixity[source_name.split(".")[0]]
+
+        report_file_obj = report_builder_session.file_class(
+            filename, ignore=ignored_lines.get(filename)
+        )
+
+        for line in source.iter("line"):
+            line = line.attrib
+            if line["mb"] != "0":
+                cov = "%s/%s" % (line["cb"], int(line["mb"]) + int(line["cb"]))
+                coverage_type = CoverageType.branch
+
+            elif line["cb"] != "0":
+                cov = "%s/%s" % (line["cb"], line["cb"])
+                coverage_type = CoverageType.branch
+
+            else:
+                cov = int(line["ci"])
+                coverage_type = CoverageType.line
+
+            if (
+                coverage_type == CoverageType.branch
+                and branch_type(cov) == LineType.partial
+                and jacoco_parser_settings.get("partials_as_hits", False)
+            ):
+                cov = 1
+
+            ln = int(line["nr"])
+            complexity = method_complixity.get(ln)
+            if complexity:
+                coverage_type = CoverageType.method
+            # add line to file
+            report_file_obj[ln] = report_builder_session.create_coverage_line(
+                filename,
+                coverage=cov,
+                coverage_type=coverage_type,
+                complexity=complexity,
             )
 
-            for line in source.iter("line"):
-                line = line.attrib
-                if line["mb"] != "0":
-                    cov = "%s/%s" % (line["cb"], int(line["mb"]) + int(line["cb"]))
-                    coverage_type = CoverageType.branch
-
-                elif line["cb"] != "0":
-                    cov = "%s/%s" % (line["cb"], line["cb"])
-                    coverage_type = CoverageType.branch
-
-                else:
-                    cov = int(line["ci"])
-                    coverage_type = CoverageType.line
-
-                if (
-                    coverage_type == CoverageType.branch
-                    and branch_type(cov) == LineType.partial
-                    and jacoco_parser_settings.get("partials_as_hits", False)
-                ):
-                    cov = 1
-
-                ln = int(line["nr"])
-                complexity = method_complixity.get(ln)
-                if complexity:
-                    coverage_type = CoverageType.method
-                # add line to file
-                report_file_obj[ln] = report_builder_session.create_coverage_line(
-                    filename,
-                    coverage=cov,
-                    coverage_type=coverage_type,
-                    complexity=complexity,
-                )
-
-            # append file to report
-            report_builder_session.append(report_file_obj)
+        # append file to report
+        report_builder_session.append(report_file_obj)
+
+
+def from_xml(xml, report_builder_session: ReportBuilderSession):
+    """
+    nr = line number
+    mi = missed instructions
+    ci = covered instructions
+    mb = missed branches
+    cb = covered branches
+    """
+    yaml = report_builder_session.current_yaml
+    if read_yaml_field(yaml, ("codecov", "max_report_age"), "12h ago"):
+        try:
+            _check_report_age(next(xml.iter("sessioninfo")).get("start"), yaml)
+        except StopIteration:
+            pass
+
+    try_to_fix_path = _get_path_fixer(
+        report_builder_session.path_fixer, xml.attrib.get("name", "")
+    )
+    jacoco_parser_settings = read_yaml_field(yaml, ("parsers", "jacoco")) or {}
+
+    for package in xml.iter("package"):
+        _process_package(
+            package, report_builder_session, try_to_fix_path, jacoco_parser_settings
+        )
+
+    return report_builder_session.output_report()
+
+
+def from_xml_stream(
+    xml_stream: XmlStream, report_builder_session: ReportBuilderSession
+) -> Report:
+    yaml = report_builder_session.current_yaml
+    check_report_age = bool(
+        read_yaml_field(yaml, ("codecov", "max_report_age"), "12h ago")
+    )
+
+    try_to_fix_path = _get_path_fixer(
+        report_builder_session.path_fixer, xml_stream.root_attrib.get("name", "")
+    )
+    jacoco_parser_settings = read_yaml_field(yaml, ("parsers", "jacoco")) or {}
+
+    for element in iter_xml_elements(xml_stream.contents, ("sessioninfo", "package")):
+        if element.tag == "sessioninfo":
+            if check_report_age:
+                # only the first session matters, same as in `from_xml`
+                _check_report_age(element.get("start"), yaml)
+                check_report_age = False
+        else:
+            _process_package(
+                element, report_builder_session, try_to_fix_path, jacoco_parser_settings
+            )
 
     return report_builder_session.output_report()
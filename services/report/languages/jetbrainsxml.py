@@ -11,6 +11,8 @@ from services.report.report_builder import (
 
 
 class JetBrainsXMLProcessor(BaseLanguageProcessor):
+    signatures = frozenset(("Root",))
+
     def matches_content(self, content, first_line, name):
         return bool(content.tag == "Root")
 
@@ -7,6 +7,7 @@ from io import BytesIO
 from shared.reports.resources import Report
 
 from services.report.languages.base import BaseLanguageProcessor
+from services.report.languages.helpers import split_records
 from services.report.report_builder import (
     CoverageType,
     ReportBuilder,
@@ -35,7 +36,7 @@ def detect(report):
 def from_txt(reports, report_builder_session: ReportBuilderSession) -> Report:
     # http://ltp.sourceforge.net/coverage/lcov/geninfo.1.php
     # merge same files
-    for string in reports.split(b"\nend_of_record"):
+    for string in split_records(reports, b"\nend_of_record"):
         report_builder_session.append(_process_file(string, report_builder_session))
 
     return report_builder_session.output_report()
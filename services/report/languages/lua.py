@@ -1,5 +1,6 @@
-import re
 import typing
+from io import BytesIO
+from typing import Iterator
 
 from shared.reports.resources import Report
 
@@ -22,7 +23,23 @@ class LuaProcessor(BaseLanguageProcessor):
         return from_txt(content, report_builder_session)
 
 
-docs = re.compile(r"^=+\n", re.M).split
+def docs(content: bytes) -> Iterator[str]:
+    """Splits the report on every line made only of `=`
+
+    This goes line by line, so only one section of the report is decoded at a time
+    """
+    current_doc = []
+    for encoded_line in BytesIO(content):
+        if (
+            len(encoded_line) > 1
+            and encoded_line[-1:] == b"\n"
+            and not encoded_line[:-1].strip(b"=")
+        ):
+            yield "".join(current_doc)
+            current_doc = []
+        else:
+            current_doc.append(encoded_line.decode(errors="replace").replace("\t", " "))
+    yield "".join(current_doc)
 
 
 def detect(report: bytes):
@@ -32,7 +49,7 @@ def detect(report: bytes):
 def from_txt(string: bytes, report_builder_session: ReportBuilderSession) -> Report:
     filename = None
     ignored_lines = report_builder_session.ignored_lines
-    for string in docs(string.decode(errors="replace").replace("\t", " ")):
+    for string in docs(string):
         string = string.rstrip()
         if string == "Summary":
             filename = None
@@ -13,6 +13,8 @@ from services.report.report_builder import (
 
 
 class MonoProcessor(BaseLanguageProcessor):
+    signatures = frozenset(("coverage",))
+
     def matches_content(self, content, first_line, name):
         return bool(content.tag == "coverage" and content.find("assembly") is not None)
 
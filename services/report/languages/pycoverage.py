@@ -14,6 +14,8 @@ COVERAGE_MISS = 0
 
 
 class PyCoverageProcessor(BaseLanguageProcessor):
+    signatures = frozenset(("meta",))
+
     def matches_content(self, content, first_line, name) -> bool:
         return (
             "meta" in content
@@ -8,6 +8,8 @@ from services.report.report_builder import ReportBuilder
 
 
 class RlangProcessor(BaseLanguageProcessor):
+    signatures = frozenset(("uploader",))
+
     def matches_content(self, content, first_line, name):
         return isinstance(content, dict) and content.get("uploader") == "R"
 
@@ -11,6 +11,8 @@ from services.report.report_builder import (
 
 
 class ScalaProcessor(BaseLanguageProcessor):
+    signatures = frozenset(("fileReports",))
+
     def matches_content(self, content, first_line, name):
         return "fileReports" in content
 
@@ -12,6 +12,8 @@ from services.report.report_builder import (
 
 
 class SCoverageProcessor(BaseLanguageProcessor):
+    signatures = frozenset(("statements",))
+
     def matches_content(self, content, first_line, name):
         return bool(content.tag == "statements")
 
@@ -11,6 +11,8 @@ from services.report.report_builder import (
 
 
 class SimplecovProcessor(BaseLanguageProcessor):
+    signatures = frozenset(("command_name",))
+
     """
     Handles processing of coverage reports generated by Simplecov (https://github.com/simplecov-ruby/simplecov)
     The JSON formatter this processor expects is simplecov-json (https://github.com/vicentllongo/simplecov-json)
@@ -7,6 +7,7 @@ import pytest
 from helpers.exceptions import ReportExpiredException
 from services.report.languages import clover
 from services.report.report_builder import ReportBuilder
+from services.report.report_processor import sniff_xml_stream
 from test_utils.base import BaseTestCase
 
 xml = """<?xml version="1.0" encoding="UTF-8"?>
@@ -162,6 +163,26 @@ class TestCloverProcessor(BaseTestCase):
 
         assert processed_report == expected_result
 
+    def test_report_from_xml_stream(self):
+        content = (xml % int(time())).encode()
+
+        def build_report(from_xml, parsed):
+            report_builder = ReportBuilder(
+                path_fixer=str, ignored_lines={}, sessionid=0, current_yaml=None
+            )
+            report_builder_session = report_builder.create_report_builder_session(
+                "filename"
+            )
+            report = from_xml(parsed, report_builder_session)
+            return self.convert_report_to_better_readable(report)
+
+        xml_stream = sniff_xml_stream(content)
+        assert clover.CloverProcessor().matches_content(xml_stream, "", "clover.xml")
+        expected_report = build_report(clover.from_xml, etree.fromstring(content))
+        streamed_report = build_report(clover.from_xml_stream, xml_stream)
+        assert "source.php" in streamed_report["archive"]
+        assert streamed_report == expected_report
+
     @pytest.mark.parametrize(
         "date",
         [
@@ -180,3 +201,13 @@ class TestCloverProcessor(BaseTestCase):
                 "filename"
             )
             clover.from_xml(etree.fromstring(xml % date), report_builder_session)
+        with pytest.raises(ReportExpiredException, match="Clover report expired"):
+            report_builder = ReportBuilder(
+                path_fixer=str, ignored_lines={}, sessionid=0, current_yaml=None
+            )
+            report_builder_session = report_builder.create_report_builder_session(
+                "filename"
+            )
+            clover.from_xml_stream(
+                sniff_xml_stream((xml % date).encode()), report_builder_session
+            )
@@ -9,6 +9,7 @@ from helpers.exceptions import ReportExpiredException
 from services.path_fixer import PathFixer
 from services.report.languages import cobertura
 from services.report.report_builder import ReportBuilder
+from services.report.report_processor import sniff_xml_stream
 from test_utils.base import BaseTestCase
 
 xml = """<?xml version="1.0" ?>
@@ -457,6 +458,45 @@ class TestCobertura(BaseTestCase):
         name = "coverage.xml"
         assert processor.matches_content(content, first_line, name)
 
+    def test_matches_content_xml_stream(self):
+        processor = cobertura.CoberturaProcessor()
+        content = sniff_xml_stream((xml % ("", int(time()), "", "")).encode())
+        first_line = xml.split("\n", 1)[0]
+        assert processor.matches_content(content, first_line, "coverage.xml")
+        mono_content = sniff_xml_stream(
+            b'<coverage version="1"><assembly name="a"></assembly></coverage>'
+        )
+        assert not processor.matches_content(mono_content, first_line, "coverage.xml")
+
+    def test_report_from_xml_stream(self):
+        sources = """
+        <sources>
+            <source>/user/repo</source>
+            <source>not a path</source>
+        </sources>
+        """
+        content = (xml % ("", int(time()), sources, "")).encode()
+
+        def build_report(from_xml, parsed):
+            report_builder = ReportBuilder(
+                path_fixer=lambda path, bases_to_try: os.path.join(*bases_to_try, path),
+                ignored_lines={},
+                sessionid=0,
+                current_yaml={"codecov": {"max_report_age": None}},
+            )
+            report_builder_session = report_builder.create_report_builder_session(
+                "filename"
+            )
+            report = from_xml(parsed, report_builder_session)
+            return self.convert_report_to_better_readable(report)
+
+        expected_report = build_report(cobertura.from_xml, etree.fromstring(content))
+        streamed_report = build_report(
+            cobertura.from_xml_stream, sniff_xml_stream(content)
+        )
+        assert "/user/repo/source" in streamed_report["report"]["files"]
+        assert streamed_report == expected_report
+
     def test_not_matches_content(self):
         processor = cobertura.CoberturaProcessor()
         content = etree.fromstring(
@@ -343,6 +343,8 @@ class TestGcov(BaseTestCase):
         assert gcov.detect(b"..... 0:Source:white") is True
         assert gcov.detect(b"") is False
         assert gcov.detect(b"0:Source") is False
+        assert gcov.detect(b"   -: 0:Source:black\n   -: 0:Graph:black.gcno") is True
+        assert gcov.detect(b"   -: 0:Graph:black.gcno\n   -: 0:Source:black") is False
 
     def test_ignored(self):
         report_builder = ReportBuilder(
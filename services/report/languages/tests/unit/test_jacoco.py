@@ -7,6 +7,7 @@ import pytest
 from helpers.exceptions import ReportExpiredException
 from services.report.languages import jacoco
 from services.report.report_builder import ReportBuilder
+from services.report.report_processor import sniff_xml_stream
 from test_utils.base import BaseTestCase
 
 xml = """<?xml version="1.0" encoding="UTF-8" standalone="yes" ?>
@@ -83,6 +84,26 @@ class TestJacoco(BaseTestCase):
 
         assert expected_result_archive == processed_report["archive"]
 
+    def test_report_from_xml_stream(self):
+        content = (xml % int(time())).encode()
+
+        def build_report(from_xml, parsed):
+            report_builder = ReportBuilder(
+                current_yaml={}, sessionid=0, ignored_lines={}, path_fixer=str
+            )
+            report_builder_session = report_builder.create_report_builder_session(
+                "file_name"
+            )
+            report = from_xml(parsed, report_builder_session)
+            return self.convert_report_to_better_readable(report)
+
+        xml_stream = sniff_xml_stream(content)
+        assert jacoco.JacocoProcessor().matches_content(xml_stream, "", "jacoco.xml")
+        expected_report = build_report(jacoco.from_xml, etree.fromstring(content))
+        streamed_report = build_report(jacoco.from_xml_stream, xml_stream)
+        assert "base/source.java" in streamed_report["archive"]
+        assert streamed_report == expected_report
+
     def test_report_partials_as_hits(self):
         def fixes(path):
             if path == "base/ignore":
@@ -170,3 +191,7 @@ class TestJacoco(BaseTestCase):
         )
         with pytest.raises(ReportExpiredException, match="Jacoco report expired"):
             jacoco.from_xml(etree.fromstring(xml % date), report_builder_session)
+        with pytest.raises(ReportExpiredException, match="Jacoco report expired"):
+            jacoco.from_xml_stream(
+                sniff_xml_stream((xml % date).encode()), report_builder_session
+            )
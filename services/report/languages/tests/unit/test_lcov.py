@@ -1,6 +1,7 @@
 from json import dumps
 
 from services.report.languages import lcov
+from services.report.languages.helpers import split_records
 from services.report.report_builder import ReportBuilder
 from test_utils.base import BaseTestCase
 
@@ -168,6 +169,11 @@ class TestLcov(BaseTestCase):
         assert lcov.detect(b"hello_end_of_record") is False
         assert lcov.detect(b"") is False
 
+    def test_split_records(self):
+        separator = b"\nend_of_record"
+        for content in [txt, b"", b"hello", b"a\nend_of_record\nend_of_record"]:
+            assert list(split_records(content, separator)) == content.split(separator)
+
     def test_negative_execution_count(self):
         text = "\n".join(
             [
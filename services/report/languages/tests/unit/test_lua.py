@@ -128,3 +128,10 @@ class TestLua(BaseTestCase):
         assert lua.detect(b"=========") is True
         assert lua.detect(b"=== fefef") is False
         assert lua.detect(b"<xml>") is False
+
+    def test_docs(self):
+        assert list(lua.docs(b"===\na.lua\n==\n\t1 line\n==x\n")) == [
+            "",
+            "a.lua\n",
+            " 1 line\n==x\n",
+        ]
@@ -13,6 +13,8 @@ from services.yaml import read_yaml_field
 
 
 class VOneProcessor(BaseLanguageProcessor):
+    signatures = frozenset(("coverage", "RSpec", "MiniTest"))
+
     def matches_content(self, content, first_line, name):
         return "coverage" in content or "RSpec" in content or "MiniTest" in content
 
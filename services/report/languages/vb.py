@@ -8,6 +8,8 @@ from services.report.report_builder import ReportBuilder
 
 
 class VbProcessor(BaseLanguageProcessor):
+    signatures = frozenset(("results",))
+
     def matches_content(self, content, first_line, name):
         return bool(content.tag == "results")
 
@@ -8,6 +8,8 @@ from services.report.report_builder import ReportBuilder
 
 
 class VbTwoProcessor(BaseLanguageProcessor):
+    signatures = frozenset(("CoverageDSPriv",))
+
     def matches_content(self, content, first_line, name):
         return bool(content.tag == "CoverageDSPriv")
 
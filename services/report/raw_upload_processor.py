@@ -1,21 +1,27 @@
 # -*- coding: utf-8 -*-
 
+import dataclasses
 import json
 import logging
 import random
 import typing
+from collections import defaultdict
 from dataclasses import dataclass
+from typing import Optional
 
 import sentry_sdk
+from billiard import Pool
+from shared.config import get_config
 from shared.reports.resources import Report
 from shared.utils.sessions import Session, SessionType
 
 from database.models.reports import Upload
 from helpers.exceptions import ReportEmptyError
-from helpers.labels import get_all_report_labels, get_labels_per_session
+from helpers.labels import get_all_report_labels, get_labels_per_session_index
+from helpers.metrics import metrics
 from rollouts import USE_LABEL_INDEX_IN_REPORT_PROCESSING_BY_REPO_ID
 from services.path_fixer import PathFixer
-from services.report.parser.types import ParsedRawReport
+from services.report.parser.types import ParsedRawReport, ParsedUploadedReportFile
 from services.report.report_builder import ReportBuilder, SpecialLabelsEnum
 from services.report.report_processor import process_report
 from services.yaml import read_yaml_field
@@ -53,6 +59,15 @@ class UploadProcessingResult(object):
     raw_report: ParsedRawReport
 
 
+@dataclass
+class ParsedUpload(object):
+    __slots__ = ("report", "session", "joined", "raw_report")
+    report: Report
+    session: Session
+    joined: bool
+    raw_report: ParsedRawReport
+
+
 @sentry_sdk.trace
 def process_raw_upload(
     commit_yaml,
@@ -62,6 +77,43 @@ def process_raw_upload(
     session=None,
     upload: Upload = None,
 ) -> UploadProcessingResult:
+    # --------------------
+    # Create Master Report
+    # --------------------
+    if not original_report:
+        original_report = Report()
+
+    # Get a sesisonid to merge into
+    # anything merged into the original_report
+    # will take on this sessionid
+    # But we don't actually merge yet in case the report is empty.
+    # This is done to avoid garbage sessions to build up in the report
+    # How can you be sure this will be the sessionid used when you actually merge it? Remember that this piece of code runs inside a lock u.u
+    sessionid = original_report.next_session_number()
+    parsed_upload = parse_raw_upload(
+        commit_yaml, reports, flags, sessionid, session=session, upload=upload
+    )
+    return merge_parsed_upload(
+        commit_yaml, original_report, parsed_upload, upload=upload
+    )
+
+
+@sentry_sdk.trace
+def parse_raw_upload(
+    commit_yaml,
+    reports: ParsedRawReport,
+    flags,
+    sessionid: int,
+    session=None,
+    upload: Upload = None,
+) -> ParsedUpload:
+    """Runs the language processors over every file of a raw upload, producing
+    a report that only contains the session `sessionid`.
+
+    This doesn't touch the commit report, so it's safe to call without holding
+    the upload processing lock. The result can later be folded into the commit
+    report with `merge_parsed_upload`, which fixes the session id if needed.
+    """
     toc, env = None, None
 
     # ----------------------
@@ -72,12 +124,6 @@ def process_raw_upload(
     if reports.has_env():
         env = reports.get_env()
 
-    # --------------------
-    # Create Master Report
-    # --------------------
-    if not original_report:
-        original_report = Report()
-
     path_fixer = PathFixer.init_from_user_yaml(
         commit_yaml=commit_yaml, toc=toc, flags=flags
     )
@@ -91,13 +137,6 @@ def process_raw_upload(
         ignored_file_lines = None
 
     session = session or Session()
-    # Get a sesisonid to merge into
-    # anything merged into the original_report
-    # will take on this sessionid
-    # But we don't actually merge yet in case the report is empty.
-    # This is done to avoid garbage sessions to build up in the report
-    # How can you be sure this will be the sessionid used when you actually merge it? Remember that this piece of code runs inside a lock u.u
-    sessionid = original_report.next_session_number()
     session.id = sessionid
     if env:
         session.env = dict([e.split("=", 1) for e in env.split("\n") if "=" in e])
@@ -133,32 +172,39 @@ def process_raw_upload(
     # Process reports
     # ---------------
     ignored_lines = ignored_file_lines or {}
+    files_to_process = []
     for report_file in reports.get_uploaded_files():
-        current_filename = report_file.filename
         if report_file.contents:
-            if current_filename in skip_files:
-                log.info("Skipping file %s", current_filename)
+            if report_file.filename in skip_files:
+                log.info("Skipping file %s", report_file.filename)
                 continue
-            path_fixer_to_use = path_fixer.get_relative_path_aware_pathfixer(
-                current_filename
-            )
-            report_builder_to_use = ReportBuilder(
-                commit_yaml,
-                sessionid,
-                ignored_lines,
-                path_fixer_to_use,
-                should_use_encoded_labels,
-            )
-            report = process_report(
-                report=report_file, report_builder=report_builder_to_use
-            )
-            if report:
-                if should_use_encoded_labels:
-                    # Copies the labels from report into temporary_report
-                    # If needed
-                    make_sure_label_indexes_match(temporary_report, report)
-                temporary_report.merge(report, joined=True)
-            path_fixer_to_use.log_abnormalities()
+            files_to_process.append(report_file)
+    processing_args = (
+        path_fixer,
+        commit_yaml,
+        sessionid,
+        ignored_lines,
+        should_use_encoded_labels,
+    )
+    pool_size = min(get_processing_pool_size(), len(files_to_process))
+    if pool_size > 1:
+        processed_reports = _process_report_files_in_pool(
+            files_to_process, processing_args, pool_size
+        )
+    else:
+        processed_reports = (
+            _process_report_file(report_file, *processing_args)
+            for report_file in files_to_process
+        )
+    # Merging always happens here, in the original order of the files,
+    # so the result doesn't depend on how the files were processed
+    for report in processed_reports:
+        if report:
+            if should_use_encoded_labels:
+                # Copies the labels from report into temporary_report
+                # If needed
+                make_sure_label_indexes_match(temporary_report, report)
+            temporary_report.merge(report, joined=True)
 
     actual_path_fixes = {
         after: before
@@ -186,9 +232,35 @@ def process_raw_upload(
         # none of the reports processed contributed any new labels to it.
         # So we assume there are no labels and just reset the _labels_index of temporary_report
         temporary_report.labels_index = None
+    return ParsedUpload(
+        report=temporary_report, session=session, joined=joined, raw_report=reports
+    )
+
+
+@sentry_sdk.trace
+def merge_parsed_upload(
+    commit_yaml,
+    original_report,
+    parsed_upload: ParsedUpload,
+    upload: Upload = None,
+) -> UploadProcessingResult:
+    """Folds a report produced by `parse_raw_upload` into `original_report`.
+
+    This is the part of the processing that needs exclusive access to the commit
+    report, so it must run inside the upload processing lock.
+    """
+    if not original_report:
+        original_report = Report()
+    temporary_report = parsed_upload.report
+    session = parsed_upload.session
+    parsed_sessionid = session.id
     # Now we actually add the session to the original_report
     # Because we know that the processing was successful
     sessionid, session = original_report.add_session(session)
+    if sessionid != parsed_sessionid:
+        # The upload was parsed before we knew which sessionid it would get
+        change_report_sessionid(temporary_report, parsed_sessionid, sessionid)
+        session.id = sessionid
     # Adjust sessions removed carryforward sessions that are being replaced
     session_manipulation_result = _adjust_sessions(
         original_report,
@@ -197,14 +269,130 @@ def process_raw_upload(
         current_yaml=commit_yaml,
         upload=upload,
     )
-    original_report.merge(temporary_report, joined=joined)
+    original_report.merge(temporary_report, joined=parsed_upload.joined)
     session.totals = temporary_report.totals
     return UploadProcessingResult(
         report=original_report,
         fully_deleted_sessions=session_manipulation_result.fully_deleted_sessions,
         partially_deleted_sessions=session_manipulation_result.partially_deleted_sessions,
-        raw_report=reports,
+        raw_report=parsed_upload.raw_report,
+    )
+
+
+# RUSTIFYME
+@sentry_sdk.trace
+def change_report_sessionid(
+    report: Report, old_sessionid: int, new_sessionid: int
+) -> None:
+    """Makes every line session and datapoint of `old_sessionid` in `report`
+    point to `new_sessionid` instead.
+    """
+    for report_file in report:
+        for line_number, line in report_file.lines:
+            report_file[line_number] = dataclasses.replace(
+                line,
+                sessions=[
+                    (
+                        dataclasses.replace(line_session, id=new_sessionid)
+                        if line_session.id == old_sessionid
+                        else line_session
+                    )
+                    for line_session in line.sessions
+                ],
+                datapoints=(
+                    [
+                        (
+                            dataclasses.replace(datapoint, sessionid=new_sessionid)
+                            if datapoint.sessionid == old_sessionid
+                            else datapoint
+                        )
+                        for datapoint in line.datapoints
+                    ]
+                    if line.datapoints
+                    else line.datapoints
+                ),
+            )
+        report_file._totals = None
+    report._totals = None
+
+
+def get_processing_pool_size() -> int:
+    """How many processes can be used to run the language processors of a single upload.
+    Anything below 2 means files are processed serially, in the current process.
+    """
+    return get_config("setup", "upload_processing", "process_pool_size", default=0)
+
+
+def _process_report_file(
+    report_file: ParsedUploadedReportFile,
+    path_fixer: PathFixer,
+    commit_yaml,
+    sessionid: int,
+    ignored_lines,
+    should_use_encoded_labels: bool,
+) -> Optional[Report]:
+    path_fixer_to_use = path_fixer.get_relative_path_aware_pathfixer(
+        report_file.filename
     )
+    report_builder_to_use = ReportBuilder(
+        commit_yaml,
+        sessionid,
+        ignored_lines,
+        path_fixer_to_use,
+        should_use_encoded_labels,
+    )
+    report = process_report(report=report_file, report_builder=report_builder_to_use)
+    path_fixer_to_use.log_abnormalities()
+    return report
+
+
+# Arguments of `_process_report_file` (besides the file itself) shared by all the
+# files of an upload. Set once per pool process by `_initialize_processing_pool`
+_processing_pool_args = None
+
+
+def _initialize_processing_pool(processing_args: tuple) -> None:
+    global _processing_pool_args
+    _processing_pool_args = processing_args
+
+
+def _process_report_file_in_pool(
+    report_file: ParsedUploadedReportFile,
+) -> typing.Tuple[Optional[Report], typing.Dict[Optional[str], set]]:
+    path_fixer = _processing_pool_args[0]
+    # Each pool process has its own copy of the path_fixer, so the paths it calculates
+    # need to be sent back to be visible to the original one
+    path_fixer.calculated_paths = defaultdict(set)
+    report = _process_report_file(report_file, *_processing_pool_args)
+    return report, dict(path_fixer.calculated_paths)
+
+
+@sentry_sdk.trace
+def _process_report_files_in_pool(
+    report_files: typing.List[ParsedUploadedReportFile],
+    processing_args: tuple,
+    pool_size: int,
+) -> typing.List[Optional[Report]]:
+    """Runs the language processors of each file in a separate process.
+    Returns the resulting reports in the same order as `report_files`.
+
+    The pool comes from billiard, like celery's own: the prefork worker processes this
+        runs in are daemonic, and only billiard lets them have children.
+    """
+    path_fixer = processing_args[0]
+    with metrics.timer("services.report.raw_upload_processor.process_files_in_pool"):
+        with Pool(
+            processes=pool_size,
+            initializer=_initialize_processing_pool,
+            initargs=(processing_args,),
+        ) as pool:
+            results = pool.map(_process_report_file_in_pool, report_files)
+    reports = []
+    for report, calculated_paths in results:
+        for after, befores in calculated_paths.items():
+            path_fixer.calculated_paths[after].update(befores)
+        reports.append(report)
+    return reports
 
 
 @dataclass
@@ -391,9 +579,9 @@ def _adjust_sessions(
         )
         all_labels = get_all_report_labels(to_merge_report)
         original_report.delete_labels(session_ids_to_partially_delete, all_labels)
+        labels_per_session = get_labels_per_session_index(original_report)
         for s in session_ids_to_partially_delete:
-            labels_now = get_labels_per_session(original_report, s)
-            if not labels_now:
+            if not labels_per_session.get(s):
                 log.info(
                     "Session has now no new labels, deleting whole session",
                     extra=dict(commit_id=commit_id) if upload is not None else dict(),
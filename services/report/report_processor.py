@@ -2,10 +2,12 @@
 
 import logging
 import numbers
-from json import load
-from typing import Any, Optional, Tuple
+from itertools import islice
+from json import loads
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
 
 from lxml import etree
+from shared.config import get_config
 from shared.reports.resources import Report
 
 from helpers.exceptions import CorruptRawReportError
@@ -40,12 +42,72 @@ from services.report.languages import (
     XCodePlistProcessor,
     XCodeProcessor,
 )
-from services.report.languages.helpers import remove_non_ascii
+from services.report.languages.base import BaseLanguageProcessor
+from services.report.languages.helpers import XmlStream, remove_non_ascii
 from services.report.parser.types import ParsedUploadedReportFile
 from services.report.report_builder import ReportBuilder
 
 log = logging.getLogger(__name__)
 
+# How much of a report is looked at to tell what format it is in
+SNIFF_SIZE = 16384
+UTF8_BOM = b"\xef\xbb\xbf"
+UTF16_LE_BOM = b"\xff\xfe"
+UTF16_BE_BOM = b"\xfe\xff"
+
+
+def get_xml_streaming_threshold() -> Optional[int]:
+    """Size (in bytes) from which XML reports are processed element by element
+    instead of being parsed into a whole tree. `None` disables streaming.
+    """
+    return get_config(
+        "setup", "upload_processing", "xml_streaming_threshold", default=None
+    )
+
+
+def looks_like_json(raw_report: bytes) -> bool:
+    """Cheap check so that only what can be a JSON object or array gets handed to the
+    JSON parser (which would also take UTF-16, hence ignoring null bytes)
+    """
+    head = raw_report[:SNIFF_SIZE]
+    if head.startswith((UTF16_LE_BOM, UTF16_BE_BOM)):
+        return True
+    head = head.replace(b"\x00", b"").lstrip().lstrip(UTF8_BOM).lstrip()
+    return head[:1] in (b"{", b"[")
+
+
+def looks_like_xml(raw_report: bytes) -> bool:
+    """Cheap check so that only what can be XML gets handed to the XML parser"""
+    head = raw_report[:SNIFF_SIZE].lstrip().lstrip(UTF8_BOM).lstrip()
+    return head.startswith((b"<", UTF16_LE_BOM, UTF16_BE_BOM))
+
+
+def sniff_xml_stream(raw_report: bytes) -> Optional[XmlStream]:
+    """Reads the first few KB of `raw_report` to find out its root element and the
+    tag of the first element under it, without building the rest of the tree
+    """
+    parser = etree.XMLPullParser(
+        events=("start",), recover=True, resolve_entities=False
+    )
+    parser.feed(raw_report[:SNIFF_SIZE])
+    elements = [element for _, element in islice(parser.read_events(), 2)]
+    if not elements:
+        return None
+    root = elements[0]
+    first_child_tag = elements[1].tag if len(elements) > 1 else None
+    return XmlStream(raw_report, root.tag, dict(root.attrib), first_child_tag)
+
+
+def parse_xml(raw_report: bytes) -> Optional[etree._Element]:
+    try:
+        parser = etree.XMLParser(recover=True, resolve_entities=False)
+        processed = etree.fromstring(raw_report, parser=parser)
+        if processed is not None and len(processed) > 0:
+            return processed
+    except ValueError:
+        pass
+    return None
+
 
 def report_type_matching(report: ParsedUploadedReportFile) -> Tuple[Any, Optional[str]]:
     first_line = remove_non_ascii(report.get_first_line().decode(errors="replace"))
@@ -76,63 +138,163 @@ def report_type_matching(report: ParsedUploadedReportFile) -> Tuple[Any, Optiona
     if raw_report.find(b'<plist version="1.0">') >= 0 or name.endswith(".plist"):
         return raw_report, "plist"
     if raw_report:
-        try:
-            processed = load(report.file_contents)
-            if processed != dict() and not isinstance(processed, numbers.Number):
-                return processed, "json"
-        except ValueError:
-            pass
+        if looks_like_json(raw_report):
+            try:
+                processed = loads(raw_report)
+                if processed != dict() and not isinstance(processed, numbers.Number):
+                    return processed, "json"
+            except ValueError:
+                pass
         if b"<classycle " in raw_report and b"</classycle>" in raw_report:
             return None, None
-        try:
-            parser = etree.XMLParser(recover=True, resolve_entities=False)
-            processed = etree.fromstring(raw_report, parser=parser)
-            if processed is not None and len(processed) > 0:
+        if looks_like_xml(raw_report):
+            streaming_threshold = get_xml_streaming_threshold()
+            if streaming_threshold is not None and report.size >= streaming_threshold:
+                xml_stream = sniff_xml_stream(raw_report)
+                if xml_stream is not None:
+                    return xml_stream, "xml_stream"
+            processed = parse_xml(raw_report)
+            if processed is not None:
                 return processed, "xml"
-        except ValueError:
-            pass
     return raw_report, "txt"
 
 
-def get_possible_processors_list(report_type) -> list:
-    processor_dict = {
-        "plist": [XCodePlistProcessor()],
-        "xml": [
-            BullseyeProcessor(),
-            SCoverageProcessor(),
-            JetBrainsXMLProcessor(),
-            CloverProcessor(),
-            MonoProcessor(),
-            CSharpProcessor(),
-            JacocoProcessor(),
-            VbProcessor(),
-            VbTwoProcessor(),
-            CoberturaProcessor(),
-        ],
-        "txt": [
-            LcovProcessor(),
-            GcovProcessor(),
-            LuaProcessor(),
-            GapProcessor(),
-            DLSTProcessor(),
-            GoProcessor(),
-            XCodeProcessor(),
-        ],
-        "json": [
-            SalesforceProcessor(),
-            ElmProcessor(),
-            RlangProcessor(),
-            FlowcoverProcessor(),
-            VOneProcessor(),
-            ScalaProcessor(),
-            CoverallsProcessor(),
-            SimplecovProcessor(),
-            GapProcessor(),
-            PyCoverageProcessor(),
-            NodeProcessor(),
-        ],
-    }
-    return processor_dict.get(report_type, [])
+class ProcessorRegistry(object):
+    """The language processors that can take each report type, in the order they are
+        asked whether they match a report
+
+    Processors don't keep anything between reports, so they are only instantiated once
+        per worker process.
+        The processors that declare `signatures` are indexed by them, so the only ones
+        asked about a report are those that declared its root tag / top-level keys,
+        plus the ones that always need to be asked
+    """
+
+    def __init__(
+        self, processors_by_report_type: Dict[str, List[BaseLanguageProcessor]]
+    ):
+        self._processors_by_report_type = processors_by_report_type
+        self._known_signatures = {
+            report_type: frozenset(
+                signature
+                for processor in processors
+                if processor.signatures is not None
+                for signature in processor.signatures
+            )
+            for report_type, processors in processors_by_report_type.items()
+        }
+        self._candidates = {}
+
+    def get_processors(
+        self, report_type: Optional[str], signatures: Optional[FrozenSet[str]] = None
+    ) -> List[BaseLanguageProcessor]:
+        processors = self._processors_by_report_type.get(report_type, [])
+        if signatures is None:
+            return processors
+        key = (report_type, signatures)
+        if key not in self._candidates:
+            # There's only so many combinations of known signatures
+            self._candidates[key] = [
+                processor
+                for processor in processors
+                if processor.signatures is None or processor.signatures & signatures
+            ]
+        return self._candidates[key]
+
+    def get_content_signatures(
+        self, parsed_report: Any, report_type: Optional[str]
+    ) -> FrozenSet[str]:
+        known_signatures = self._known_signatures.get(report_type, frozenset())
+        if report_type == "xml":
+            found = (parsed_report.tag,)
+        elif report_type == "xml_stream":
+            found = (parsed_report.root_tag,)
+        elif report_type == "json" and isinstance(parsed_report, dict):
+            found = known_signatures
+        else:
+            return frozenset()
+        return frozenset(
+            signature
+            for signature in found
+            if signature in known_signatures
+            and (report_type != "json" or signature in parsed_report)
+        )
+
+
+_processor_registry = None
+
+
+def get_processor_registry() -> ProcessorRegistry:
+    global _processor_registry
+    if _processor_registry is None:
+        _processor_registry = ProcessorRegistry(
+            {
+                "plist": [XCodePlistProcessor()],
+                "xml_stream": [
+                    CloverProcessor(),
+                    JacocoProcessor(),
+                    CoberturaProcessor(),
+                ],
+                "xml": [
+                    BullseyeProcessor(),
+                    SCoverageProcessor(),
+                    JetBrainsXMLProcessor(),
+                    CloverProcessor(),
+                    MonoProcessor(),
+                    CSharpProcessor(),
+                    JacocoProcessor(),
+                    VbProcessor(),
+                    VbTwoProcessor(),
+                    CoberturaProcessor(),
+                ],
+                "txt": [
+                    LcovProcessor(),
+                    GcovProcessor(),
+                    LuaProcessor(),
+                    GapProcessor(),
+                    DLSTProcessor(),
+                    GoProcessor(),
+                    XCodeProcessor(),
+                ],
+                "json": [
+                    SalesforceProcessor(),
+                    ElmProcessor(),
+                    RlangProcessor(),
+                    FlowcoverProcessor(),
+                    VOneProcessor(),
+                    ScalaProcessor(),
+                    CoverallsProcessor(),
+                    SimplecovProcessor(),
+                    GapProcessor(),
+                    PyCoverageProcessor(),
+                    NodeProcessor(),
+                ],
+            }
+        )
+    return _processor_registry
+
+
+def get_possible_processors_list(
+    report_type, signatures: Optional[FrozenSet[str]] = None
+) -> list:
+    """The processors that might take a report of `report_type`, in order
+
+    When the report's `signatures` are given, processors that declared they can't
+        take it are left out
+    """
+    return get_processor_registry().get_processors(report_type, signatures)
+
+
+def get_matching_processor(
+    parsed_report: Any, report_type: Optional[str], first_line: str, name: str
+) -> Optional[BaseLanguageProcessor]:
+    signatures = get_processor_registry().get_content_signatures(
+        parsed_report, report_type
+    )
+    for processor in get_possible_processors_list(report_type, signatures):
+        if processor.matches_content(parsed_report, first_line, name):
+            return processor
+    return None
 
 
 def process_report(
@@ -140,38 +302,46 @@ def process_report(
 ) -> Optional[Report]:
     name = report.filename or ""
     first_line = remove_non_ascii(report.get_first_line().decode(errors="replace"))
-    parsed_report, report_type = report_type_matching(report)
-    if report_type == "txt" and parsed_report[-11:] == b"has no code":
-        # empty [dlst]
-        return None
-    processors = get_possible_processors_list(report_type)
-    for processor in processors:
-        if processor.matches_content(parsed_report, first_line, name):
-            with metrics.timer(
-                f"worker.services.report.processors.{processor.name}.run"
-            ):
-                try:
-                    res = processor.process(name, parsed_report, report_builder)
-                    metrics.incr(
-                        f"worker.services.report.processors.{processor.name}.success"
-                    )
-                    return res
-                except CorruptRawReportError as e:
-                    log.warning(
-                        "Processor matched file but later a problem with file was discovered",
-                        extra=dict(
-                            processor_name=processor.name,
-                            expected_format=e.expected_format,
-                            corruption_error=e.corruption_error,
-                        ),
-                        exc_info=True,
-                    )
-                    return None
-                except Exception:
-                    metrics.incr(
-                        f"worker.services.report.processors.{processor.name}.failure"
-                    )
-                    raise
+    with metrics.timer("worker.services.report.processors.detection"):
+        parsed_report, report_type = report_type_matching(report)
+        if report_type == "txt" and parsed_report[-11:] == b"has no code":
+            # empty [dlst]
+            return None
+        processor = get_matching_processor(parsed_report, report_type, first_line, name)
+        if processor is None and report_type == "xml_stream":
+            # none of the processors that can stream took it, so parse the whole tree
+            parsed_report = parse_xml(parsed_report.contents)
+            if parsed_report is None:
+                parsed_report, report_type = report.contents, "txt"
+            else:
+                report_type = "xml"
+            processor = get_matching_processor(
+                parsed_report, report_type, first_line, name
+            )
+    if processor is not None:
+        with metrics.timer(f"worker.services.report.processors.{processor.name}.run"):
+            try:
+                res = processor.process(name, parsed_report, report_builder)
+                metrics.incr(
+                    f"worker.services.report.processors.{processor.name}.success"
+                )
+                return res
+            except CorruptRawReportError as e:
+                log.warning(
+                    "Processor matched file but later a problem with file was discovered",
+                    extra=dict(
+                        processor_name=processor.name,
+                        expected_format=e.expected_format,
+                        corruption_error=e.corruption_error,
+                    ),
+                    exc_info=True,
+                )
+                return None
+            except Exception:
+                metrics.incr(
+                    f"worker.services.report.processors.{processor.name}.failure"
+                )
+                raise
     log.warning(
         "File format could not be recognized",
         extra=dict(
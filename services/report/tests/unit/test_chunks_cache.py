@@ -0,0 +1,91 @@
+import mock
+
+from database.tests.factories import CommitFactory
+from services.report import chunks_cache
+from services.report.chunks_cache import (
+    ChunksCache,
+    get_chunks_cache,
+    get_chunks_cache_key,
+)
+
+
+class TestChunksCache(object):
+    def test_get_and_set(self):
+        cache = ChunksCache(max_bytes=100, ttl=60)
+        key = (1, "abc", None, "v1")
+        assert cache.get(key) is None
+        cache.set(key, "chunks")
+        assert cache.get(key) == "chunks"
+        assert cache.get((1, "abc", None, "v2")) is None
+        assert cache.current_bytes == 6
+
+    def test_evicts_least_recently_used(self):
+        cache = ChunksCache(max_bytes=10, ttl=60)
+        cache.set((1, "a", None, "v"), "aaaa")
+        cache.set((1, "b", None, "v"), "bbbb")
+        assert cache.get((1, "a", None, "v")) == "aaaa"
+        cache.set((1, "c", None, "v"), "cccc")
+        assert cache.get((1, "b", None, "v")) is None
+        assert cache.get((1, "a", None, "v")) == "aaaa"
+        assert cache.get((1, "c", None, "v")) == "cccc"
+        assert cache.current_bytes == 8
+
+    def test_too_big_not_cached(self):
+        cache = ChunksCache(max_bytes=3, ttl=60)
+        cache.set((1, "a", None, "v"), "aaaa")
+        assert cache.get((1, "a", None, "v")) is None
+        assert cache.current_bytes == 0
+
+    def test_expired(self):
+        cache = ChunksCache(max_bytes=100, ttl=60)
+        with mock.patch("services.report.chunks_cache.time.monotonic") as monotonic:
+            monotonic.return_value = 1000
+            cache.set((1, "a", None, "v"), "aaaa")
+            monotonic.return_value = 1059
+            assert cache.get((1, "a", None, "v")) == "aaaa"
+            monotonic.return_value = 1061
+            assert cache.get((1, "a", None, "v")) is None
+        assert cache.current_bytes == 0
+
+    def test_invalidate(self):
+        cache = ChunksCache(max_bytes=100, ttl=60)
+        cache.set((1, "a", None, "v1"), "old")
+        cache.set((1, "a", None, "v2"), "new")
+        cache.set((1, "a", "local", "v1"), "local")
+        cache.set((2, "a", None, "v1"), "other repo")
+        cache.invalidate(1, "a")
+        assert cache.get((1, "a", None, "v1")) is None
+        assert cache.get((1, "a", None, "v2")) is None
+        assert cache.get((1, "a", "local", "v1")) == "local"
+        assert cache.get((2, "a", None, "v1")) == "other repo"
+
+
+def test_get_chunks_cache_key_changes_with_totals(dbsession):
+    commit = CommitFactory.create(totals={"c": "85.00"})
+    dbsession.add(commit)
+    dbsession.flush()
+    key = get_chunks_cache_key(commit)
+    assert key[:3] == (commit.repoid, commit.commitid, None)
+    assert get_chunks_cache_key(commit) == key
+    commit.totals = {"c": "90.00"}
+    assert get_chunks_cache_key(commit) != key
+
+
+def test_get_chunks_cache(mock_configuration):
+    mock_configuration.params["setup"]["report_chunks_cache"] = {
+        "max_bytes": 1000,
+        "ttl": 5,
+    }
+    cache = get_chunks_cache()
+    assert (cache.max_bytes, cache.ttl) == (1000, 5)
+    assert get_chunks_cache() is cache
+
+
+def test_get_chunks_cache_off_by_default(mock_configuration):
+    assert get_chunks_cache() is None
+
+
+def test_get_chunks_cache_disabled(mock_configuration):
+    mock_configuration.params["setup"]["report_chunks_cache"] = {"max_bytes": 0}
+    assert get_chunks_cache() is None
+    assert chunks_cache._chunks_cache is None
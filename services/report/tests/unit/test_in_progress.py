@@ -0,0 +1,109 @@
+import pytest
+from shared.reports.resources import Report, ReportFile
+from shared.reports.types import ReportLine
+from shared.utils.sessions import Session
+
+from services.report import ReportService, in_progress
+from services.report.in_progress import InProgressReport
+
+
+class FakeRedis(object):
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        pass
+
+
+@pytest.fixture
+def sample_report():
+    report = Report()
+    first_file = ReportFile("file_1.go")
+    first_file.append(1, ReportLine.create(coverage=1, sessions=[[0, 1]]))
+    first_file.append(2, ReportLine.create(coverage=0, sessions=[[0, 0]]))
+    report.append(first_file)
+    report.add_session(Session(flags=["unit"]))
+    return report
+
+
+@pytest.fixture(autouse=True)
+def clear_local_reports():
+    in_progress._local_reports.clear()
+    yield
+    in_progress._local_reports.clear()
+
+
+class TestInProgressReport(object):
+    def test_load_nothing_saved(self, mock_configuration):
+        in_progress_report = InProgressReport(FakeRedis(), 1, "abc")
+        assert in_progress_report.load(ReportService({})) is None
+
+    def test_save_and_load_same_process(self, mock_configuration, sample_report):
+        redis = FakeRedis()
+        in_progress_report = InProgressReport(redis, 1, "abc", "local")
+        in_progress_report.save(sample_report)
+        assert set(redis.data.keys()) == {
+            "in_progress_report/1/abc/local",
+            "in_progress_report/1/abc/local/token",
+        }
+        assert (
+            in_progress_report.load(ReportService({}), report_class=Report)
+            is sample_report
+        )
+        # the local copy is only handed out once
+        loaded = in_progress_report.load(ReportService({}), report_class=Report)
+        assert loaded is not sample_report
+        assert loaded.totals == sample_report.totals
+
+    def test_save_and_load_other_process(self, mock_configuration, sample_report):
+        redis = FakeRedis()
+        InProgressReport(redis, 1, "abc").save(sample_report)
+        in_progress._local_reports.clear()
+        loaded = InProgressReport(redis, 1, "abc").load(ReportService({}))
+        assert type(loaded) is Report
+        assert loaded.totals == sample_report.totals
+        assert [s.flags for s in loaded.sessions.values()] == [["unit"]]
+        assert loaded.get("file_1.go").totals == sample_report.get("file_1.go").totals
+
+    def test_load_stale_local_copy(self, mock_configuration, sample_report):
+        redis = FakeRedis()
+        in_progress_report = InProgressReport(redis, 1, "abc")
+        in_progress_report.save(sample_report)
+        redis.set(in_progress_report.token_key, "newer_token")
+        loaded = in_progress_report.load(ReportService({}), report_class=Report)
+        assert loaded is not sample_report
+        assert loaded.totals == sample_report.totals
+
+    def test_clear(self, mock_configuration, sample_report):
+        redis = FakeRedis()
+        in_progress_report = InProgressReport(redis, 1, "abc")
+        in_progress_report.save(sample_report)
+        assert not in_progress_report.was_saved()
+        in_progress_report.clear()
+        assert set(redis.data.keys()) == {"in_progress_report/1/abc/saved"}
+        assert in_progress_report.load(ReportService({})) is None
+        assert in_progress_report.was_saved()
+        # a new in-progress report hasn't been saved yet
+        in_progress_report.save(sample_report)
+        assert not in_progress_report.was_saved()
+
+    def test_expired(self, mock_configuration, sample_report):
+        redis = FakeRedis()
+        in_progress_report = InProgressReport(redis, 1, "abc")
+        in_progress_report.save(sample_report)
+        redis.data.clear()
+        assert in_progress_report.load(ReportService({})) is None
+        assert not in_progress_report.was_saved()
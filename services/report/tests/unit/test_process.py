@@ -3,6 +3,7 @@ from json import dumps, loads
 from pathlib import Path
 from unittest.mock import Mock, patch
 
+import billiard
 import pytest
 from lxml import etree
 from shared.reports.editable import EditableReport, EditableReportFile
@@ -22,6 +23,20 @@ here = Path(__file__)
 folder = here.parent
 
 
+def process_raw_upload_in_worker(raw_upload, results):
+    """What a celery prefork worker process runs, minus celery"""
+    try:
+        result = process.process_raw_upload(
+            commit_yaml={},
+            original_report=None,
+            reports=LegacyReportParser().parse_raw_report_from_io(BytesIO(raw_upload)),
+            flags=[],
+        )
+        results.put(result.report.to_archive())
+    except Exception as exp:
+        results.put(exp)
+
+
 class TestProcessRawUpload(BaseTestCase):
     def readjson(self, filename):
         with open(folder / filename, "r") as d:
@@ -157,6 +172,68 @@ class TestProcessRawUpload(BaseTestCase):
         master = result.report
         assert master.files == ["source", "file"]
 
+    def test_process_raw_upload_in_process_pool(self, mock_configuration):
+        report = []
+        report.append("# path=coverage/first.lcov")
+        report.extend(["TN:", "SF:file.js", "DA:1,1", "DA:2,0", "end_of_record"])
+        report.append("<<<<<< EOF")
+        report.append("# path=coverage/second.lcov")
+        report.extend(["TN:", "SF:file.js", "DA:2,1", "DA:3,0", "end_of_record"])
+        report.append("<<<<<< EOF")
+        report.append("# path=coverage/third.lcov")
+        report.extend(["TN:", "SF:other.js", "DA:1,1", "end_of_record"])
+        raw_upload = "\n".join(report).encode()
+
+        serial_result = process.process_raw_upload(
+            commit_yaml={},
+            original_report=self.get_v3_report(),
+            reports=LegacyReportParser().parse_raw_report_from_io(BytesIO(raw_upload)),
+            flags=[],
+        )
+        mock_configuration.params["setup"]["upload_processing"] = {
+            "process_pool_size": 2
+        }
+        assert process.get_processing_pool_size() == 2
+        pool_result = process.process_raw_upload(
+            commit_yaml={},
+            original_report=self.get_v3_report(),
+            reports=LegacyReportParser().parse_raw_report_from_io(BytesIO(raw_upload)),
+            flags=[],
+        )
+        assert pool_result.report.files == serial_result.report.files
+        assert pool_result.report.to_archive() == serial_result.report.to_archive()
+        assert pool_result.report.totals == serial_result.report.totals
+
+    def test_process_raw_upload_in_process_pool_from_daemon_process(
+        self, mock_configuration
+    ):
+        report = []
+        report.append("# path=coverage/first.lcov")
+        report.extend(["TN:", "SF:file.js", "DA:1,1", "DA:2,0", "end_of_record"])
+        report.append("<<<<<< EOF")
+        report.append("# path=coverage/second.lcov")
+        report.extend(["TN:", "SF:other.js", "DA:1,1", "end_of_record"])
+        raw_upload = "\n".join(report).encode()
+        serial_result = process.process_raw_upload(
+            commit_yaml={},
+            original_report=None,
+            reports=LegacyReportParser().parse_raw_report_from_io(BytesIO(raw_upload)),
+            flags=[],
+        )
+        mock_configuration.params["setup"]["upload_processing"] = {
+            "process_pool_size": 2
+        }
+        # celery's prefork pool processes are daemonic billiard processes
+        results = billiard.Queue()
+        worker = billiard.Process(
+            target=process_raw_upload_in_worker, args=(raw_upload, results)
+        )
+        worker.daemon = True
+        worker.start()
+        pool_result = results.get(timeout=60)
+        worker.join()
+        assert pool_result == serial_result.report.to_archive()
+
     def test_process_raw_upload_empty_report(self):
         report_data = []
         report_data.append("# path=coverage/coverage.txt")
@@ -278,6 +355,61 @@ class TestProcessRawUpload(BaseTestCase):
                 [],
             )
 
+    def test_parse_then_merge_matches_process_raw_upload(self):
+        raw_upload = "\n".join(
+            [
+                "# path=app.coverage.txt",
+                "/file:\n 1 | 1|line\n 2 | 0|line",
+                "<<<<<< EOF",
+            ]
+        ).encode()
+        expected = process.process_raw_upload(
+            commit_yaml=None,
+            original_report=self.get_v3_report(),
+            reports=LegacyReportParser().parse_raw_report_from_io(BytesIO(raw_upload)),
+            flags=[],
+        )
+        parsed_upload = process.parse_raw_upload(
+            None,
+            LegacyReportParser().parse_raw_report_from_io(BytesIO(raw_upload)),
+            [],
+            0,
+        )
+        assert parsed_upload.session.id == 0
+        assert [s.id for s in parsed_upload.report.get("file").get(1).sessions] == [0]
+        result = process.merge_parsed_upload(None, self.get_v3_report(), parsed_upload)
+        assert parsed_upload.session.id == 3
+        assert [s.id for s in result.report.get("file").get(1).sessions] == [3]
+        assert result.report.sessions[3].totals == expected.report.sessions[3].totals
+        assert result.report.to_archive() == expected.report.to_archive()
+
+    def test_parse_raw_upload_empty(self):
+        with pytest.raises(ReportEmptyError, match="No files found in report."):
+            process.parse_raw_upload(
+                {},
+                LegacyReportParser().parse_raw_report_from_io(BytesIO(b"")),
+                [],
+                0,
+            )
+
+    def test_change_report_sessionid(self):
+        report = Report()
+        report_file = ReportFile("file.py")
+        report_file.append(
+            1, ReportLine.create(coverage=1, sessions=[LineSession(id=0, coverage=1)])
+        )
+        report_file.append(
+            2,
+            ReportLine.create(
+                coverage=0,
+                sessions=[LineSession(id=0, coverage=0), LineSession(id=1, coverage=0)],
+            ),
+        )
+        report.append(report_file)
+        process.change_report_sessionid(report, 0, 5)
+        assert [s.id for s in report.get("file.py").get(1).sessions] == [5]
+        assert [s.id for s in report.get("file.py").get(2).sessions] == [5, 1]
+
 
 class TestProcessRawUploadFixed(BaseTestCase):
     def test_fixes(self):
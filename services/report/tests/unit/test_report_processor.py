@@ -2,7 +2,12 @@ import json
 from io import BytesIO
 
 from services.report.parser.types import ParsedUploadedReportFile
-from services.report.report_processor import report_type_matching
+from services.report.report_processor import (
+    get_possible_processors_list,
+    get_processor_registry,
+    looks_like_json,
+    report_type_matching,
+)
 
 xcode_report = """/Users/distiller/project/Auth0/A0ChallengeGenerator.m:
    28|       |@implementation A0SHA256ChallengeGenerator
@@ -90,3 +95,104 @@ class TestReportTypeMatching(object):
                 filename="name", file_contents=BytesIO("1".encode())
             )
         ) == (b"1", "txt")
+
+    def test_report_type_matching_only_parses_what_looks_like_xml(self, mocker):
+        parse_xml = mocker.patch(
+            "services.report.report_processor.parse_xml", return_value=None
+        )
+        assert report_type_matching(
+            ParsedUploadedReportFile(
+                filename="name", file_contents=BytesIO(b"TN:\nSF:file.c\n<notxml>")
+            )
+        ) == (b"TN:\nSF:file.c\n<notxml>", "txt")
+        assert not parse_xml.called
+        report_type_matching(
+            ParsedUploadedReportFile(
+                filename="name", file_contents=BytesIO(b"\n \xef\xbb\xbf<notxml>")
+            )
+        )
+        assert parse_xml.called
+
+    def test_report_type_matching_xml_stream(self, mock_configuration):
+        content = b'<?xml version="1.0" ?>\n<!-- generated -->\n<coverage timestamp="1"><sources><source>/a</source></sources></coverage>'
+        assert (
+            report_type_matching(
+                ParsedUploadedReportFile(
+                    filename="name", file_contents=BytesIO(content)
+                )
+            )[1]
+            == "xml"
+        )
+        mock_configuration.params["setup"]["upload_processing"] = {
+            "xml_streaming_threshold": len(content)
+        }
+        xml_stream, report_type = report_type_matching(
+            ParsedUploadedReportFile(filename="name", file_contents=BytesIO(content))
+        )
+        assert report_type == "xml_stream"
+        assert xml_stream.contents == content
+        assert xml_stream.root_tag == "coverage"
+        assert xml_stream.root_attrib == {"timestamp": "1"}
+        assert xml_stream.first_child_tag == "sources"
+
+
+class TestProcessorRegistry(object):
+    def test_processors_are_only_built_once(self):
+        assert get_processor_registry() is get_processor_registry()
+        assert get_possible_processors_list("xml") is get_possible_processors_list(
+            "xml"
+        )
+        assert get_possible_processors_list("unknown") == []
+
+    def test_xml_candidates(self):
+        report = report_type_matching(
+            ParsedUploadedReportFile(
+                filename="name",
+                file_contents=BytesIO(b"<report><package></package></report>"),
+            )
+        )[0]
+        registry = get_processor_registry()
+        signatures = registry.get_content_signatures(report, "xml")
+        assert signatures == frozenset(["report"])
+        assert [p.name for p in get_possible_processors_list("xml", signatures)] == [
+            "BullseyeProcessor",
+            "JacocoProcessor",
+            "CoberturaProcessor",
+        ]
+        # only the processors that don't declare signatures for an unknown root
+        assert [p.name for p in get_possible_processors_list("xml", frozenset())] == [
+            "BullseyeProcessor",
+            "CoberturaProcessor",
+        ]
+
+    def test_json_candidates(self):
+        registry = get_processor_registry()
+        content = {"coverage": {}, "meta": {"show_contexts": False}, "files": {}}
+        signatures = registry.get_content_signatures(content, "json")
+        assert signatures == frozenset(["coverage", "meta"])
+        assert [p.name for p in get_possible_processors_list("json", signatures)] == [
+            "SalesforceProcessor",
+            "VOneProcessor",
+            "GapProcessor",
+            "PyCoverageProcessor",
+            "NodeProcessor",
+        ]
+        assert registry.get_content_signatures([{"name": "a"}], "json") == frozenset()
+        assert registry.get_content_signatures(b"TN:", "txt") == frozenset()
+
+    def test_looks_like_json(self):
+        assert looks_like_json(b'\n  {"a": 1}')
+        assert looks_like_json(b"[1, 2]")
+        assert looks_like_json('{"a": 1}'.encode("utf-16"))
+        assert looks_like_json('{"a": 1}'.encode("utf-16-be"))
+        assert looks_like_json('{"a": 1}'.encode("utf-8-sig"))
+        assert not looks_like_json(b"1")
+        assert not looks_like_json(b"<coverage></coverage>")
+        assert not looks_like_json(b"mode: set\n")
+
+    def test_report_type_matching_json_with_utf8_bom(self):
+        content = '{"coverage": {"file.py": [null, 1, 0]}}'.encode("utf-8-sig")
+        assert content.startswith(b"\xef\xbb\xbf")
+        assert report_type_matching(
+            ParsedUploadedReportFile(filename="name", file_contents=BytesIO(content))
+        ) == ({"coverage": {"file.py": [None, 1, 0]}}, "json")
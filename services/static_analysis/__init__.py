@@ -1,6 +1,7 @@
 import json
 import logging
 import typing
+from concurrent.futures import ThreadPoolExecutor
 
 import sentry_sdk
 from shared.storage.exceptions import FileNotInStorageError
@@ -19,6 +20,9 @@ from services.static_analysis.single_file_analyzer import (
 
 log = logging.getLogger(__name__)
 
+# How many snapshots are read from storage at the same time
+SNAPSHOT_LOADING_THREADS = 8
+
 
 def _get_analysis_content_mapping(analysis: StaticAnalysisSuite, filepaths):
     db_session = analysis.get_db_session()
@@ -50,6 +54,10 @@ class StaticAnalysisComparisonService(object):
         self._head_static_analysis = head_static_analysis
         self._git_diff = git_diff
         self._archive_service = None
+        # content_location -> snapshot, for the snapshots loaded beforehand
+        self._loaded_snapshots: typing.Dict[
+            str, typing.Optional[SingleFileSnapshotAnalyzer]
+        ] = {}
 
     @property
     def archive_service(self):
@@ -61,6 +69,9 @@ class StaticAnalysisComparisonService(object):
 
     @sentry_sdk.trace
     def get_base_lines_relevant_to_change(self) -> typing.List[typing.Dict]:
+        if any(change.change_type == DiffChangeType.new for change in self._git_diff):
+            # There's no telling which tests a new file affects
+            return {"all": True}
         final_result = {"all": False, "files": {}}
         db_session = self._base_static_analysis.get_db_session()
         head_analysis_content_locations_mapping = _get_analysis_content_mapping(
@@ -79,13 +90,27 @@ class StaticAnalysisComparisonService(object):
                 if change.before_filepath
             ],
         )
-        # @giovanni-guidini 2023-06-14
-        # NOTE: Maybe we can paralelize this bit.
-        # There's some level of IO involved.
+        snapshots_to_load = []
+        for change in self._git_diff:
+            if change.change_type == DiffChangeType.modified:
+                snapshots_to_load.append(
+                    (
+                        change.after_filepath,
+                        head_analysis_content_locations_mapping.get(
+                            change.after_filepath
+                        ),
+                    )
+                )
+                snapshots_to_load.append(
+                    (
+                        change.before_filepath,
+                        base_analysis_content_locations_mapping.get(
+                            change.before_filepath
+                        ),
+                    )
+                )
+        self._preload_snapshots(snapshots_to_load)
         for change in self._git_diff:
-            # This check should happen way earlier
-            if change.change_type == DiffChangeType.new:
-                return {"all": True}
             final_result["files"][change.before_filepath] = self._analyze_single_change(
                 db_session,
                 change,
@@ -94,11 +119,37 @@ class StaticAnalysisComparisonService(object):
             )
         return final_result
 
+    @sentry_sdk.trace
+    def _preload_snapshots(
+        self, snapshots: typing.List[typing.Tuple[str, typing.Optional[str]]]
+    ) -> None:
+        """Reads the snapshots the changes need from storage all at once, in threads,
+        instead of one after the other as each change is analyzed"""
+        filepath_by_location = {}
+        for filepath, content_location in snapshots:
+            if content_location and content_location not in self._loaded_snapshots:
+                filepath_by_location.setdefault(content_location, filepath)
+        if not filepath_by_location:
+            return
+        # Get the archive service here, it touches the database
+        self.archive_service
+        with ThreadPoolExecutor(
+            max_workers=min(SNAPSHOT_LOADING_THREADS, len(filepath_by_location))
+        ) as pool:
+            loaded = pool.map(
+                lambda item: self._load_snapshot_data(item[1], item[0]),
+                filepath_by_location.items(),
+            )
+            for content_location, snapshot in zip(filepath_by_location, loaded):
+                self._loaded_snapshots[content_location] = snapshot
+
     def _load_snapshot_data(
         self, filepath, content_location
     ) -> typing.Optional[SingleFileSnapshotAnalyzer]:
         if not content_location:
             return None
+        if content_location in self._loaded_snapshots:
+            return self._loaded_snapshots[content_location]
         try:
             return SingleFileSnapshotAnalyzer(
                 filepath,
@@ -64,16 +64,41 @@ class SingleFileSnapshotAnalyzer(object):
         self._filepath = filepath
         self._analysis_file_data = analysis_file_data
         self._statement_mapping = dict(analysis_file_data["statements"])
+        # Lookup tables built the first time they are needed. They give the same
+        # answers as going through the statements/functions in order, looking
+        # for the first match, but without going through all of them every time
+        self._executable_line_by_line: typing.Optional[typing.Dict[int, int]] = None
+        self._function_by_line: typing.Optional[typing.Dict[int, dict]] = None
+        self._function_by_identifier: typing.Optional[typing.Dict[str, dict]] = None
+
+    def _build_executable_line_index(self) -> typing.Dict[int, int]:
+        # line number -> position of the first statement that contains that line
+        first_statement_for_line = {}
+        for position, (that_line, statement_data) in enumerate(
+            self._analysis_file_data["statements"]
+        ):
+            for line_number in range(that_line, that_line + statement_data["len"] + 1):
+                first_statement_for_line.setdefault(line_number, position)
+            for line_number in statement_data["extra_connected_lines"]:
+                first_statement_for_line.setdefault(line_number, position)
+        statements = self._analysis_file_data["statements"]
+        return {
+            line_number: statements[position][0]
+            for line_number, position in first_statement_for_line.items()
+        }
+
+    def _build_function_line_index(self) -> typing.Dict[int, dict]:
+        function_by_line = {}
+        for f in self._analysis_file_data["functions"]:
+            for line_number in range(f.get("start_line"), f.get("end_line") + 1):
+                function_by_line.setdefault(line_number, f)
+        return function_by_line
 
     def get_corresponding_executable_line(self, line_number: int) -> int:
-        for that_line, statement_data in self._analysis_file_data["statements"]:
-            if (
-                that_line <= line_number
-                and that_line + statement_data["len"] >= line_number
-            ):
-                return that_line
-            if line_number in statement_data["extra_connected_lines"]:
-                return that_line
+        if self._executable_line_by_line is None:
+            self._executable_line_by_line = self._build_executable_line_index()
+        if line_number in self._executable_line_by_line:
+            return self._executable_line_by_line[line_number]
         # This is a logging.warning for now while we implement things
         # But there will be a really reasonable case where customers
         # change no code. So it won't have a corresponding executable line
@@ -106,12 +131,11 @@ class SingleFileSnapshotAnalyzer(object):
             )
         if current_line not in lines_to_not_consider:
             return (AntecessorFindingResult.line, current_line)
-        for f in self._analysis_file_data["functions"]:
-            if (
-                f.get("start_line") <= current_line
-                and f.get("end_line") >= current_line
-            ):
-                return (AntecessorFindingResult.function, f["identifier"])
+        if self._function_by_line is None:
+            self._function_by_line = self._build_function_line_index()
+        f = self._function_by_line.get(current_line)
+        if f is not None:
+            return (AntecessorFindingResult.function, f["identifier"])
         log.warning(
             "Somehow not able to find antecessor line",
             extra=dict(
@@ -124,7 +148,8 @@ class SingleFileSnapshotAnalyzer(object):
         return (AntecessorFindingResult.file, self._filepath)
 
     def find_function_by_identifier(self, function_identifier):
-        for func in self._analysis_file_data["functions"]:
-            if func["identifier"] == function_identifier:
-                return func
-        return None
+        if self._function_by_identifier is None:
+            self._function_by_identifier = {}
+            for func in self._analysis_file_data["functions"]:
+                self._function_by_identifier.setdefault(func["identifier"], func)
+        return self._function_by_identifier.get(function_identifier)
@@ -105,3 +105,32 @@ def test_get_antecessor_executable_line():
         AntecessorFindingResult.function,
         "some_function",
     )
+
+
+def test_overlapping_statements_first_one_wins():
+    sfsa = SingleFileSnapshotAnalyzer(
+        "filepath",
+        {
+            "functions": [
+                {"identifier": "outer", "start_line": 1, "end_line": 20},
+                {"identifier": "inner", "start_line": 5, "end_line": 8},
+                {"identifier": "outer", "start_line": 30, "end_line": 40},
+            ],
+            "statements": [
+                (10, {"len": 0, "extra_connected_lines": [3]}),
+                (2, {"len": 4, "extra_connected_lines": []}),
+                (5, {"len": 3, "extra_connected_lines": []}),
+            ],
+        },
+    )
+    assert sfsa.get_corresponding_executable_line(3) == 10
+    assert sfsa.get_corresponding_executable_line(6) == 2
+    assert sfsa.get_corresponding_executable_line(8) == 5
+    assert sfsa.get_corresponding_executable_line(9) is None
+    assert sfsa.get_antecessor_executable_line(6, lines_to_not_consider=[6]) == (
+        AntecessorFindingResult.function,
+        "outer",
+    )
+    assert sfsa.find_function_by_identifier("outer")["start_line"] == 1
+    assert sfsa.find_function_by_identifier("inner")["start_line"] == 5
+    assert sfsa.find_function_by_identifier("missing") is None
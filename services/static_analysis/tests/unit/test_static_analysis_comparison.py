@@ -8,6 +8,7 @@ from database.tests.factories.staticanalysis import (
     StaticAnalysisSuiteFactory,
     StaticAnalysisSuiteFilepathFactory,
 )
+from services.archive import ArchiveService
 from services.static_analysis import (
     SingleFileSnapshotAnalyzer,
     StaticAnalysisComparisonService,
@@ -124,6 +125,39 @@ class TestStaticAnalysisComparisonService(object):
         assert res._analysis_file_data == {"statements": [[1, {"ha": "pokemon"}]]}
         assert res._statement_mapping == {1: {"ha": "pokemon"}}
 
+    def test_preload_snapshots(self, sample_service, mock_storage, mocker):
+        for location in ["first_location", "second_location"]:
+            mock_storage.write_file(
+                "archive",
+                location,
+                json.dumps({"statements": [(1, {"len": 0})]}),
+            )
+        read_file = mocker.spy(ArchiveService, "read_file")
+        sample_service._preload_snapshots(
+            [
+                ("first.py", "first_location"),
+                ("second.py", "second_location"),
+                ("other.py", "first_location"),
+                ("missing.py", "missing_location"),
+                ("new.py", None),
+            ]
+        )
+        assert read_file.call_count == 3
+        first = sample_service._load_snapshot_data("first.py", "first_location")
+        assert first._filepath == "first.py"
+        assert first._analysis_file_data == {"statements": [[1, {"len": 0}]]}
+        assert (
+            sample_service._load_snapshot_data("second.py", "second_location")
+            is sample_service._loaded_snapshots["second_location"]
+        )
+        assert (
+            sample_service._load_snapshot_data("missing.py", "missing_location") is None
+        )
+        assert read_file.call_count == 3
+        # nothing left to load
+        sample_service._preload_snapshots([("first.py", "first_location")])
+        assert read_file.call_count == 3
+
     def test_get_base_lines_relevant_to_change_deleted_plus_changed_normal(
         self, dbsession, mock_storage
     ):
@@ -125,3 +125,38 @@ def test_from_random_cases(input, expected):
     )
     s = normalizer_class.normalize_failure_message(test_message)
     assert s == expected
+
+
+def test_replaces_the_match_itself():
+    # "12" shows up first inside a word, where NO doesn't match it
+    f = FailureNormalizer(dict(), override_predefined=True)
+    assert f.normalize_failure_message("a12b 12") == "a12b NO"
+
+
+def test_normalized_messages_are_cached():
+    f = FailureNormalizer(dict(), cache_size=2)
+    assert f.normalize_failure_message("error at 0x1234") == "error at HEXNUMBER"
+    assert f.normalize_failure_message("error at 0x1234") == "error at HEXNUMBER"
+    assert f._cached_normalize.cache_info().hits == 1
+    f.normalize_failure_message("other error 1")
+    f.normalize_failure_message("another error 2")
+    f.normalize_failure_message("error at 0x1234")
+    assert f._cached_normalize.cache_info().misses == 4
+    assert f._cached_normalize.cache_info().currsize == 2
+
+
+junit_failure = """java.lang.AssertionError: expected:<200> but was:<500>
+	at org.junit.Assert.fail(Assert.java:89)
+	at org.junit.Assert.failNotEquals(Assert.java:835)
+	at com.example.api.OrderControllerTest.createOrder(OrderControllerTest.java:142)
+	at java.base/jdk.internal.reflect.NativeMethodAccessorImpl.invoke0(Native Method)
+Request 7f3e2a10-5b1c-4d2e-9f8a-1234567890ab failed at 2024-03-12T15:52:15Z"""
+
+
+def test_long_stack_trace():
+    f = FailureNormalizer(dict())
+    message = "\n".join([junit_failure] * 500)
+    normalized = f.normalize_failure_message(message)
+    assert normalized == "\n".join([f.normalize_failure_message(junit_failure)] * 500)
+    assert "7f3e2a10-5b1c-4d2e-9f8a-1234567890ab" not in normalized
+    assert "UUID" in normalized and "DATETIME" in normalized
@@ -1,11 +1,17 @@
+from datetime import datetime, timedelta
 from uuid import uuid4
 
 from test_results_parser import Outcome
 
 from database.models.core import Repository
-from database.models.reports import Test, TestInstance
+from database.models.reports import Test, TestInstance, Upload
 from database.tests.factories import CommitFactory, ReportFactory, UploadFactory
-from services.flake_detection import FlakeDetector, FlakeType
+from services.flake_detection import (
+    FlakeDetector,
+    FlakeState,
+    FlakeStateStore,
+    FlakeType,
+)
 from services.test_results import generate_test_id
 
 
@@ -190,3 +196,81 @@ def test_flake_matching_failures_on_related_branches(dbsession):
     flaky_tests = fd.detect_flakes()
 
     assert flaky_tests == dict()
+
+
+class FakeRedis(object):
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+def test_flake_detector_incremental(dbsession):
+    repoid = create_repo(dbsession)
+    state_store = FlakeStateStore(FakeRedis(), repoid)
+
+    commitid = create_commit(dbsession, repoid, "main")
+    reportid = create_report(dbsession, commitid)
+    uploadid = create_upload(dbsession, reportid)
+    flaky_test_id = create_test(dbsession, repoid)
+    create_test_instance(
+        dbsession, flaky_test_id, uploadid, str(Outcome.Failure), "failure message"
+    )
+    other_test_id = create_test(dbsession, repoid)
+    create_test_instance(dbsession, other_test_id, uploadid, str(Outcome.Pass), None)
+    dbsession.query(Upload).filter(Upload.id_ == uploadid).update(
+        {Upload.created_at: datetime.now() - timedelta(days=1)}
+    )
+    dbsession.flush()
+
+    fd = FlakeDetector(dbsession, repoid)
+    assert fd.detect_flakes_incrementally(dbsession, state_store) == {
+        flaky_test_id: FlakeType.FAILED_IN_DEFAULT_BRANCH
+    }
+    assert fd.evaluated_tests == {flaky_test_id, other_test_id}
+
+    # only the test that ran again gets looked at, the flake found before stays
+    commitid2 = create_commit(dbsession, repoid, "not_main")
+    reportid2 = create_report(dbsession, commitid2)
+    uploadid2 = create_upload(dbsession, reportid2)
+    create_test_instance(dbsession, other_test_id, uploadid2, str(Outcome.Pass), None)
+    dbsession.query(Upload).filter(Upload.id_ == uploadid2).update(
+        {Upload.created_at: datetime.now() + timedelta(minutes=1)}
+    )
+    dbsession.flush()
+
+    fd = FlakeDetector(dbsession, repoid)
+    assert fd.detect_flakes_incrementally(dbsession, state_store) == {
+        flaky_test_id: FlakeType.FAILED_IN_DEFAULT_BRANCH
+    }
+    assert fd.evaluated_tests == {other_test_id}
+
+
+def test_flake_state_store_forgets_old_flakes(dbsession):
+    repoid = create_repo(dbsession)
+    state_store = FlakeStateStore(FakeRedis(), repoid)
+    state_store.save(
+        datetime.now() - timedelta(days=1),
+        {
+            "old_flake": FlakeState(
+                flake_type=FlakeType.CONSECUTIVE_DIFF_OUTCOMES,
+                last_instance_at=datetime.now() - timedelta(days=40),
+            ),
+            "recent_flake": FlakeState(
+                flake_type=FlakeType.UNRELATED_MATCHING_FAILURES,
+                last_instance_at=datetime.now() - timedelta(days=2),
+            ),
+        },
+    )
+
+    fd = FlakeDetector(dbsession, repoid)
+    assert fd.detect_flakes_incrementally(dbsession, state_store) == {
+        "recent_flake": FlakeType.UNRELATED_MATCHING_FAILURES
+    }
+    last_run, flakes = state_store.load()
+    assert list(flakes) == ["recent_flake"]
+    assert last_run > datetime.now() - timedelta(minutes=5)
@@ -4,7 +4,16 @@ from test_utils.base import BaseTestCase
 
 class TestRedis(BaseTestCase):
     def test_get_redis_connection(self, mocker, mock_configuration):
+        mocker.patch.dict("services.redis._redis_instances", clear=True)
         mocked = mocker.patch("services.redis.Redis.from_url")
         res = get_redis_connection()
         assert res is not None
-        mocked.assert_called_with("redis://redis:@localhost:6379/")
+        mocked.assert_called_with(
+            "redis://redis:@localhost:6379/", health_check_interval=30
+        )
+
+    def test_get_redis_connection_is_shared(self, mocker, mock_configuration):
+        mocker.patch.dict("services.redis._redis_instances", clear=True)
+        mocked = mocker.patch("services.redis.Redis.from_url")
+        assert get_redis_connection() is get_redis_connection()
+        assert mocked.call_count == 1
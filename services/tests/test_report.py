@@ -7,10 +7,12 @@ import mock
 import pytest
 from celery.exceptions import SoftTimeLimitExceeded
 from shared.reports.enums import UploadState
+from shared.reports.readonly import ReadOnlyReport
 from shared.reports.resources import Report, ReportFile, Session, SessionType
 from shared.reports.types import ReportLine, ReportTotals, SessionTotalsArray
 from shared.torngit.exceptions import TorngitRateLimitError
 from shared.yaml import UserYaml
+from sqlalchemy import event
 
 from database.models import CommitReport, ReportDetails, RepositoryFlag, Upload
 from database.tests.factories import (
@@ -4770,6 +4772,111 @@ class TestReportService(BaseTestCase):
         assert res == current_report_row
         assert not mocker_save_full_report.called
 
+    def test_get_existing_report_for_commit_cached(
+        self, dbsession, mocker, mock_configuration, sample_commit_with_report_big
+    ):
+        mock_configuration.params["setup"]["report_chunks_cache"] = {"max_bytes": 0}
+        commit = sample_commit_with_report_big
+        read_chunks = mocker.spy(ArchiveService, "read_chunks")
+        report_service = ReportService({}, cache_reports=True)
+        report = report_service.get_existing_report_for_commit(
+            commit, report_class=ReadOnlyReport
+        )
+        assert report is not None
+        assert (
+            report_service.get_existing_report_for_commit(
+                commit, report_class=ReadOnlyReport
+            )
+            is report
+        )
+        assert read_chunks.call_count == 1
+        # without the cache every call reads the report again
+        uncached_service = ReportService({})
+        uncached_service.get_existing_report_for_commit(commit)
+        uncached_service.get_existing_report_for_commit(commit)
+        assert read_chunks.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_prefetch_chunks(
+        self, dbsession, mocker, mock_configuration, sample_commit_with_report_big
+    ):
+        mock_configuration.params["setup"]["report_chunks_cache"] = {"max_bytes": 0}
+        commit = sample_commit_with_report_big
+        expected = ReportService({}).get_existing_report_for_commit(commit)
+        report_service = ReportService({})
+        await report_service.prefetch_chunks(commit)
+        read_chunks = mocker.spy(ArchiveService, "read_chunks")
+        report = report_service.get_existing_report_for_commit(commit)
+        assert not read_chunks.called
+        assert report.totals == expected.totals
+        assert report.files == expected.files
+        # prefetched chunks are only used once
+        report_service.get_existing_report_for_commit(commit)
+        assert read_chunks.call_count == 1
+
+    def test_get_existing_report_for_commit_chunks_cache(
+        self,
+        dbsession,
+        mocker,
+        mock_storage,
+        mock_configuration,
+        sample_commit_with_report_big,
+    ):
+        mock_configuration.params["setup"]["report_chunks_cache"] = {
+            "max_bytes": 1024 * 1024
+        }
+        commit = sample_commit_with_report_big
+        read_chunks = mocker.spy(ArchiveService, "read_chunks")
+        first_report = ReportService(
+            {}, use_chunks_cache=True
+        ).get_existing_report_for_commit(commit, report_class=ReadOnlyReport)
+        second_report = ReportService(
+            {}, use_chunks_cache=True
+        ).get_existing_report_for_commit(commit, report_class=ReadOnlyReport)
+        assert read_chunks.call_count == 1
+        # every caller gets its own report
+        assert first_report is not second_report
+        assert first_report.totals == second_report.totals
+        # services that save reports always read them from storage
+        report_service = ReportService({})
+        report = report_service.get_existing_report_for_commit(commit)
+        assert read_chunks.call_count == 2
+        # saving the report invalidates the cached chunks
+        report_service.save_report(commit, report)
+        ReportService({}, use_chunks_cache=True).get_existing_report_for_commit(commit)
+        assert read_chunks.call_count == 3
+
+    def test_get_existing_report_for_commit_chunks_cache_off_by_default(
+        self, dbsession, mocker, mock_storage, sample_commit_with_report_big
+    ):
+        commit = sample_commit_with_report_big
+        read_chunks = mocker.spy(ArchiveService, "read_chunks")
+        report_service = ReportService({}, use_chunks_cache=True)
+        report_service.get_existing_report_for_commit(commit)
+        report_service.get_existing_report_for_commit(commit)
+        assert read_chunks.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_prefetch_chunks_not_in_storage(self, dbsession, mock_storage):
+        commit = CommitFactory.create()
+        dbsession.add(commit)
+        dbsession.flush()
+        report_service = ReportService({})
+        await report_service.prefetch_chunks(commit)
+        assert report_service._prefetched_chunks == {}
+
+    @pytest.mark.asyncio
+    async def test_prefetch_chunks_storage_error(
+        self, dbsession, mocker, mock_storage, sample_commit_with_report_big
+    ):
+        commit = sample_commit_with_report_big
+        mocker.patch.object(
+            ArchiveService, "read_chunks", side_effect=Exception("storage is down")
+        )
+        report_service = ReportService({})
+        await report_service.prefetch_chunks(commit)
+        assert report_service._prefetched_chunks == {}
+
     def test_create_report_upload(self, dbsession):
         arguments = {
             "branch": "master",
@@ -4828,6 +4935,82 @@ class TestReportService(BaseTestCase):
         assert first_flag.flag_name == "unittest"
         assert first_flag.repository_id == commit.repoid
 
+    def test_uploads_may_overwrite_carriedforward_sessions(self, dbsession):
+        commit = CommitFactory.create()
+        dbsession.add(commit)
+        dbsession.flush()
+        report = CommitReport(commit_id=commit.id_)
+        dbsession.add(report)
+        dbsession.flush()
+        unit_flag = RepositoryFlagFactory(
+            repository=commit.repository, flag_name="unit"
+        )
+        integration_flag = RepositoryFlagFactory(
+            repository=commit.repository, flag_name="integration"
+        )
+        dbsession.add(unit_flag)
+        dbsession.add(integration_flag)
+        unit_upload = UploadFactory(report=report, flags=[unit_flag])
+        integration_upload = UploadFactory(report=report, flags=[integration_flag])
+        no_flags_upload = UploadFactory(report=report, flags=[])
+        dbsession.add_all([unit_upload, integration_upload, no_flags_upload])
+        dbsession.flush()
+        report_service = ReportService(
+            UserYaml({"flags": {"unit": {"carryforward": True}}})
+        )
+        assert report_service.uploads_may_overwrite_carriedforward_sessions(
+            [no_flags_upload, unit_upload]
+        )
+        assert not report_service.uploads_may_overwrite_carriedforward_sessions(
+            [no_flags_upload, integration_upload]
+        )
+        assert not report_service.uploads_may_overwrite_carriedforward_sessions([])
+
+    def test_build_sessions_query_count(self, dbsession):
+        def count_build_sessions_queries(number_uploads):
+            commit = CommitFactory.create()
+            dbsession.add(commit)
+            dbsession.flush()
+            report = CommitReport(commit_id=commit.id_)
+            dbsession.add(report)
+            dbsession.flush()
+            flags = [
+                RepositoryFlagFactory(repository=commit.repository, flag_name=name)
+                for name in ("unit", "integration")
+            ]
+            dbsession.add_all(flags)
+            for order_number in range(number_uploads):
+                upload = UploadFactory(
+                    report=report,
+                    flags=flags,
+                    order_number=order_number,
+                    state="processed",
+                    upload_type="uploaded",
+                )
+                dbsession.add(upload)
+                dbsession.add(UploadLevelTotalsFactory(upload=upload, files=1))
+            dbsession.flush()
+            dbsession.expire_all()
+
+            statements = []
+
+            def count_statement(*args, **kwargs):
+                statements.append(args[2])
+
+            connection = dbsession.connection()
+            event.listen(connection, "before_cursor_execute", count_statement)
+            try:
+                sessions = ReportService({}).build_sessions(commit)
+            finally:
+                event.remove(connection, "before_cursor_execute", count_statement)
+            assert len(sessions) == number_uploads
+            for session in sessions.values():
+                assert sorted(session.flags) == ["integration", "unit"]
+                assert session.totals.files == 1
+            return len(statements)
+
+        assert count_build_sessions_queries(2) == count_build_sessions_queries(50)
+
     def test_update_upload_with_processing_result_error(self, mocker, dbsession):
         upload_obj = UploadFactory.create(state="started", storage_path="url")
         dbsession.add(upload_obj)
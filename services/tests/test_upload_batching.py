@@ -0,0 +1,65 @@
+from services.upload_batching import (
+    UploadBatchingConfig,
+    get_upload_batching_config,
+    plan_upload_batches,
+)
+
+MB = 1024 * 1024
+
+
+def _plan(sizes, config=None):
+    argument_list = [{"url": f"url{i}"} for i in range(len(sizes))]
+    return plan_upload_batches(
+        argument_list, sizes, config=config or UploadBatchingConfig()
+    )
+
+
+class TestPlanUploadBatches(object):
+    def test_unknown_sizes_batched_like_before(self):
+        batches = _plan([None] * 8)
+        assert [len(b.arguments_list) for b in batches] == [3, 3, 2]
+        assert [b.unknown_sizes for b in batches] == [3, 3, 2]
+        assert [b.total_bytes for b in batches] == [0, 0, 0]
+
+    def test_small_uploads(self):
+        batches = _plan([2000] * 25)
+        assert [len(b.arguments_list) for b in batches] == [10, 10, 5]
+        assert batches[0].total_bytes == 20000
+        assert [
+            arguments["url"] for b in batches for arguments in b.arguments_list
+        ] == [f"url{i}" for i in range(25)]
+
+    def test_huge_uploads_get_their_own_batch(self):
+        batches = _plan([2000, 400 * MB, 2000, 2000, 400 * MB])
+        assert [[a["url"] for a in b.arguments_list] for b in batches] == [
+            ["url0"],
+            ["url1"],
+            ["url2", "url3"],
+            ["url4"],
+        ]
+        assert batches[1].total_bytes == 400 * MB
+
+    def test_time_budget(self):
+        config = UploadBatchingConfig(
+            task_time_budget=10,
+            seconds_per_upload=1,
+            processing_bytes_per_second=MB,
+            max_batch_size=100,
+        )
+        batches = _plan([4 * MB, 4 * MB, 3 * MB, 2 * MB, None], config=config)
+        assert [len(b.arguments_list) for b in batches] == [2, 2, 1]
+        assert batches[0].estimated_seconds == 10
+        # unknown uploads are estimated at a third of the budget
+        assert round(batches[2].estimated_seconds, 2) == round(10 / 3, 2)
+
+    def test_nothing_to_plan(self):
+        assert _plan([]) == []
+
+    def test_get_upload_batching_config(self, mock_configuration):
+        mock_configuration.params["setup"]["upload_processing"] = {
+            "batching": {"max_batch_size": 4, "task_time_budget": 30, "other": 1}
+        }
+        config = get_upload_batching_config()
+        assert config.max_batch_size == 4
+        assert config.task_time_budget == 30
+        assert config.seconds_per_upload == UploadBatchingConfig.seconds_per_upload
@@ -37,6 +37,20 @@ class TestArchiveService(BaseTestCase):
         result = service.delete_repo_files()
         assert result == 2
 
+    def test_get_file_size(self, mocker):
+        mock_list_folder_contents = mocker.patch.object(
+            MinioStorageService, "list_folder_contents"
+        )
+        mock_list_folder_contents.return_value = [
+            {"name": "path/to/file", "size": 84},
+            {"name": "path/to/file_2", "size": 12},
+        ]
+        repo = RepositoryFactory.create()
+        service = ArchiveService(repo)
+        assert service.get_file_size("path/to/file") == 84
+        assert service.get_file_size("path/to/fil") is None
+        mock_list_folder_contents.assert_called_with("archive", "path/to/fil")
+
 
 class TestWriteJsonData(BaseTestCase):
     def test_write_report_details_to_storage(self, mocker, dbsession):
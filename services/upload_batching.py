@@ -0,0 +1,94 @@
+import logging
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+from shared.config import get_config
+
+log = logging.getLogger(__name__)
+
+# How many uploads went into each processor task before batches were sized adaptively.
+# Uploads whose size is unknown are estimated so that this many of them fill a task
+DEFAULT_BATCH_SIZE = 3
+
+
+@dataclass
+class UploadBatchingConfig(object):
+    # How long a single processor task should take, roughly
+    task_time_budget: float = 60.0
+    # What an upload costs regardless of its size (download, db work, ...)
+    seconds_per_upload: float = 0.5
+    processing_bytes_per_second: float = 5 * 1024 * 1024
+    max_batch_size: int = 10
+
+    @property
+    def unknown_upload_size(self) -> int:
+        seconds = self.task_time_budget / DEFAULT_BATCH_SIZE - self.seconds_per_upload
+        return max(int(seconds * self.processing_bytes_per_second), 0)
+
+    def estimate_seconds(self, size: Optional[int]) -> float:
+        if size is None:
+            size = self.unknown_upload_size
+        return self.seconds_per_upload + size / self.processing_bytes_per_second
+
+
+def get_upload_batching_config() -> UploadBatchingConfig:
+    config = get_config("setup", "upload_processing", "batching", default={})
+    return UploadBatchingConfig(
+        **{
+            key: value
+            for key, value in config.items()
+            if key in UploadBatchingConfig.__dataclass_fields__
+        }
+    )
+
+
+@dataclass
+class UploadBatch(object):
+    arguments_list: List[dict] = field(default_factory=list)
+    total_bytes: int = 0
+    unknown_sizes: int = 0
+    estimated_seconds: float = 0.0
+
+
+def plan_upload_batches(
+    argument_list: Sequence[dict],
+    sizes: Sequence[Optional[int]],
+    config: Optional[UploadBatchingConfig] = None,
+) -> List[UploadBatch]:
+    """Splits the pending uploads of a commit into the batches processor tasks will get
+
+    Uploads are kept in order. A batch is closed once the next upload would take it
+        over the time budget of a task or over `max_batch_size` uploads, so tiny uploads
+        end up in few, large batches and an upload too big for the budget gets a batch
+        of its own.
+
+    Args:
+        argument_list (Sequence[dict]): The arguments of each pending upload
+        sizes (Sequence[Optional[int]]): The size in bytes of each upload, or None
+            if it is not known
+        config (Optional[UploadBatchingConfig]): Defaults to the one from the config
+
+    Returns:
+        List[UploadBatch]: The batches, in the order they should be processed
+    """
+    if config is None:
+        config = get_upload_batching_config()
+    batches: List[UploadBatch] = []
+    current = UploadBatch()
+    for arguments, size in zip(argument_list, sizes):
+        seconds = config.estimate_seconds(size)
+        if current.arguments_list and (
+            len(current.arguments_list) >= config.max_batch_size
+            or current.estimated_seconds + seconds > config.task_time_budget
+        ):
+            batches.append(current)
+            current = UploadBatch()
+        current.arguments_list.append(arguments)
+        current.estimated_seconds += seconds
+        if size is None:
+            current.unknown_sizes += 1
+        else:
+            current.total_bytes += size
+    if current.arguments_list:
+        batches.append(current)
+    return batches
@@ -8,11 +8,13 @@ from shared.helpers.flag import Flag
 from shared.reports.readonly import ReadOnlyReport
 from shared.torngit.exceptions import TorngitRateLimitError
 from shared.yaml import UserYaml
+from sqlalchemy.dialects.postgresql import insert
 
 from app import celery_app
 from database.enums import CompareCommitError, CompareCommitState
 from database.models import CompareCommit, CompareComponent, CompareFlag
-from database.models.reports import ReportLevelTotals, RepositoryFlag
+from database.models.reports import RepositoryFlag
+from helpers.clock import get_utc_now
 from helpers.metrics import metrics
 from services.archive import ArchiveService
 from services.comparison import ComparisonProxy, FilteredComparison
@@ -92,101 +94,100 @@ class ComputeComparisonTask(BaseCodecovTask, name=compute_comparison_task_name):
     def create_or_update_flag_comparisons(
         self,
         db_session,
-        head_report_flags: List[Flag],
+        head_report_flags: Mapping[str, Flag],
         comparison: CompareCommit,
         comparison_proxy: ComparisonProxy,
     ):
         repository_id = comparison.compare_commit.repository.repoid
-        for flag_name, _ in head_report_flags.items():
-            totals = self.get_flag_comparison_totals(flag_name, comparison_proxy)
-            repositoryflag = (
-                db_session.query(RepositoryFlag)
-                .filter_by(
-                    flag_name=flag_name,
-                    repository_id=repository_id,
-                )
-                .first()
-            )
-            if not repositoryflag:
-                log.warning(
-                    "Repository flag not found for flag. Created repository flag.",
-                    extra=dict(repoid=repository_id, flag_name=flag_name),
-                )
-                repositoryflag = RepositoryFlag(
-                    repository_id=repository_id,
-                    flag_name=flag_name,
-                )
-                db_session.add(repositoryflag)
-                db_session.flush()
-
-            flag_comparison_entry = (
-                db_session.query(CompareFlag)
-                .filter_by(
-                    commit_comparison_id=comparison.id,
-                    repositoryflag_id=repositoryflag.id,
-                )
-                .first()
+        repository_flags = self.get_or_create_repository_flags(
+            db_session, repository_id, list(head_report_flags.keys())
+        )
+        base_report_flags = (
+            comparison_proxy.comparison.project_coverage_base.report.flags
+        )
+        diff = async_to_sync(comparison_proxy.get_diff)()
+        flag_comparisons = [
+            dict(
+                commit_comparison_id=comparison.id,
+                repositoryflag_id=repository_flags[flag_name].id,
+                **self.get_flag_comparison_totals(
+                    flag_head_report, base_report_flags.get(flag_name), diff
+                ),
             )
-
-            if not flag_comparison_entry:
-                log.debug(
-                    "No previous flag comparisons; adding flag comparisons",
-                    extra=dict(repoid=repository_id),
-                )
-                self.store_flag_comparison(
-                    db_session, comparison, repositoryflag, totals
-                )
-            else:
-                log.debug(
-                    "Updating totals for existing flag comparison entry",
-                    extra=dict(repoid=repository_id),
-                )
-                flag_comparison_entry.head_totals = totals["head_totals"]
-                flag_comparison_entry.base_totals = totals["base_totals"]
-                flag_comparison_entry.patch_totals = totals["patch_totals"]
+            for flag_name, flag_head_report in head_report_flags.items()
+        ]
+        self.upsert_comparisons(
+            db_session,
+            CompareFlag,
+            flag_comparisons,
+            [CompareFlag.commit_comparison_id, CompareFlag.repositoryflag_id],
+        )
         log.info(
             "Flag comparisons stored successfully",
             extra=dict(number_stored=len(head_report_flags)),
         )
 
-    def get_flag_comparison_totals(
-        self,
-        flag_name: str,
-        comparison_proxy: ComparisonProxy,
-    ):
-        flag_head_report = comparison_proxy.comparison.head.report.flags.get(flag_name)
-        flag_base_report = (
-            comparison_proxy.comparison.project_coverage_base.report.flags.get(
-                flag_name
+    def get_or_create_repository_flags(
+        self, db_session, repository_id: int, flag_names: List[str]
+    ) -> Mapping[str, RepositoryFlag]:
+        repository_flags = {}
+        for repositoryflag in (
+            db_session.query(RepositoryFlag)
+            .filter(
+                RepositoryFlag.repository_id == repository_id,
+                RepositoryFlag.flag_name.in_(flag_names),
             )
-        )
+            .order_by(RepositoryFlag.id_)
+        ):
+            repository_flags.setdefault(repositoryflag.flag_name, repositoryflag)
+        missing_flag_names = [
+            flag_name for flag_name in flag_names if flag_name not in repository_flags
+        ]
+        for flag_name in missing_flag_names:
+            log.warning(
+                "Repository flag not found for flag. Created repository flag.",
+                extra=dict(repoid=repository_id, flag_name=flag_name),
+            )
+            repository_flags[flag_name] = RepositoryFlag(
+                repository_id=repository_id,
+                flag_name=flag_name,
+            )
+            db_session.add(repository_flags[flag_name])
+        if missing_flag_names:
+            db_session.flush()
+        return repository_flags
+
+    def get_flag_comparison_totals(self, flag_head_report, flag_base_report, diff):
         head_totals = None if not flag_head_report else flag_head_report.totals.asdict()
         base_totals = None if not flag_base_report else flag_base_report.totals.asdict()
         totals = dict(
             head_totals=head_totals, base_totals=base_totals, patch_totals=None
         )
-        diff = async_to_sync(comparison_proxy.get_diff)()
         if diff:
             patch_totals = flag_head_report.apply_diff(diff)
             if patch_totals:
                 totals["patch_totals"] = patch_totals.asdict()
         return totals
 
-    def store_flag_comparison(
-        self,
-        db_session,
-        comparison: CompareCommit,
-        repositoryflag: RepositoryFlag,
-        totals: ReportLevelTotals,
-    ):
-        flag_comparison = CompareFlag(
-            commit_comparison=comparison,
-            repositoryflag=repositoryflag,
-            patch_totals=totals["patch_totals"],
-            head_totals=totals["head_totals"],
-            base_totals=totals["base_totals"],
+    def upsert_comparisons(self, db_session, model, values: List[dict], conflict_on):
+        """Writes all the `values` rows of `model` with a single statement
+
+        Rows that already exist for the same `conflict_on` columns get their
+            totals replaced.
+        """
+        if not values:
+            return
+        command = insert(model.__table__).values(values)
+        command = command.on_conflict_do_update(
+            index_elements=conflict_on,
+            set_=dict(
+                head_totals=command.excluded.head_totals,
+                base_totals=command.excluded.base_totals,
+                patch_totals=command.excluded.patch_totals,
+                updated_at=get_utc_now(),
+            ),
         )
-        db_session.add(flag_comparison)
+        db_session.execute(command)
         db_session.flush()
 
     def compute_component_comparisons(
@@ -204,52 +205,45 @@ class ComputeComparisonTask(BaseCodecovTask, name=compute_comparison_task_name):
                 component_count=len(components),
             ),
         )
-        for component in components:
-            self.compute_component_comparison(
-                db_session, comparison, comparison_proxy, component
-            )
-
-    def compute_component_comparison(
-        self,
-        db_session,
-        comparison: CompareCommit,
-        comparison_proxy: ComparisonProxy,
-        component: Component,
-    ):
-        component_comparison = (
-            db_session.query(CompareComponent)
-            .filter_by(
+        if not components:
+            return
+        diff = async_to_sync(comparison_proxy.get_diff)()
+        component_comparisons = [
+            dict(
                 commit_comparison_id=comparison.id,
                 component_id=component.component_id,
+                **self.get_component_comparison_totals(
+                    comparison_proxy, component, diff
+                ),
             )
-            .first()
+            for component in components
+        ]
+        self.upsert_comparisons(
+            db_session,
+            CompareComponent,
+            component_comparisons,
+            [CompareComponent.commit_comparison_id, CompareComponent.component_id],
         )
-        if not component_comparison:
-            component_comparison = CompareComponent(
-                commit_comparison=comparison,
-                component_id=component.component_id,
-            )
 
+    def get_component_comparison_totals(
+        self, comparison_proxy: ComparisonProxy, component: Component, diff
+    ):
         # filter comparison by component
         head_report = comparison_proxy.comparison.head.report
         flags = component.get_matching_flags(head_report.flags.keys())
         filtered: FilteredComparison = comparison_proxy.get_filtered_comparison(
             flags=flags, path_patterns=component.paths
         )
-
-        # component comparison totals
-        component_comparison.base_totals = (
-            filtered.project_coverage_base.report.totals.asdict()
+        totals = dict(
+            base_totals=filtered.project_coverage_base.report.totals.asdict(),
+            head_totals=filtered.head.report.totals.asdict(),
+            patch_totals=None,
         )
-        component_comparison.head_totals = filtered.head.report.totals.asdict()
-        diff = async_to_sync(comparison_proxy.get_diff)()
         if diff:
             patch_totals = filtered.head.report.apply_diff(diff)
             if patch_totals:
-                component_comparison.patch_totals = patch_totals.asdict()
-
-        db_session.add(component_comparison)
-        db_session.flush()
+                totals["patch_totals"] = patch_totals.asdict()
+        return totals
 
     def get_yaml_commit(self, commit):
         return get_repo_yaml(commit.repository)
@@ -257,7 +251,7 @@ class ComputeComparisonTask(BaseCodecovTask, name=compute_comparison_task_name):
     def get_comparison_proxy(self, comparison, current_yaml):
         compare_commit = comparison.compare_commit
         base_commit = comparison.base_commit
-        report_service = ReportService(current_yaml)
+        report_service = ReportService(current_yaml, use_chunks_cache=True)
         base_report = report_service.get_existing_report_for_commit(
             base_commit, report_class=ReadOnlyReport
         )
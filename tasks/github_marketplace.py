@@ -5,6 +5,7 @@ import requests
 from shared.celery_config import ghm_sync_plans_task_name
 
 from app import celery_app
+from celery_task_router import invalidate_user_plan
 from database.models import Owner, Repository
 from services.billing import BillingPlan
 from services.github_marketplace import GitHubMarketplaceService
@@ -206,6 +207,9 @@ class SyncPlansTask(BaseCodecovTask, name=ghm_sync_plans_task_name):
                 # cancel strip subscription
                 stripe.Subscription.delete(owner.stripe_subscription_id)
                 owner.stripe_subscription_id = None
+
+            db_session.commit()
+            invalidate_user_plan(owner.ownerid)
         else:
             # create the user
             user_data = ghm_service.get_user(service_id)
@@ -242,6 +246,8 @@ class SyncPlansTask(BaseCodecovTask, name=ghm_sync_plans_task_name):
             owner.plan_activated_users = None
 
             self.deactivate_repos(db_session, owner.ownerid)
+            db_session.commit()
+            invalidate_user_plan(owner.ownerid)
         else:
             # create the user
             user_data = ghm_service.get_user(service_id)
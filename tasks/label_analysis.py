@@ -14,7 +14,11 @@ from database.models.labelanalysis import (
     LabelAnalysisRequest,
 )
 from database.models.staticanalysis import StaticAnalysisSuite
-from helpers.labels import get_all_report_labels, get_labels_per_session
+from helpers.labels import (
+    get_all_report_labels,
+    get_labels_per_session,
+    get_labels_per_session_index,
+)
 from helpers.metrics import metrics
 from helpers.telemetry import MetricContext
 from services.report import Report, ReportService
@@ -568,8 +572,10 @@ class LabelAnalysisRequestProcessingTask(
                                     or GLOBAL_LEVEL_LABEL in dp_labels
                                 ):
                                     full_sessions.add(datapoint.sessionid)
-        for sess_id in full_sessions:
-            global_level_labels.update(self.get_labels_per_session(report, sess_id))
+        if full_sessions:
+            labels_per_session = get_labels_per_session_index(report)
+            for sess_id in full_sessions:
+                global_level_labels.update(labels_per_session.get(sess_id, set()))
         return (
             labels - set([GLOBAL_LEVEL_LABEL_IDX, GLOBAL_LEVEL_LABEL]),
             global_level_labels,
@@ -1,4 +1,6 @@
+import asyncio
 import logging
+from typing import Optional
 
 from asgiref.sync import async_to_sync
 from celery.exceptions import MaxRetriesExceededError, SoftTimeLimitExceeded
@@ -253,16 +255,20 @@ class NotifyTask(BaseCodecovTask, name=notify_task_name):
                     "notifications": None,
                     "reason": "too_many_retries",
                 }
-        report_service = ReportService(current_yaml)
+        # Notifications only read the reports, so the head report loaded here is
+        # the same one used to notify later
+        report_service = ReportService(
+            current_yaml, cache_reports=True, use_chunks_cache=True
+        )
         head_report = report_service.get_existing_report_for_commit(
             commit, report_class=ReadOnlyReport
         )
         if self.should_send_notifications(
             current_yaml, commit, ci_results, head_report
         ):
-            enriched_pull = async_to_sync(
-                fetch_and_update_pull_request_information_from_commit
-            )(repository_service, commit, current_yaml)
+            enriched_pull = async_to_sync(self.fetch_pull_and_prefetch_base_report)(
+                repository_service, commit, current_yaml, report_service
+            )
             if enriched_pull and enriched_pull.database_pull:
                 pull = enriched_pull.database_pull
                 base_commit = self.fetch_pull_request_base(pull)
@@ -449,6 +455,44 @@ class NotifyTask(BaseCodecovTask, name=notify_task_name):
                 return False
         return True
 
+    async def fetch_pull_and_prefetch_base_report(
+        self,
+        repository_service,
+        commit: Commit,
+        current_yaml: UserYaml,
+        report_service: ReportService,
+    ) -> Optional[EnrichedPull]:
+        """Fetches the pull of `commit` from the provider while the chunks of the
+        report it will most likely be compared against are read from storage
+
+        The base is guessed from what we know of the pull before updating it.
+            If the pull turns out to have a different base, that report is read as usual.
+        """
+        likely_base_commit = self.fetch_likely_base_commit(commit)
+        if likely_base_commit is None:
+            return await fetch_and_update_pull_request_information_from_commit(
+                repository_service, commit, current_yaml
+            )
+        enriched_pull, _ = await asyncio.gather(
+            fetch_and_update_pull_request_information_from_commit(
+                repository_service, commit, current_yaml
+            ),
+            report_service.prefetch_chunks(likely_base_commit),
+        )
+        return enriched_pull
+
+    def fetch_likely_base_commit(self, commit: Commit) -> Optional[Commit]:
+        if commit.pullid is not None:
+            db_session = commit.get_db_session()
+            pull = (
+                db_session.query(Pull)
+                .filter_by(repoid=commit.repoid, pullid=commit.pullid)
+                .first()
+            )
+            if pull is not None:
+                return self.fetch_pull_request_base(pull)
+        return self.fetch_parent(commit)
+
     def fetch_pull_request_base(self, pull: Pull) -> Commit:
         return pull.get_comparedto_commit()
 
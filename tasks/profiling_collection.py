@@ -2,7 +2,7 @@ import json
 import logging
 from collections import Counter, defaultdict
 from datetime import datetime, timedelta
-from typing import Dict, Sequence, Tuple
+from typing import Dict, List, Sequence, Tuple
 
 from redis.exceptions import LockError
 from shared.celery_config import profiling_collection_task_name
@@ -130,9 +130,18 @@ class ProfilingCollectionTask(BaseCodecovTask, name=profiling_collection_task_na
     def merge_into(
         self, archive_service, existing_results, new_profiling_uploads_to_join
     ):
+        """Folds the execution counts of the new uploads into `existing_results`
+
+        Only the groups and files the new uploads touch are rewritten, and their
+            lines are only re-sorted when the uploads bring lines that weren't
+            there before. The top-level `files` list (the sum of all groups) is
+            updated with the same deltas instead of being recomputed from every
+            group.
+        """
         if "groups" not in existing_results:
             existing_results["groups"] = []
         counters = defaultdict(lambda: defaultdict(Counter))
+        file_deltas = defaultdict(Counter)
         group_appearance_counter = Counter()
         for upload in new_profiling_uploads_to_join:
             try:
@@ -150,12 +159,15 @@ class ProfilingCollectionTask(BaseCodecovTask, name=profiling_collection_task_na
                     group_appearance_counter[group_name] += 1
                     for single_file in run["execs"]:
                         filename = single_file["filename"]
+                        group_file_counter = counters[group_name][filename]
+                        file_delta = file_deltas[filename]
                         for ln, ln_ct in (
                             single_file["lines"].items()
                             if isinstance(single_file["lines"], dict)
                             else single_file["lines"]
                         ):
-                            counters[group_name][filename][int(ln)] += ln_ct
+                            group_file_counter[int(ln)] += ln_ct
+                            file_delta[int(ln)] += ln_ct
         with metrics.timer("worker.internal.task.merge_into"):
             group_mapping = {
                 data["group_name"]: data for data in existing_results["groups"]
@@ -167,33 +179,42 @@ class ProfilingCollectionTask(BaseCodecovTask, name=profiling_collection_task_na
                     group_dict = {"group_name": group_name, "files": [], "count": 0}
                     existing_results["groups"].append(group_dict)
                 group_dict["count"] += group_appearance_counter[group_name]
-                file_mapping = {data["filename"]: data for data in group_dict["files"]}
-                for filename, file_counter in group_counter.items():
-                    if filename in file_mapping:
-                        file_dict = file_mapping[filename]
-                    else:
-                        file_dict = {"filename": filename, "ln_ex_ct": []}
-                        group_dict["files"].append(file_dict)
-                    for ln, ln_ct in file_dict["ln_ex_ct"]:
-                        file_counter[ln] += ln_ct
-                    file_dict["ln_ex_ct"] = [
-                        (a, b) for (a, b) in sorted(file_counter.items())
-                    ]
+                self._merge_file_counters(group_dict["files"], group_counter)
             # temporary compatibility step while we decide what the summarization
             # will use as source of data
-            file_counter = defaultdict(Counter)
-            for group in existing_results["groups"]:
-                for file in group["files"]:
-                    filename = file["filename"]
-                    for a, b in file["ln_ex_ct"]:
-                        file_counter[filename][a] += b
-            existing_results["files"] = [
-                {
-                    "filename": filename,
-                    "ln_ex_ct": [(a, b) for (a, b) in sorted(file_dict.items())],
-                }
-                for filename, file_dict in file_counter.items()
-            ]
+            if "files" in existing_results:
+                self._merge_file_counters(existing_results["files"], file_deltas)
+            else:
+                # results from before the `files` list existed
+                file_counter = defaultdict(Counter)
+                for group in existing_results["groups"]:
+                    for file in group["files"]:
+                        for a, b in file["ln_ex_ct"]:
+                            file_counter[file["filename"]][a] += b
+                existing_results["files"] = []
+                self._merge_file_counters(existing_results["files"], file_counter)
+
+    def _merge_file_counters(self, files: List[Dict], file_counters: Dict) -> None:
+        file_mapping = {data["filename"]: data for data in files}
+        for filename, file_counter in file_counters.items():
+            if filename not in file_mapping:
+                files.append(
+                    {
+                        "filename": filename,
+                        "ln_ex_ct": [(a, b) for (a, b) in sorted(file_counter.items())],
+                    }
+                )
+                continue
+            file_dict = file_mapping[filename]
+            merged = dict(file_dict["ln_ex_ct"])
+            number_existing_lines = len(merged)
+            for ln, ln_ct in file_counter.items():
+                merged[ln] = merged.get(ln, 0) + ln_ct
+            if len(merged) == number_existing_lines:
+                # no new lines, so the existing order still holds
+                file_dict["ln_ex_ct"] = list(merged.items())
+            else:
+                file_dict["ln_ex_ct"] = sorted(merged.items())
 
     def store_results(self, profiling, joined_execution_counts) -> str:
         archive_service = ArchiveService(profiling.repository)
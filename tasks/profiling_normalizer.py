@@ -1,17 +1,20 @@
-import dataclasses
 import json
 import logging
+from array import array
 from base64 import b64decode
 from io import BytesIO
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
+from billiard import Pool
 from shared.celery_config import profiling_normalization_task_name
+from shared.config import get_config
 from shared.storage.exceptions import FileNotInStorageError
 from sqlalchemy.orm.session import Session
 
 from app import celery_app
 from database.models.profiling import ProfilingUpload
 from helpers.clock import get_utc_now
+from helpers.metrics import metrics
 from services.archive import ArchiveService
 from services.path_fixer import PathFixer
 from services.report.parser.types import ParsedUploadedReportFile
@@ -22,6 +25,93 @@ from tasks.base import BaseCodecovTask
 
 log = logging.getLogger(__name__)
 
+# The coverage of a span: for each file, its executable lines, and the lines that were
+# hit along with how many times. Kept in arrays, so they are cheap to send back
+# from the pool processes
+SpanCoverage = List[Tuple[str, array, array, array]]
+
+
+def get_profiling_normalizer_pool_size() -> int:
+    """How many processes can be used to process the spans of a single profiling upload.
+    Anything below 2 means spans are processed serially, in the current process.
+    """
+    return get_config("setup", "profiling", "normalizer_pool_size", default=0)
+
+
+def _extract_span_coverage(
+    coverage: str, current_yaml, path_fixer: PathFixer
+) -> SpanCoverage:
+    report_file_upload = ParsedUploadedReportFile(
+        filename=None,
+        file_contents=BytesIO(b64decode(coverage)),
+    )
+    report = process_report(
+        report_file_upload,
+        report_builder=ReportBuilder(current_yaml, 1, {}, path_fixer),
+    )
+    if report is None:
+        return []
+    span_coverage = []
+    for filename in report.files:
+        executable_lines = array("l")
+        hit_lines = array("l")
+        hit_counts = array("l")
+        for line_number, line in report.get(filename).lines:
+            coverage = line.coverage
+            # TODO: Make this next lines more resilient
+            line_count = (
+                coverage if coverage and isinstance(coverage, int) else int(coverage)
+            )
+            executable_lines.append(line_number)
+            if line_count > 0:
+                hit_lines.append(line_number)
+                hit_counts.append(line_count)
+        span_coverage.append((filename, executable_lines, hit_lines, hit_counts))
+    return span_coverage
+
+
+def _extract_spans_coverage(
+    normalizer_args: tuple, coverages: List[str]
+) -> List[SpanCoverage]:
+    return [
+        _extract_span_coverage(coverage, *normalizer_args) for coverage in coverages
+    ]
+
+
+# The pool of processes of this worker process, created the first time an upload
+# needs it and kept for the next uploads
+_normalizer_pool: Optional[Pool] = None
+
+
+def get_normalizer_pool() -> Pool:
+    """Returns the pool of processes the spans are processed in
+
+    It is a billiard pool because multiprocessing refuses to start processes from a
+        daemonic one, which is what celery's prefork workers are.
+    """
+    global _normalizer_pool
+    if _normalizer_pool is None:
+        _normalizer_pool = Pool(processes=get_profiling_normalizer_pool_size())
+    return _normalizer_pool
+
+
+def _extract_spans_coverage_in_pool(
+    normalizer_args: tuple, coverages: List[str], pool_size: int
+) -> List[SpanCoverage]:
+    """Splits `coverages` in a few slices per pool process, so the arguments shared
+    by all spans are only sent once per slice. The results keep the order of `coverages`
+    """
+    slice_size = -(-len(coverages) // (pool_size * 4))
+    slices = [
+        coverages[start : start + slice_size]
+        for start in range(0, len(coverages), slice_size)
+    ]
+    results = get_normalizer_pool().starmap(
+        _extract_spans_coverage,
+        [(normalizer_args, coverages_slice) for coverages_slice in slices],
+    )
+    return [span_coverage for result in results for span_coverage in result]
+
 
 class ProfilingNormalizerTask(BaseCodecovTask, name=profiling_normalization_task_name):
     def run_impl(self, db_session: Session, *, profiling_upload_id: int, **kwargs):
@@ -101,45 +191,55 @@ class ProfilingNormalizerTask(BaseCodecovTask, name=profiling_normalization_task
         Returns:
             Dict: Description
         """
-        runs = []
-        number_spans = 0
-        files_dict = {}
-        for element in data["spans"]:
-            if "codecov" in element and "coverage" in element["codecov"]:
-                number_spans += 1
-                report_file_upload = ParsedUploadedReportFile(
-                    filename=None,
-                    file_contents=BytesIO(b64decode(element["codecov"]["coverage"])),
-                )
-                path_fixer = PathFixer.init_from_user_yaml(
-                    current_yaml,
-                    [],
-                    [],
-                    extra_fixes=current_yaml.read_yaml_field("profiling", "fixes")
-                    or [],
-                )
-                report = process_report(
-                    report_file_upload,
-                    report_builder=ReportBuilder(current_yaml, 1, {}, path_fixer),
+        relevant_attributes = sorted(
+            current_yaml.get("profiling", {}).get("grouping_attributes", [])
+        )
+        spans = [
+            element
+            for element in data["spans"]
+            if "codecov" in element and "coverage" in element["codecov"]
+        ]
+        # The path fixer only depends on the yaml, so all spans share it
+        path_fixer = PathFixer.init_from_user_yaml(
+            current_yaml,
+            [],
+            [],
+            extra_fixes=current_yaml.read_yaml_field("profiling", "fixes") or [],
+        )
+        coverages = [element["codecov"]["coverage"] for element in spans]
+        normalizer_args = (current_yaml, path_fixer)
+        pool_size = min(get_profiling_normalizer_pool_size(), len(spans))
+        with metrics.timer("worker.tasks.profiling_normalizer.extract_spans"):
+            if pool_size > 1:
+                spans_coverage = _extract_spans_coverage_in_pool(
+                    normalizer_args, coverages, pool_size
                 )
-                runs.append(
-                    self._extract_report_into_dict(
-                        current_yaml,
-                        report,
-                        element["span"] if "span" in element else element,
-                        files_dict,
-                    )
+            else:
+                spans_coverage = _extract_spans_coverage(normalizer_args, coverages)
+        runs = []
+        executable_lines_per_file: Dict[str, set] = {}
+        for element, span_coverage in zip(spans, spans_coverage):
+            runs.append(
+                self._span_coverage_into_dict(
+                    relevant_attributes,
+                    span_coverage,
+                    element["span"] if "span" in element else element,
+                    executable_lines_per_file,
                 )
-        for name in files_dict:
-            files_dict[name]["executable_lines"] = sorted(
-                files_dict[name]["executable_lines"]
             )
+        files_dict = {
+            name: {"executable_lines": sorted(executable_lines)}
+            for name, executable_lines in executable_lines_per_file.items()
+        }
         return {"runs": runs, "files": files_dict}
 
-    def _extract_report_into_dict(self, current_yaml, report, element, files_dict):
-        relevant_attributes = sorted(
-            current_yaml.get("profiling", {}).get("grouping_attributes", [])
-        )
+    def _span_coverage_into_dict(
+        self,
+        relevant_attributes: List[str],
+        span_coverage: SpanCoverage,
+        element: Dict,
+        executable_lines_per_file: Dict[str, set],
+    ) -> Dict:
         into_dict = {
             "grouping_attributes": [
                 (key, element["attributes"].get(key)) for key in relevant_attributes
@@ -147,29 +247,13 @@ class ProfilingNormalizerTask(BaseCodecovTask, name=profiling_normalization_task
             "group": element["name"],
             "execs": [],
         }
-        for filename in report.files:
-            file_dict = files_dict.setdefault(filename, {"executable_lines": set()})
-            file_report = report.get(filename)
-            into_file_dict = {"filename": filename, "lines": []}
-            into_dict["execs"].append(into_file_dict)
-            for line_number, line in file_report.lines:
-                (
-                    coverage,
-                    line_type,
-                    sessions,
-                    messages,
-                    complexity,
-                    datapoints,
-                ) = dataclasses.astuple(line)
-                # TODO: Make this next lines more resilient
-                line_count = (
-                    coverage
-                    if coverage and isinstance(coverage, int)
-                    else int(coverage)
-                )
-                file_dict["executable_lines"].add(line_number)
-                if line_count > 0:
-                    into_file_dict["lines"].append((line_number, line_count))
+        for filename, executable_lines, hit_lines, hit_counts in span_coverage:
+            executable_lines_per_file.setdefault(filename, set()).update(
+                executable_lines
+            )
+            into_dict["execs"].append(
+                {"filename": filename, "lines": list(zip(hit_lines, hit_counts))}
+            )
         return into_dict
 
     def store_normalization_results(self, profiling: ProfilingUpload, results):
@@ -54,16 +54,11 @@ class ProfilingSummarizationTask(
         avg_executions_map = {}
         for file_dict in totalized_execution_counts["files"]:
             filename = file_dict["filename"]
-            file_count_so_far = 0
-            max_lines_so_far = 0
-            present_lines = 0
-            for l_number, ex_count in file_dict["ln_ex_ct"]:
-                present_lines += 1
-                file_count_so_far += ex_count
-                max_lines_so_far = max(max_lines_so_far, ex_count)
-            line_executions_map[filename] = file_count_so_far
-            max_executions_map[filename] = max_lines_so_far
-            avg_executions_map[filename] = file_count_so_far / present_lines
+            execution_counts = [ex_count for _, ex_count in file_dict["ln_ex_ct"]]
+            file_count = sum(execution_counts)
+            line_executions_map[filename] = file_count
+            max_executions_map[filename] = max(execution_counts, default=0)
+            avg_executions_map[filename] = file_count / len(execution_counts)
         return {
             "version": "v1",
             "general": {"total_profiled_files": len(line_executions_map.keys())},
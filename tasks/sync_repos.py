@@ -1,6 +1,6 @@
 import logging
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from asgiref.sync import async_to_sync
 from celery.exceptions import SoftTimeLimitExceeded
@@ -14,6 +14,7 @@ from shared.config import get_config
 from shared.metrics import metrics
 from shared.torngit.exceptions import TorngitClientError
 from sqlalchemy import and_
+from sqlalchemy.dialects.postgresql import insert
 
 from app import celery_app
 from database.models import Owner, Repository
@@ -25,6 +26,8 @@ from tasks.base import BaseCodecovTask
 log = logging.getLogger(__name__)
 metrics_scope = "worker.SyncReposTask"
 
+SYNC_REPOS_PAGE_SIZE = 500
+
 
 class SyncReposTask(BaseCodecovTask, name=sync_repos_task_name):
     """This task syncs the repos for a user in the same way as the legacy "refresh" task.
@@ -302,57 +305,65 @@ class SyncReposTask(BaseCodecovTask, name=sync_repos_task_name):
         # We're testing processing repos a page at a time and this helper
         # function avoids duplicating the code in the old and new paths
         def process_repos(repos):
+            repos = list(repos)
+            for page_start in range(0, len(repos), SYNC_REPOS_PAGE_SIZE):
+                page = repos[page_start : page_start + SYNC_REPOS_PAGE_SIZE]
+                with metrics.timer(f"{metrics_scope}.process_repos_page"):
+                    process_page(page)
+
+        def process_page(repos):
+            # The owners of the repos are only upserted the first time we see
+            # them, but the owners of forks are upserted every time
+            owners_to_upsert = []
             for repo in repos:
-                # Time how long processing a single repo takes so we can estimate how
-                # performance degrades. Sampling at 10% will be enough.
-                with metrics.timer(f"{metrics_scope}.process_each_repo", rate=0.1):
-                    _ownerid = owners_by_id.get(
-                        (
-                            service,
-                            repo["owner"]["service_id"],
-                            repo["owner"]["username"],
-                        )
-                    )
-                    if not _ownerid:
-                        _ownerid = self.upsert_owner(
-                            db_session,
-                            service,
-                            repo["owner"]["service_id"],
-                            repo["owner"]["username"],
-                        )
-                        owners_by_id[
-                            (
-                                service,
-                                repo["owner"]["service_id"],
-                                repo["owner"]["username"],
-                            )
-                        ] = _ownerid
-
-                    repoid = self.upsert_repo(
-                        db_session, service, _ownerid, repo["repo"], using_integration
+                owner_key = (repo["owner"]["service_id"], repo["owner"]["username"])
+                if (service, *owner_key) not in owners_by_id:
+                    owners_to_upsert.append(owner_key)
+                if repo["repo"].get("fork"):
+                    fork_owner = repo["repo"]["fork"]["owner"]
+                    owners_to_upsert.append(
+                        (fork_owner["service_id"], fork_owner["username"])
                     )
+            upserted_owners = self.upsert_owners(
+                db_session, service, list(dict.fromkeys(owners_to_upsert))
+            )
 
-                    repoids.append(repoid)
-
-                    if repo["repo"].get("fork"):
-                        _ownerid = self.upsert_owner(
-                            db_session,
-                            service,
-                            repo["repo"]["fork"]["owner"]["service_id"],
-                            repo["repo"]["fork"]["owner"]["username"],
-                        )
-
-                        _repoid = self.upsert_repo(
-                            db_session, service, _ownerid, repo["repo"]["fork"]["repo"]
-                        )
-
-                        repoids.append(_repoid)
+            repos_to_upsert = []
+            for repo in repos:
+                owner_key = (repo["owner"]["service_id"], repo["owner"]["username"])
+                if (service, *owner_key) not in owners_by_id:
+                    owners_by_id[(service, *owner_key)] = upserted_owners[owner_key]
+                repos_to_upsert.append(
+                    (
+                        owners_by_id[(service, *owner_key)],
+                        repo["repo"],
+                        using_integration,
+                    )
+                )
+                if repo["repo"].get("fork"):
+                    fork = repo["repo"]["fork"]
+                    fork_owner_key = (
+                        fork["owner"]["service_id"],
+                        fork["owner"]["username"],
+                    )
+                    repos_to_upsert.append(
+                        (upserted_owners[fork_owner_key], fork["repo"], None)
+                    )
 
-                        if repo["repo"]["fork"]["repo"]["private"]:
-                            private_project_ids.append(int(_repoid))
-                    if repo["repo"]["private"]:
-                        private_project_ids.append(int(repoid))
-                    db_session.commit()
+            upserted_repoids = iter(
+                self.upsert_repos(db_session, service, repos_to_upsert)
+            )
+            for repo in repos:
+                repoid = next(upserted_repoids)
+                repoids.append(repoid)
+                if repo["repo"].get("fork"):
+                    _repoid = next(upserted_repoids)
+                    repoids.append(_repoid)
+                    if repo["repo"]["fork"]["repo"]["private"]:
+                        private_project_ids.append(int(_repoid))
+                if repo["repo"]["private"]:
+                    private_project_ids.append(int(repoid))
+            db_session.commit()
 
         try:
             if await LIST_REPOS_GENERATOR_BY_OWNER_ID.check_value_async(
@@ -568,6 +579,274 @@ class SyncReposTask(BaseCodecovTask, name=sync_repos_task_name):
         db_session.flush()
         return new_repo.repoid
 
+    def upsert_owners(
+        self, db_session, service, owners: List[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], int]:
+        """Does `upsert_owner` for every (service_id, username) in `owners`
+
+        Owners that already exist are fetched in a single query and the missing
+            ones are inserted with a single statement.
+
+        Returns:
+            A mapping of (service_id, username) to ownerid
+        """
+        if not owners:
+            return {}
+        log.info(
+            "Upserting owners",
+            extra=dict(git_service=service, number_owners=len(owners)),
+        )
+        service_ids = {str(service_id) for service_id, _ in owners}
+        existing_owners = {
+            owner.service_id: owner
+            for owner in db_session.query(Owner).filter(
+                Owner.service == service, Owner.service_id.in_(service_ids)
+            )
+        }
+        # when an owner shows up with more than one username, the last one wins
+        missing_owners = {}
+        for service_id, username in owners:
+            owner = existing_owners.get(str(service_id))
+            if owner is None:
+                missing_owners[str(service_id)] = username
+            elif (owner.username or "").lower() != username.lower():
+                owner.username = username
+        ownerids = {
+            service_id: owner.ownerid for service_id, owner in existing_owners.items()
+        }
+        if missing_owners:
+            db_session.flush()
+            table = Owner.__table__
+            now = datetime.now()
+            insert_statement = (
+                insert(table)
+                .values(
+                    [
+                        dict(
+                            service=service,
+                            service_id=service_id,
+                            username=username,
+                            createstamp=now,
+                        )
+                        for service_id, username in missing_owners.items()
+                    ]
+                )
+                .on_conflict_do_nothing(
+                    index_elements=[table.columns.service, table.columns.service_id]
+                )
+                .returning(table.columns.service_id, table.columns.ownerid)
+            )
+            ownerids.update(db_session.execute(insert_statement).fetchall())
+            # owners someone else inserted since we looked
+            raced_service_ids = set(missing_owners) - set(ownerids)
+            if raced_service_ids:
+                ownerids.update(
+                    db_session.query(Owner.service_id, Owner.ownerid).filter(
+                        Owner.service == service,
+                        Owner.service_id.in_(raced_service_ids),
+                    )
+                )
+        return {
+            (service_id, username): ownerids[str(service_id)]
+            for service_id, username in owners
+        }
+
+    def upsert_repos(
+        self,
+        db_session,
+        service,
+        repos: List[Tuple[int, dict, Optional[bool]]],
+    ) -> List[int]:
+        """Does `upsert_repo` for every (ownerid, repo_data, using_integration)
+            in `repos`, in order
+
+        The candidate repos for the whole batch are fetched with two queries and
+            matched in memory, following the same rules as `upsert_repo` (an
+            existing repo with the right service_id but a different owner gets
+            moved, one with the right owner and name but a different service_id
+            gets its service_id updated). Changes to existing repos are flushed
+            together, and the new repos are inserted with a single statement.
+
+        Returns:
+            The repoid of each of `repos`
+        """
+        if not repos:
+            return []
+        service_ids = {str(repo_data["service_id"]) for _, repo_data, _ in repos}
+        ownerids = {ownerid for ownerid, _, _ in repos}
+        names = {repo_data["name"] for _, repo_data, _ in repos}
+        candidates = (
+            db_session.query(Repository)
+            .join(Owner, Repository.ownerid == Owner.ownerid)
+            .filter(Repository.service_id.in_(service_ids), Owner.service == service)
+            .all()
+        ) + (
+            db_session.query(Repository)
+            .filter(Repository.ownerid.in_(ownerids), Repository.name.in_(names))
+            .all()
+        )
+
+        by_owner_and_service_id = {}
+        by_service_id = {}
+        by_owner_and_name = {}
+
+        def index(repo):
+            by_owner_and_service_id.setdefault((repo.ownerid, repo.service_id), repo)
+            by_service_id.setdefault(repo.service_id, repo)
+            by_owner_and_name.setdefault((repo.ownerid, repo.name), repo)
+
+        def unindex(repo):
+            for mapping, key in (
+                (by_owner_and_service_id, (repo.ownerid, repo.service_id)),
+                (by_service_id, repo.service_id),
+                (by_owner_and_name, (repo.ownerid, repo.name)),
+            ):
+                if mapping.get(key) is repo:
+                    del mapping[key]
+
+        for repo in candidates:
+            index(repo)
+
+        upserted_repos = []
+        new_repos = []
+        for ownerid, repo_data, using_integration in repos:
+            service_id = str(repo_data["service_id"])
+            repo = by_owner_and_service_id.get((ownerid, service_id))
+            if repo is not None:
+                # Found the exact repo. Let's just update
+                unindex(repo)
+                repo.private = repo_data["private"]
+                repo.language = repo_data["language"]
+                repo.name = repo_data["name"]
+                repo.deleted = False
+                repo.updatestamp = datetime.now()
+                index(repo)
+                upserted_repos.append(repo)
+                continue
+            # repo was not found, could be a different owner or a different service_id
+            repo_correct_serviceid_wrong_owner = by_service_id.get(service_id)
+            repo_correct_owner_wrong_service_id = by_owner_and_name.get(
+                (ownerid, repo_data["name"])
+            )
+            if (
+                repo_correct_serviceid_wrong_owner is not None
+                and repo_correct_owner_wrong_service_id is not None
+            ):
+                log.warning(
+                    "There is a repo with the right service_id and a repo with the right slug, but they are not the same",
+                    extra=dict(
+                        repo_data=repo_data,
+                        repo_correct_serviceid_wrong_owner=dict(
+                            repoid=repo_correct_serviceid_wrong_owner.repoid,
+                            service_id=repo_correct_serviceid_wrong_owner.service_id,
+                        ),
+                        repo_correct_owner_wrong_service_id=dict(
+                            repoid=repo_correct_owner_wrong_service_id.repoid,
+                            service_id=repo_correct_owner_wrong_service_id.service_id,
+                        ),
+                    ),
+                )
+                # We will have to assume the user has access to the service_id one, since
+                # the service_id is the Github identity value
+                upserted_repos.append(repo_correct_serviceid_wrong_owner)
+            elif repo_correct_serviceid_wrong_owner is not None:
+                repo = repo_correct_serviceid_wrong_owner
+                log.info(
+                    "Updating repo - wrong owner",
+                    extra=dict(
+                        ownerid=ownerid,
+                        repo_id=repo.repoid,
+                        repo_name=repo_data["name"],
+                    ),
+                )
+                unindex(repo)
+                repo.ownerid = ownerid
+                repo.private = repo_data["private"]
+                repo.language = repo_data["language"]
+                repo.name = repo_data["name"]
+                repo.deleted = False
+                repo.updatestamp = datetime.now()
+                index(repo)
+                upserted_repos.append(repo)
+            elif repo_correct_owner_wrong_service_id is not None:
+                repo = repo_correct_owner_wrong_service_id
+                log.info(
+                    "Updating repo - correct owner, wrong service_id",
+                    extra=dict(
+                        ownerid=ownerid,
+                        repo_id=repo.service_id,
+                        repo_name=repo_data["name"],
+                    ),
+                )
+                unindex(repo)
+                repo.service_id = service_id
+                repo.name = repo_data["name"]
+                repo.language = repo_data["language"]
+                repo.private = repo_data["private"]
+                repo.using_integration = using_integration
+                repo.updatestamp = datetime.now()
+                index(repo)
+                upserted_repos.append(repo)
+            else:
+                # repo does not exist, create it. It's not added to the session,
+                # since all new repos are inserted together below
+                repo = Repository(
+                    ownerid=ownerid,
+                    service_id=service_id,
+                    name=repo_data["name"],
+                    language=repo_data["language"],
+                    private=repo_data["private"],
+                    branch=repo_data["branch"],
+                    using_integration=using_integration,
+                )
+                index(repo)
+                new_repos.append(repo)
+                upserted_repos.append(repo)
+
+        db_session.flush()
+        if new_repos:
+            self._insert_repos(db_session, new_repos)
+        return [repo.repoid for repo in upserted_repos]
+
+    def _insert_repos(self, db_session, new_repos: List[Repository]):
+        log.info("Inserting repos", extra=dict(number_repos=len(new_repos)))
+        table = Repository.__table__
+        insert_statement = insert(table).values(
+            [
+                dict(
+                    ownerid=repo.ownerid,
+                    service_id=repo.service_id,
+                    name=repo.name,
+                    language=repo.language,
+                    private=repo.private,
+                    branch=repo.branch,
+                    using_integration=repo.using_integration,
+                    deleted=bool(repo.deleted),
+                    updatestamp=repo.updatestamp,
+                )
+                for repo in new_repos
+            ]
+        )
+        # a repo someone else inserted since we looked gets updated instead
+        insert_statement = insert_statement.on_conflict_do_update(
+            index_elements=[table.columns.ownerid, table.columns.service_id],
+            set_=dict(
+                private=insert_statement.excluded.private,
+                language=insert_statement.excluded.language,
+                name=insert_statement.excluded.name,
+                deleted=False,
+                updatestamp=datetime.now(),
+            ),
+        ).returning(
+            table.columns.ownerid, table.columns.service_id, table.columns.repoid
+        )
+        repoids = {
+            (ownerid, service_id): repoid
+            for ownerid, service_id, repoid in db_session.execute(insert_statement)
+        }
+        for repo in new_repos:
+            repo.repoid = repoids[(repo.ownerid, repo.service_id)]
+
     def sync_repos_languages(
         self, sync_repos_output: dict, manual_trigger: bool, current_owner: Owner
     ):
@@ -312,6 +312,95 @@ class TestComputeComparisonTask(object):
         assert compare_flag_records[0].repositoryflag_id == repositoryflag.id_
         assert compare_flag_records[0].patch_totals is not None
 
+    def test_update_existing_component_comparisons(
+        self, dbsession, mocker, mock_repo_provider, mock_storage, sample_report
+    ):
+        mocker.patch.object(
+            ReadOnlyReport, "should_load_rust_version", return_value=True
+        )
+        mocker.patch.object(
+            ReportService,
+            "get_existing_report_for_commit",
+            return_value=ReadOnlyReport.create_from_report(sample_report),
+        )
+        mock_repo_provider.get_compare.return_value = {"diff": {"files": {}}}
+        get_current_yaml = mocker.patch("tasks.compute_comparison.get_current_yaml")
+        get_current_yaml.return_value = UserYaml(
+            {
+                "component_management": {
+                    "individual_components": [
+                        {"component_id": "go_files", "paths": [r".*\.go"]},
+                        {"component_id": "unit_flags", "flag_regexes": [r"unit.*"]},
+                    ]
+                }
+            }
+        )
+        comparison = CompareCommitFactory.create()
+        dbsession.add(comparison)
+        dbsession.flush()
+        existing_component_comparison = CompareComponent(
+            commit_comparison=comparison,
+            component_id="go_files",
+            head_totals=None,
+            base_totals=None,
+            patch_totals=None,
+        )
+        dbsession.add(existing_component_comparison)
+        dbsession.flush()
+
+        task = ComputeComparisonTask()
+        res = task.run_impl(dbsession, comparison.id)
+        assert res == {"successful": True}
+
+        component_comparisons = (
+            dbsession.query(CompareComponent)
+            .filter_by(commit_comparison_id=comparison.id)
+            .order_by(CompareComponent.component_id)
+            .all()
+        )
+        assert [c.component_id for c in component_comparisons] == [
+            "go_files",
+            "unit_flags",
+        ]
+        assert component_comparisons[0].id == existing_component_comparison.id
+        assert component_comparisons[0].head_totals["files"] == 1
+        assert component_comparisons[1].head_totals["files"] == 2
+
+    def test_flag_comparisons_create_missing_repository_flags_once(
+        self,
+        dbsession,
+        mocker,
+        mock_repo_provider,
+        mock_storage,
+        sample_report_with_multiple_flags,
+    ):
+        comparison = CompareCommitFactory.create()
+        dbsession.add(comparison)
+        dbsession.flush()
+        mocker.patch.object(
+            ReadOnlyReport, "should_load_rust_version", return_value=True
+        )
+        mocker.patch.object(
+            ReportService,
+            "get_existing_report_for_commit",
+            return_value=ReadOnlyReport.create_from_report(
+                sample_report_with_multiple_flags
+            ),
+        )
+        mock_repo_provider.get_compare.return_value = {"diff": {"files": {}}}
+        get_current_yaml = mocker.patch("tasks.compute_comparison.get_current_yaml")
+        get_current_yaml.return_value = UserYaml({"coverage": {"status": None}})
+
+        task = ComputeComparisonTask()
+        task.run_impl(dbsession, comparison.id)
+        task.run_impl(dbsession, comparison.id)
+        dbsession.flush()
+        repository_flags = dbsession.query(RepositoryFlag).filter_by(
+            repository_id=comparison.compare_commit.repository.repoid
+        )
+        assert repository_flags.count() == 2
+        assert dbsession.query(CompareFlag).count() == 2
+
     def test_set_state_to_error_missing_base_report(self, dbsession, mocker):
         comparison = CompareCommitFactory.create()
         dbsession.add(comparison)
@@ -110,6 +110,35 @@ class TestGHMarketplaceSyncPlansTaskUnit(object):
         assert owner.stripe_subscription_id is None
         assert owner.stripe_customer_id == "cus_123"
 
+    def test_create_or_update_plan_invalidates_plan_after_commit(
+        self, dbsession, mocker
+    ):
+        owner = OwnerFactory.create(service="github", plan="some-plan")
+        dbsession.add(owner)
+        dbsession.flush()
+        calls = []
+        mocker.patch.object(
+            dbsession, "commit", side_effect=lambda: calls.append("commit")
+        )
+        mocker.patch(
+            "tasks.github_marketplace.invalidate_user_plan",
+            side_effect=lambda ownerid: calls.append(("invalidate", ownerid)),
+        )
+
+        SyncPlansTask().create_or_update_plan(
+            dbsession, mocker.MagicMock(), owner.service_id, dict(unit_count=5)
+        )
+        SyncPlansTask().create_or_update_to_free_plan(
+            dbsession, mocker.MagicMock(), owner.service_id
+        )
+
+        assert calls == [
+            "commit",
+            ("invalidate", owner.ownerid),
+            "commit",
+            ("invalidate", owner.ownerid),
+        ]
+
     def test_create_or_update_plan_known_user_without_plan(self, dbsession, mocker):
         owner = OwnerFactory.create(
             service="github",
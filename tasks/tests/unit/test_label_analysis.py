@@ -13,6 +13,7 @@ from database.tests.factories.staticanalysis import (
     StaticAnalysisSuiteFactory,
     StaticAnalysisSuiteFilepathFactory,
 )
+from helpers.labels import get_labels_per_session_index
 from services.report import ReportService
 from services.static_analysis import StaticAnalysisComparisonService
 from tasks.label_analysis import (
@@ -780,6 +781,18 @@ def test_get_all_labels_one_session(sample_report_with_labels):
     }
 
 
+def test_get_labels_per_session_index(sample_report_with_labels):
+    task = LabelAnalysisRequestProcessingTask()
+    labels_per_session = get_labels_per_session_index(sample_report_with_labels)
+    assert labels_per_session == {
+        sess_id: task.get_labels_per_session(sample_report_with_labels, sess_id)
+        for sess_id in sample_report_with_labels.sessions
+        if task.get_labels_per_session(sample_report_with_labels, sess_id)
+    }
+    assert 2 not in labels_per_session
+    assert labels_per_session[5] == {"orangejuice", "justjuice", "applejuice"}
+
+
 def test_get_relevant_executable_lines_nothing_found(dbsession, mocker):
     repository = RepositoryFactory.create()
     dbsession.add(repository)
@@ -141,6 +141,54 @@ class TestNotifyTaskHelpers(object):
         dbsession.flush()
         assert task.fetch_parent(commit) == right_parent_commit
 
+    def test_fetch_likely_base_commit(self, dbsession):
+        task = NotifyTask()
+        repository = RepositoryFactory.create()
+        base_commit = CommitFactory.create(repository=repository)
+        parent_commit = CommitFactory.create(repository=repository)
+        pull = PullFactory.create(
+            repository=repository, compared_to=base_commit.commitid
+        )
+        dbsession.add_all([repository, base_commit, parent_commit, pull])
+        dbsession.flush()
+        commit = CommitFactory.create(
+            repository=repository,
+            pullid=pull.pullid,
+            parent_commit_id=parent_commit.commitid,
+        )
+        dbsession.add(commit)
+        dbsession.flush()
+        assert task.fetch_likely_base_commit(commit) == base_commit
+        commit.pullid = None
+        dbsession.flush()
+        assert task.fetch_likely_base_commit(commit) == parent_commit
+
+    @pytest.mark.asyncio
+    async def test_fetch_pull_and_prefetch_base_report(
+        self, dbsession, mocker, enriched_pull
+    ):
+        task = NotifyTask()
+        base_commit = CommitFactory.create()
+        commit = CommitFactory.create(repository=base_commit.repository)
+        dbsession.add_all([base_commit, commit])
+        dbsession.flush()
+        mocker.patch.object(
+            NotifyTask, "fetch_likely_base_commit", return_value=base_commit
+        )
+        mocked_fetch_pull = mocker.patch(
+            "tasks.notify.fetch_and_update_pull_request_information_from_commit",
+            return_value=enriched_pull,
+        )
+        mocked_prefetch = mocker.patch.object(ReportService, "prefetch_chunks")
+        report_service = ReportService({})
+        repository_service = mocker.MagicMock()
+        res = await task.fetch_pull_and_prefetch_base_report(
+            repository_service, commit, {}, report_service
+        )
+        assert res == enriched_pull
+        mocked_fetch_pull.assert_called_with(repository_service, commit, {})
+        mocked_prefetch.assert_called_with(base_commit)
+
     def test_determine_decoration_type_from_pull_does_not_attempt_activation(
         self, dbsession, mocker, enriched_pull
     ):
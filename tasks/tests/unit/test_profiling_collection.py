@@ -194,7 +194,7 @@ class TestProfilingCollectionTask(object):
                     "group_name": "abcde",
                 }
             ],
-            "files": [{"filename": "banana.py", "ln_ex_ct": [(5, 10), (68, 87)]}],
+            "files": [{"filename": "banana.py", "ln_ex_ct": [[5, 10], [68, 87]]}],
             "metadata": {"version": "v1"},
         }
 
@@ -290,8 +290,8 @@ class TestProfilingCollectionTask(object):
                     "filename": "banana.py",
                     "ln_ex_ct": [(1, 1), (5, 11), (6, 4), (68, 87)],
                 },
-                {"filename": "sugar.py", "ln_ex_ct": [(1, 100)]},
                 {"filename": "apple.py", "ln_ex_ct": [(2, 10), (101, 11)]},
+                {"filename": "sugar.py", "ln_ex_ct": [(1, 100)]},
             ],
             "metadata": {"version": "v1"},
         }
@@ -513,6 +513,91 @@ class TestProfilingCollectionTask(object):
             ],
         }
 
+    def test_merge_into_only_touches_files_in_new_uploads(self, mocker):
+        task = ProfilingCollectionTask()
+        pu = mocker.MagicMock(normalized_location="normalized_pu_location")
+        archive_service = mocker.MagicMock(
+            read_file=mocker.MagicMock(
+                return_value=json.dumps(
+                    {
+                        "runs": [
+                            {
+                                "group": "GET /abc",
+                                "execs": [
+                                    {"filename": "apple.py", "lines": {"2": 3}},
+                                    {"filename": "banana.py", "lines": {"7": 1}},
+                                ],
+                            },
+                        ]
+                    }
+                )
+            )
+        )
+        untouched_lines = [[1, 5], [3, 2]]
+        existing_result = {
+            "groups": [
+                {
+                    "group_name": "GET /abc",
+                    "files": [
+                        {"filename": "apple.py", "ln_ex_ct": [[1, 4], [2, 1]]},
+                        {"filename": "banana.py", "ln_ex_ct": [[5, 2], [8, 1]]},
+                        {"filename": "cherry.py", "ln_ex_ct": untouched_lines},
+                    ],
+                    "count": 3,
+                },
+            ],
+            "files": [
+                {"filename": "apple.py", "ln_ex_ct": [[1, 4], [2, 1]]},
+                {"filename": "banana.py", "ln_ex_ct": [[5, 2], [8, 1]]},
+                {"filename": "cherry.py", "ln_ex_ct": untouched_lines},
+            ],
+        }
+        task.merge_into(archive_service, existing_result, [pu])
+        assert existing_result == {
+            "groups": [
+                {
+                    "group_name": "GET /abc",
+                    "files": [
+                        {"filename": "apple.py", "ln_ex_ct": [(1, 4), (2, 4)]},
+                        {
+                            "filename": "banana.py",
+                            "ln_ex_ct": [(5, 2), (7, 1), (8, 1)],
+                        },
+                        {"filename": "cherry.py", "ln_ex_ct": [[1, 5], [3, 2]]},
+                    ],
+                    "count": 4,
+                },
+            ],
+            "files": [
+                {"filename": "apple.py", "ln_ex_ct": [(1, 4), (2, 4)]},
+                {"filename": "banana.py", "ln_ex_ct": [(5, 2), (7, 1), (8, 1)]},
+                {"filename": "cherry.py", "ln_ex_ct": [[1, 5], [3, 2]]},
+            ],
+        }
+        assert existing_result["files"][2]["ln_ex_ct"] is untouched_lines
+
+    def test_merge_into_result_without_files(self, mocker):
+        task = ProfilingCollectionTask()
+        archive_service = mocker.MagicMock()
+        existing_result = {
+            "groups": [
+                {
+                    "group_name": "GET /abc",
+                    "files": [{"filename": "apple.py", "ln_ex_ct": [[2, 1], [1, 4]]}],
+                    "count": 3,
+                },
+                {
+                    "group_name": "POST /def",
+                    "files": [{"filename": "apple.py", "ln_ex_ct": [[1, 1]]}],
+                    "count": 1,
+                },
+            ],
+        }
+        task.merge_into(archive_service, existing_result, [])
+        assert existing_result["files"] == [
+            {"filename": "apple.py", "ln_ex_ct": [(1, 5), (2, 1)]}
+        ]
+
     def test_find_uploads_to_join_first_joining(self, dbsession):
         before = datetime(2021, 5, 2, 0, 3, 4).replace(tzinfo=timezone.utc)
         task = ProfilingCollectionTask()
@@ -2,18 +2,39 @@ import json
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import billiard
 import pytest
 from shared.storage.exceptions import FileNotInStorageError
+from shared.yaml import UserYaml
 
 from database.tests.factories.profiling import (
     ProfilingCommitFactory,
     ProfilingUploadFactory,
 )
+from services.path_fixer import PathFixer
+from tasks import profiling_normalizer
 from tasks.profiling_normalizer import ProfilingNormalizerTask
 
 here = Path(__file__)
 
 
+@pytest.fixture
+def normalizer_pool_size(mock_configuration):
+    mock_configuration.params["setup"]["profiling"] = {"normalizer_pool_size": 2}
+    yield 2
+    if profiling_normalizer._normalizer_pool is not None:
+        profiling_normalizer._normalizer_pool.terminate()
+        profiling_normalizer._normalizer_pool = None
+
+
+def normalize_data_in_worker(current_yaml, data, results):
+    """What a celery prefork worker process runs, minus celery"""
+    try:
+        results.put(ProfilingNormalizerTask().normalize_data(current_yaml, data))
+    except Exception as exp:
+        results.put(exp)
+
+
 @pytest.fixture
 def sample_open_telemetry_upload():
     with open(here.parent / "samples/sample_opentelem_input.json", "r") as file:
@@ -67,3 +88,47 @@ def test_run_sync_normalizing_run_no_file(dbsession, mock_storage, mock_configur
     task = ProfilingNormalizerTask()
     res = task.run_impl(dbsession, profiling_upload_id=puf.id)
     assert res == {"successful": False}
+
+
+def test_normalize_data_in_pool(
+    normalizer_pool_size,
+    mocker,
+    sample_open_telemetry_upload,
+    sample_open_telemetry_normalized,
+):
+    current_yaml = UserYaml(
+        {"profiling": {"grouping_attributes": ["http.method", "celery.state"]}}
+    )
+    init_path_fixer = mocker.spy(PathFixer, "init_from_user_yaml")
+    task = ProfilingNormalizerTask()
+    res = task.normalize_data(current_yaml, sample_open_telemetry_upload)
+    # json, as it is stored
+    assert json.loads(json.dumps(res)) == sample_open_telemetry_normalized
+    assert init_path_fixer.call_count == 1
+    # the next uploads use the same pool
+    pool = profiling_normalizer._normalizer_pool
+    assert pool is not None
+    res = task.normalize_data(current_yaml, sample_open_telemetry_upload)
+    assert json.loads(json.dumps(res)) == sample_open_telemetry_normalized
+    assert profiling_normalizer._normalizer_pool is pool
+
+
+def test_normalize_data_in_pool_from_daemon_process(
+    normalizer_pool_size,
+    sample_open_telemetry_upload,
+    sample_open_telemetry_normalized,
+):
+    current_yaml = UserYaml(
+        {"profiling": {"grouping_attributes": ["http.method", "celery.state"]}}
+    )
+    # celery's prefork pool processes are daemonic billiard processes
+    results = billiard.Queue()
+    worker = billiard.Process(
+        target=normalize_data_in_worker,
+        args=(current_yaml, sample_open_telemetry_upload, results),
+    )
+    worker.daemon = True
+    worker.start()
+    res = results.get(timeout=60)
+    worker.join()
+    assert json.loads(json.dumps(res)) == sample_open_telemetry_normalized
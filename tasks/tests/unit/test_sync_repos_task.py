@@ -410,6 +410,101 @@ class TestSyncReposTaskUnit(object):
         assert new_repo.branch == repo_data.get("branch")
         assert new_repo.private is True
 
+    def test_upsert_owners(self, mocker, mock_configuration, dbsession):
+        service = "github"
+        existing_owner = OwnerFactory.create(
+            organizations=[],
+            service=service,
+            username="codecov_org",
+            permission=[],
+            service_id="123456",
+        )
+        dbsession.add(existing_owner)
+        dbsession.flush()
+
+        upserted_ownerids = SyncReposTask().upsert_owners(
+            dbsession, service, [("123456", "Codecov"), ("654321", "new_org")]
+        )
+
+        assert upserted_ownerids[("123456", "Codecov")] == existing_owner.ownerid
+        assert existing_owner.username == "Codecov"
+        new_owner = (
+            dbsession.query(Owner)
+            .filter(Owner.service == service, Owner.service_id == "654321")
+            .first()
+        )
+        assert new_owner is not None
+        assert new_owner.username == "new_org"
+        assert upserted_ownerids[("654321", "new_org")] == new_owner.ownerid
+
+    def test_upsert_repos(self, mocker, mock_configuration, dbsession):
+        service = "gitlab"
+        user = OwnerFactory.create(
+            organizations=[], service=service, username="1nf1n1t3l00p", permission=[]
+        )
+        other_owner = OwnerFactory.create(
+            organizations=[], service=service, username="cc", permission=[]
+        )
+        dbsession.add_all([user, other_owner])
+        dbsession.flush()
+        existing_repo = RepositoryFactory.create(
+            name="old-name", service_id="1", owner=user, deleted=True
+        )
+        repo_wrong_owner = RepositoryFactory.create(
+            name="moved", service_id="2", owner=other_owner
+        )
+        repo_wrong_service_id = RepositoryFactory.create(
+            name="recreated", service_id="999", owner=user
+        )
+        dbsession.add_all([existing_repo, repo_wrong_owner, repo_wrong_service_id])
+        dbsession.flush()
+
+        def repo_data(service_id, name):
+            return {
+                "service_id": service_id,
+                "name": name,
+                "fork": None,
+                "private": True,
+                "language": "python",
+                "branch": "main",
+            }
+
+        upserted_repoids = SyncReposTask().upsert_repos(
+            dbsession,
+            service,
+            [
+                (user.ownerid, repo_data("1", "new-name"), False),
+                (user.ownerid, repo_data("2", "moved"), False),
+                (user.ownerid, repo_data("3", "recreated"), False),
+                (user.ownerid, repo_data("4", "brand-new"), False),
+                # the same repo again, like when a fork is also listed on its own
+                (user.ownerid, repo_data("4", "brand-new"), False),
+            ],
+        )
+
+        new_repo = (
+            dbsession.query(Repository)
+            .filter(Repository.ownerid == user.ownerid, Repository.service_id == "4")
+            .one()
+        )
+        assert upserted_repoids == [
+            existing_repo.repoid,
+            repo_wrong_owner.repoid,
+            repo_wrong_service_id.repoid,
+            new_repo.repoid,
+            new_repo.repoid,
+        ]
+        assert new_repo.name == "brand-new"
+        assert new_repo.deleted is False
+        dbsession.refresh(existing_repo)
+        assert existing_repo.name == "new-name"
+        assert existing_repo.deleted is False
+        dbsession.refresh(repo_wrong_owner)
+        assert repo_wrong_owner.ownerid == user.ownerid
+        dbsession.refresh(repo_wrong_service_id)
+        assert repo_wrong_service_id.service_id == "3"
+        assert repo_wrong_service_id.ownerid == user.ownerid
+
     @pytest.mark.django_db(databases={"default"})
     def test_only_public_repos_already_in_db(
         self, mocker, mock_configuration, dbsession, codecov_vcr, mock_redis
@@ -49,3 +49,23 @@ class TestTrialExpiration(object):
         assert owner.plan_activated_users == [9]
         assert owner.stripe_subscription_id == None
         assert owner.trial_status == TrialStatus.EXPIRED.value
+
+    def test_trial_expiration_task_invalidates_plan_after_commit(
+        self, dbsession, mocker
+    ):
+        owner = OwnerFactory.create()
+        dbsession.add(owner)
+        dbsession.flush()
+        calls = []
+        mocker.patch.object(
+            dbsession, "commit", side_effect=lambda: calls.append("commit")
+        )
+        mocker.patch(
+            "tasks.trial_expiration.invalidate_user_plan",
+            side_effect=lambda ownerid: calls.append(("invalidate", ownerid)),
+        )
+
+        task = TrialExpirationTask()
+        assert task.run_impl(dbsession, owner.ownerid) == {"successful": True}
+
+        assert calls == ["commit", ("invalidate", owner.ownerid)]
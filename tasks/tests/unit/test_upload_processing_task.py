@@ -1,3 +1,4 @@
+from contextlib import nullcontext
 from pathlib import Path
 
 import celery
@@ -8,6 +9,7 @@ from shared.config import get_config
 from shared.reports.enums import UploadState
 from shared.reports.resources import Report, ReportFile, ReportLine, ReportTotals
 from shared.torngit.exceptions import TorngitObjectNotFoundError
+from shared.utils.sessions import Session
 
 from database.models import CommitReport, ReportDetails
 from database.tests.factories import CommitFactory, UploadFactory
@@ -16,17 +18,133 @@ from helpers.exceptions import (
     ReportExpiredException,
     RepositoryWithoutValidBotError,
 )
-from rollouts import USE_LABEL_INDEX_IN_REPORT_PROCESSING_BY_REPO_ID
+from rollouts import (
+    DEFER_REPORT_SAVE_IN_UPLOAD_CHAIN_BY_REPO_ID,
+    LAZY_EXISTING_REPORT_BY_REPO_ID,
+    PARSE_UPLOADS_OUTSIDE_LOCK_BY_REPO_ID,
+    USE_LABEL_INDEX_IN_REPORT_PROCESSING_BY_REPO_ID,
+)
 from services.archive import ArchiveService
 from services.report import ReportService
+from services.report.in_progress import (
+    InProgressReport,
+    InProgressReportMissingError,
+)
 from services.report.parser.legacy import LegacyReportParser
 from services.report.parser.types import LegacyParsedRawReport
-from services.report.raw_upload_processor import UploadProcessingResult
+from services.report.raw_upload_processor import (
+    ParsedUpload,
+    UploadProcessingResult,
+)
 from tasks.upload_processor import UploadProcessorTask
 
 here = Path(__file__)
 
 
+class FakeRedis(object):
+    """Keeps what the in-progress reports save, so chains can share them"""
+
+    def __init__(self):
+        self.data = {}
+
+    def lock(self, *args, **kwargs):
+        return nullcontext()
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        pass
+
+
+@pytest.fixture
+def in_progress_chain(mocker, dbsession, celery_app):
+    """Runs the processor tasks of a commit against a fake redis and a fake stored
+    report. Processing an upload adds a file named after it to the report
+    """
+    redis = FakeRedis()
+    mocker.patch("tasks.upload_processor.get_redis_connection", return_value=redis)
+    stored = {}
+
+    def get_existing_report_for_commit(commit, report_class=None, report_code=None):
+        if "files" not in stored:
+            return None
+        report = Report()
+        report.add_session(Session())
+        for filename in stored["files"]:
+            report_file = ReportFile(filename)
+            report_file.append(1, ReportLine.create(coverage=1, sessions=[[0, 1]]))
+            report.append(report_file)
+        return report
+
+    def process_individual_report(
+        report_service, commit, report, upload_obj, parsing_result=None
+    ):
+        if not report.sessions:
+            report.add_session(Session())
+        report_file = ReportFile(f"upload_{upload_obj.id_}.py")
+        report_file.append(1, ReportLine.create(coverage=1, sessions=[[0, 1]]))
+        report.append(report_file)
+        return {"successful": True, "report": report}
+
+    def save_report_results(
+        db_session, report_service, repository, commit, report, pr, report_code
+    ):
+        stored["files"] = sorted(report.files)
+        return {}
+
+    mocker.patch.object(
+        ReportService,
+        "get_existing_report_for_commit",
+        side_effect=get_existing_report_for_commit,
+    )
+    mocker.patch.object(
+        UploadProcessorTask,
+        "process_individual_report",
+        side_effect=process_individual_report,
+    )
+    mocker.patch.object(
+        UploadProcessorTask, "save_report_results", side_effect=save_report_results
+    )
+    mocker.patch.object(UploadProcessorTask, "app", celery_app)
+
+    commit = CommitFactory.create()
+    dbsession.add(commit)
+    dbsession.flush()
+    current_report_row = CommitReport(commit_id=commit.id_)
+    dbsession.add(current_report_row)
+    dbsession.flush()
+
+    def run(previous_results, **kwargs):
+        upload = UploadFactory.create(
+            report=current_report_row, state="started", storage_path="url"
+        )
+        dbsession.add(upload)
+        dbsession.flush()
+        result = UploadProcessorTask().run_impl(
+            dbsession,
+            previous_results,
+            repoid=commit.repoid,
+            commitid=commit.commitid,
+            commit_yaml={},
+            arguments_list=[{"url": "url", "upload_pk": upload.id_}],
+            **kwargs,
+        )
+        return upload, result
+
+    return redis, stored, run
+
+
 def test_default_acks_late():
     task = UploadProcessorTask()
     # task.acks_late is defined at import time, so it's difficult to test
@@ -494,6 +612,155 @@ class TestUploadProcessorTask(object):
             timeout=300,
         )
 
+    def test_upload_task_call_lazy_existing_report(
+        self,
+        mocker,
+        mock_configuration,
+        dbsession,
+        mock_storage,
+        mock_redis,
+        celery_app,
+    ):
+        mocker.patch.object(
+            LAZY_EXISTING_REPORT_BY_REPO_ID, "check_value", return_value=True
+        )
+        mocked_get_existing_report = mocker.patch.object(
+            ReportService, "get_existing_report_for_commit", return_value=None
+        )
+        mocker.patch.object(
+            UploadProcessorTask,
+            "process_individual_report",
+            return_value={"successful": False},
+        )
+        mocker.patch.object(UploadProcessorTask, "save_report_results", return_value={})
+        mocker.patch.object(UploadProcessorTask, "app", celery_app)
+
+        commit = CommitFactory.create()
+        dbsession.add(commit)
+        dbsession.flush()
+        current_report_row = CommitReport(commit_id=commit.id_)
+        dbsession.add(current_report_row)
+        dbsession.flush()
+        upload = UploadFactory.create(
+            report=current_report_row, state="started", storage_path="url"
+        )
+        dbsession.add(upload)
+        dbsession.flush()
+        UploadProcessorTask().run_impl(
+            dbsession,
+            {},
+            repoid=commit.repoid,
+            commitid=commit.commitid,
+            commit_yaml={"flags": {"unit": {"carryforward": True}}},
+            arguments_list=[{"url": "url", "upload_pk": upload.id_}],
+        )
+        mocked_get_existing_report.assert_called_with(
+            commit, report_class=Report, report_code=None
+        )
+
+    def test_upload_task_call_defer_report_save(
+        self,
+        mocker,
+        mock_configuration,
+        dbsession,
+        mock_storage,
+        mock_redis,
+        celery_app,
+    ):
+        mocker.patch.object(
+            ReportService, "get_existing_report_for_commit", return_value=None
+        )
+        mocker.patch.object(
+            UploadProcessorTask,
+            "process_individual_report",
+            return_value={"successful": False},
+        )
+        mocked_save_report_results = mocker.patch.object(
+            UploadProcessorTask, "save_report_results", return_value={}
+        )
+        mocked_load = mocker.patch.object(InProgressReport, "load", return_value=None)
+        mocked_save = mocker.patch.object(InProgressReport, "save")
+        mocked_clear = mocker.patch.object(InProgressReport, "clear")
+        mocker.patch.object(UploadProcessorTask, "app", celery_app)
+
+        commit = CommitFactory.create()
+        dbsession.add(commit)
+        dbsession.flush()
+        current_report_row = CommitReport(commit_id=commit.id_)
+        dbsession.add(current_report_row)
+        dbsession.flush()
+        upload = UploadFactory.create(
+            report=current_report_row, state="started", storage_path="url"
+        )
+        dbsession.add(upload)
+        dbsession.flush()
+        UploadProcessorTask().run_impl(
+            dbsession,
+            {},
+            repoid=commit.repoid,
+            commitid=commit.commitid,
+            commit_yaml={},
+            arguments_list=[{"url": "url", "upload_pk": upload.id_}],
+            defer_report_save=True,
+        )
+        mocked_load.assert_called_once()
+        mocked_save.assert_called_once()
+        assert not mocked_save_report_results.called
+        assert not mocked_clear.called
+
+        UploadProcessorTask().run_impl(
+            dbsession,
+            {},
+            repoid=commit.repoid,
+            commitid=commit.commitid,
+            commit_yaml={},
+            arguments_list=[{"url": "url", "upload_pk": upload.id_}],
+            defer_report_save=False,
+        )
+        assert mocked_save.call_count == 1
+        mocked_save_report_results.assert_called_once()
+        mocked_clear.assert_called_once()
+
+    def test_upload_task_call_interleaved_chains(
+        self, mocker, mock_configuration, in_progress_chain
+    ):
+        mocker.patch.object(
+            DEFER_REPORT_SAVE_IN_UPLOAD_CHAIN_BY_REPO_ID,
+            "check_value",
+            return_value=True,
+        )
+        redis, stored, run = in_progress_chain
+        # first link of a chain that defers saving the report
+        first_upload, first_result = run({}, defer_report_save=True)
+        assert first_result["in_progress_report"] is True
+        assert "files" not in stored
+        # a single task chain for the same commit gets in between
+        other_upload, other_result = run({})
+        assert "in_progress_report" not in other_result
+        assert stored["files"] == sorted(
+            [f"upload_{first_upload.id_}.py", f"upload_{other_upload.id_}.py"]
+        )
+        # the last link of the first chain builds on what the other chain saved
+        last_upload, _ = run(first_result, defer_report_save=False)
+        assert stored["files"] == sorted(
+            [
+                f"upload_{first_upload.id_}.py",
+                f"upload_{other_upload.id_}.py",
+                f"upload_{last_upload.id_}.py",
+            ]
+        )
+
+    def test_upload_task_call_in_progress_report_expired(
+        self, mocker, mock_configuration, in_progress_chain
+    ):
+        redis, stored, run = in_progress_chain
+        stored["files"] = ["already_saved.py"]
+        first_upload, first_result = run({}, defer_report_save=True)
+        redis.data.clear()
+        with pytest.raises(InProgressReportMissingError):
+            run(first_result, defer_report_save=False)
+        assert stored["files"] == ["already_saved.py"]
+
     def test_upload_task_call_exception_within_individual_upload(
         self,
         mocker,
@@ -683,6 +950,99 @@ class TestUploadProcessorTask(object):
         assert expected_result == result
         assert commit.state == "complete"
 
+    def test_upload_task_call_parsing_outside_lock(
+        self,
+        mocker,
+        mock_configuration,
+        dbsession,
+        mock_repo_provider,
+        mock_storage,
+        mock_redis,
+        celery_app,
+    ):
+        mocker.patch.object(
+            PARSE_UPLOADS_OUTSIDE_LOCK_BY_REPO_ID, "check_value", return_value=True
+        )
+        mocked_1 = mocker.patch.object(ArchiveService, "read_chunks")
+        mocked_1.return_value = None
+        mocker.patch.object(ArchiveService, "read_file", return_value=b"")
+        mocked_process = mocker.patch("services.report.process_raw_upload")
+        mocked_parse = mocker.patch("services.report.parse_raw_upload")
+        false_report = Report()
+        false_report_file = ReportFile("file.c")
+        false_report_file.append(18, ReportLine.create(1, [[0, 1]]))
+        false_report.append(false_report_file)
+        mocked_parse.side_effect = [
+            ParsedUpload(
+                report=false_report,
+                session=Session(id=0),
+                joined=True,
+                raw_report=None,
+            ),
+            ReportExpiredException(),
+        ]
+        mocker.patch.object(UploadProcessorTask, "app", celery_app)
+        commit = CommitFactory.create(
+            message="",
+            commitid="abf6d4df662c47e32460020ab14abf9303581429",
+            repository__owner__unencrypted_oauth_token="testulk3d54rlhxkjyzomq2wh8b7np47xabcrkx8",
+            repository__owner__username="ThiagoCodecov",
+            repository__yaml={"codecov": {"max_report_age": False}},
+        )
+        dbsession.add(commit)
+        dbsession.flush()
+        current_report_row = CommitReport(commit_id=commit.id_)
+        dbsession.add(current_report_row)
+        dbsession.flush()
+        report_details = ReportDetails(
+            report_id=current_report_row.id_, _files_array=[]
+        )
+        dbsession.add(report_details)
+        dbsession.flush()
+        upload_1 = UploadFactory.create(
+            report=current_report_row, state="started", storage_path="url"
+        )
+        upload_2 = UploadFactory.create(
+            report=current_report_row, state="started", storage_path="url2"
+        )
+        dbsession.add(upload_1)
+        dbsession.add(upload_2)
+        dbsession.flush()
+        redis_queue = [
+            {"url": "url", "upload_pk": upload_1.id_},
+            {"url": "url2", "upload_pk": upload_2.id_},
+        ]
+        result = UploadProcessorTask().run_impl(
+            dbsession,
+            {},
+            repoid=commit.repoid,
+            commitid=commit.commitid,
+            commit_yaml={},
+            arguments_list=redis_queue,
+        )
+        expected_result = {
+            "processings_so_far": [
+                {
+                    "arguments": {"url": "url", "upload_pk": upload_1.id_},
+                    "successful": True,
+                },
+                {
+                    "arguments": {"url": "url2", "upload_pk": upload_2.id_},
+                    "error": {"code": "report_expired", "params": {}},
+                    "report": None,
+                    "should_retry": False,
+                    "successful": False,
+                },
+            ]
+        }
+        assert expected_result == result
+        assert not mocked_process.called
+        assert mocked_parse.call_count == 2
+        assert upload_1.state == "processed"
+        assert upload_1.order_number == 0
+        assert upload_2.state == "error"
+        assert commit.state == "complete"
+
     def test_upload_task_process_individual_report_with_notfound_report(
         self,
         mocker,
@@ -24,6 +24,10 @@ from database.tests.factories.core import ReportFactory
 from helpers.checkpoint_logger import CheckpointLogger, _kwargs_key
 from helpers.checkpoint_logger.flows import UploadFlow
 from helpers.exceptions import RepositoryWithoutValidBotError
+from rollouts import (
+    ADAPTIVE_UPLOAD_BATCHING_BY_REPO_ID,
+    DEFER_REPORT_SAVE_IN_UPLOAD_CHAIN_BY_REPO_ID,
+)
 from services.archive import ArchiveService
 from services.report import NotReadyToBuildReportYetError, ReportService
 from tasks.bundle_analysis_notify import bundle_analysis_notify_task
@@ -88,10 +92,38 @@ class FakeRedis(object):
             del self.lists[key]
         return res
 
+    def lrange(self, key, start, end):
+        return list(self.lists.get(key, [])[start : end + 1])
+
+    def ltrim(self, key, start, end):
+        if key in self.lists:
+            self.lists[key] = self.lists[key][start:]
+            if self.lists[key] == []:
+                del self.lists[key]
+        return True
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
     def delete(self, key):
         del self.lists[key]
 
 
+class FakePipeline(object):
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def lrange(self, *args):
+        self.commands.append((self.redis.lrange, args))
+
+    def ltrim(self, *args):
+        self.commands.append((self.redis.ltrim, args))
+
+    def execute(self):
+        return [command(*args) for command, args in self.commands]
+
+
 @pytest.fixture
 def mock_redis(mocker):
     m = mocker.patch("services.redis._get_redis_instance_from_url")
@@ -603,6 +635,110 @@ class TestUploadTaskIntegration(object):
             timeout=300,
         )
 
+    def test_upload_task_call_multiple_processors_defer_report_save(
+        self,
+        mocker,
+        mock_configuration,
+        dbsession,
+        codecov_vcr,
+        mock_storage,
+        mock_redis,
+        celery_app,
+    ):
+        mocker.patch.object(
+            DEFER_REPORT_SAVE_IN_UPLOAD_CHAIN_BY_REPO_ID,
+            "check_value",
+            return_value=True,
+        )
+        mocked_1 = mocker.patch("tasks.upload.chain")
+        redis_queue = [{"build": f"part{i}", "url": f"someurl{i}"} for i in range(1, 8)]
+        jsonified_redis_queue = [json.dumps(x) for x in redis_queue]
+        mocker.patch.object(UploadTask, "app", celery_app)
+
+        commit = CommitFactory.create(
+            message="",
+            commitid="abf6d4df662c47e32460020ab14abf9303581429",
+            repository__owner__unencrypted_oauth_token="test7lk5ndmtqzxlx06rip65nac9c7epqopclnoy",
+            repository__owner__username="ThiagoCodecov",
+            repository__owner__service="github",
+            repository__yaml={"codecov": {"max_report_age": "1y ago"}},
+            repository__name="example-python",
+        )
+        dbsession.add(commit)
+        dbsession.flush()
+        mock_redis.lists[
+            f"uploads/{commit.repoid}/{commit.commitid}"
+        ] = jsonified_redis_queue
+        result = UploadTask().run_impl(dbsession, commit.repoid, commit.commitid)
+        assert result == {"was_setup": False, "was_updated": True}
+        signatures = mocked_1.call_args[0]
+        assert len(signatures) == 4
+        assert [len(sig.kwargs["arguments_list"]) for sig in signatures[:3]] == [
+            3,
+            3,
+            1,
+        ]
+        assert [sig.kwargs["defer_report_save"] for sig in signatures[:3]] == [
+            True,
+            True,
+            False,
+        ]
+        assert "defer_report_save" not in signatures[3].kwargs
+
+    def test_upload_task_call_multiple_processors_adaptive_batching(
+        self,
+        mocker,
+        mock_configuration,
+        dbsession,
+        codecov_vcr,
+        mock_storage,
+        mock_redis,
+        celery_app,
+    ):
+        mocker.patch.object(
+            ADAPTIVE_UPLOAD_BATCHING_BY_REPO_ID, "check_value", return_value=True
+        )
+        sizes = {
+            "someurl1": 2000,
+            "someurl2": 2000,
+            "someurl3": 400 * 1024 * 1024,
+            "someurl4": 2000,
+            "someurl5": 2000,
+        }
+        mocker.patch.object(
+            ArchiveService, "get_file_size", side_effect=lambda path: sizes.get(path)
+        )
+        mocked_1 = mocker.patch("tasks.upload.chain")
+        redis_queue = [{"build": f"part{i}", "url": f"someurl{i}"} for i in range(1, 7)]
+        jsonified_redis_queue = [json.dumps(x) for x in redis_queue]
+        mocker.patch.object(UploadTask, "app", celery_app)
+
+        commit = CommitFactory.create(
+            message="",
+            commitid="abf6d4df662c47e32460020ab14abf9303581429",
+            repository__owner__unencrypted_oauth_token="test7lk5ndmtqzxlx06rip65nac9c7epqopclnoy",
+            repository__owner__username="ThiagoCodecov",
+            repository__owner__service="github",
+            repository__yaml={"codecov": {"max_report_age": "1y ago"}},
+            repository__name="example-python",
+        )
+        dbsession.add(commit)
+        dbsession.flush()
+        mock_redis.lists[
+            f"uploads/{commit.repoid}/{commit.commitid}"
+        ] = jsonified_redis_queue
+        result = UploadTask().run_impl(dbsession, commit.repoid, commit.commitid)
+        assert result == {"was_setup": False, "was_updated": True}
+        signatures = mocked_1.call_args[0]
+        assert [
+            [arguments["url"] for arguments in sig.kwargs["arguments_list"]]
+            for sig in signatures[:-1]
+        ] == [
+            ["someurl1", "someurl2"],
+            ["someurl3"],
+            ["someurl4", "someurl5", "someurl6"],
+        ]
+
     def test_upload_task_proper_parent(
         self,
         mocker,
@@ -949,6 +1085,20 @@ class TestUploadTaskUnit(object):
         res = list(upload_args.arguments_list())
         assert res == [{"url": "http://example.first.com"}, {"and_another": "one"}]
 
+    def test_list_of_arguments_more_than_a_batch(self, mock_redis, mocker):
+        mocker.patch("tasks.upload.ARGUMENTS_BATCH_SIZE", 2)
+        upload_args = UploadContext(
+            repoid=542,
+            commitid="commitid",
+            redis_connection=mock_redis,
+        )
+        mock_redis.lists["uploads/542/commitid"] = [
+            json.dumps({"number": number}) for number in range(5)
+        ]
+        res = list(upload_args.arguments_list())
+        assert res == [{"number": number} for number in range(5)]
+        assert not mock_redis.exists("uploads/542/commitid")
+
     def test_normalize_upload_arguments_no_changes(
         self, dbsession, mock_redis, mock_storage
     ):
@@ -2,6 +2,7 @@ import logging
 
 from app import celery_app
 from celery_config import trial_expiration_task_name
+from celery_task_router import invalidate_user_plan
 from database.enums import TrialStatus
 from database.models.core import Owner
 from services.billing import BillingPlan
@@ -27,7 +28,8 @@ class TrialExpirationTask(BaseCodecovTask, name=trial_expiration_task_name):
         owner.plan_user_count = owner.pretrial_users_count or 1
         owner.stripe_subscription_id = None
         owner.trial_status = TrialStatus.EXPIRED.value
-        db_session.flush()
+        db_session.commit()
+        invalidate_user_plan(owner.ownerid)
         return {"successful": True}
 
 
@@ -3,7 +3,7 @@ import re
 import uuid
 from datetime import datetime, timedelta
 from json import loads
-from typing import Any, List, Mapping, Optional
+from typing import Any, Dict, List, Mapping, Optional
 
 from asgiref.sync import async_to_sync
 from celery import chain, chord
@@ -27,7 +27,12 @@ from helpers.checkpoint_logger import _kwargs_key
 from helpers.checkpoint_logger import from_kwargs as checkpoints_from_kwargs
 from helpers.checkpoint_logger.flows import UploadFlow
 from helpers.exceptions import RepositoryWithoutValidBotError
+from helpers.metrics import metrics
 from helpers.save_commit_error import save_commit_error
+from rollouts import (
+    ADAPTIVE_UPLOAD_BATCHING_BY_REPO_ID,
+    DEFER_REPORT_SAVE_IN_UPLOAD_CHAIN_BY_REPO_ID,
+)
 from services.archive import ArchiveService
 from services.bundle_analysis import BundleAnalysisReportService
 from services.redis import Redis, download_archive_from_redis, get_redis_connection
@@ -39,6 +44,7 @@ from services.repository import (
     update_commit_from_provider_info,
 )
 from services.test_results import TestResultsReportService
+from services.upload_batching import plan_upload_batches
 from services.yaml import save_repo_yaml_to_database_if_needed
 from services.yaml.fetcher import fetch_commit_yaml_from_provider
 from tasks.base import BaseCodecovTask
@@ -55,6 +61,8 @@ regexp_ci_skip = re.compile(r"\[(ci|skip| |-){3,}\]").search
 merged_pull = re.compile(r".*Merged in [^\s]+ \(pull request \#(\d+)\).*").match
 
 CHUNK_SIZE = 3
+# how many upload arguments are taken from redis at a time
+ARGUMENTS_BATCH_SIZE = 100
 
 
 class UploadContext:
@@ -76,6 +84,8 @@ class UploadContext:
         self.report_type = report_type
         self.report_code = report_code
         self.redis_connection = redis_connection or get_redis_connection()
+        # sizes of the uploads this context moved from redis to storage, by path
+        self.upload_sizes: Dict[str, int] = {}
 
     def lock_name(self, lock_type: str):
         if self.report_type == ReportType.COVERAGE:
@@ -148,10 +158,17 @@ class UploadContext:
         uploads_locations = [self.upload_location]
         for uploads_list_key in uploads_locations:
             log.debug("Fetching arguments from redis %s", uploads_list_key)
-            while self.redis_connection.exists(uploads_list_key):
-                arguments = self.redis_connection.lpop(uploads_list_key)
-                if arguments:
-                    yield loads(arguments)
+            while True:
+                # take a batch of arguments off the list in one round-trip
+                pipeline = self.redis_connection.pipeline()
+                pipeline.lrange(uploads_list_key, 0, ARGUMENTS_BATCH_SIZE - 1)
+                pipeline.ltrim(uploads_list_key, ARGUMENTS_BATCH_SIZE, -1)
+                arguments_batch, _ = pipeline.execute()
+                if not arguments_batch:
+                    break
+                for arguments in arguments_batch:
+                    if arguments:
+                        yield loads(arguments)
 
     def normalize_arguments(self, commit: Commit, arguments: Mapping[str, Any]):
         """
@@ -178,9 +195,32 @@ class UploadContext:
                 ),
             )
             arguments["url"] = written_path
+            self.upload_sizes[written_path] = len(content)
         arguments.pop("token", None)
         return arguments
 
+    def get_upload_size(
+        self, archive_service: ArchiveService, arguments: Mapping[str, Any]
+    ) -> Optional[int]:
+        """
+        Returns the size in bytes of the upload `arguments` point to, or None if it
+            can't be known without downloading it
+        """
+        url = arguments.get("url")
+        if not url or url.startswith("http"):
+            return None
+        if url in self.upload_sizes:
+            return self.upload_sizes[url]
+        try:
+            return archive_service.get_file_size(url)
+        except Exception:
+            log.warning(
+                "Could not get the size of an upload",
+                extra=dict(repoid=self.repoid, commit=self.commitid, url=url),
+                exc_info=True,
+            )
+            return None
+
 
 class UploadTask(BaseCodecovTask, name=upload_task_name):
     """The first of a series of tasks designed to process an `upload` made by the user
@@ -499,8 +539,24 @@ class UploadTask(BaseCodecovTask, name=upload_task_name):
             argument_list.append(normalized_arguments)
         if argument_list:
             db_session.commit()
+            upload_sizes = None
+            if upload_context.report_type != ReportType.BUNDLE_ANALYSIS and (
+                ADAPTIVE_UPLOAD_BATCHING_BY_REPO_ID.check_value(
+                    repo_id=commit.repoid, default=False
+                )
+            ):
+                archive_service = ArchiveService(commit.repository)
+                upload_sizes = [
+                    upload_context.get_upload_size(archive_service, arguments)
+                    for arguments in argument_list
+                ]
             self.schedule_task(
-                commit, commit_yaml, argument_list, commit_report, checkpoints
+                commit,
+                commit_yaml,
+                argument_list,
+                commit_report,
+                checkpoints,
+                upload_sizes=upload_sizes,
             )
         else:
             if checkpoints:
@@ -567,7 +623,14 @@ class UploadTask(BaseCodecovTask, name=upload_task_name):
         argument_list,
         commit_report: CommitReport,
         checkpoints=None,
+        upload_sizes: Optional[List[Optional[int]]] = None,
     ):
+        """
+        Args:
+            upload_sizes (Optional[List[Optional[int]]]): The size in bytes of each
+                upload in `argument_list` (None where unknown). When given, the uploads
+                are batched by size instead of `CHUNK_SIZE` at a time
+        """
         commit_yaml = commit_yaml.to_dict()
 
         res = None
@@ -581,6 +644,7 @@ class UploadTask(BaseCodecovTask, name=upload_task_name):
                 argument_list,
                 commit_report,
                 checkpoints=checkpoints,
+                upload_sizes=upload_sizes,
             )
         elif commit_report.report_type == ReportType.BUNDLE_ANALYSIS.value:
             res = self._schedule_bundle_analysis_processing_task(
@@ -590,7 +654,11 @@ class UploadTask(BaseCodecovTask, name=upload_task_name):
             )
         elif commit_report.report_type == ReportType.TEST_RESULTS.value:
             res = self._schedule_test_results_processing_task(
-                commit, commit_yaml, argument_list, commit_report
+                commit,
+                commit_yaml,
+                argument_list,
+                commit_report,
+                upload_sizes=upload_sizes,
             )
 
         if res:
@@ -606,22 +674,71 @@ class UploadTask(BaseCodecovTask, name=upload_task_name):
         )
         return None
 
+    def _batch_uploads(
+        self, commit, argument_list, upload_sizes=None
+    ) -> List[List[dict]]:
+        if upload_sizes is None:
+            return [
+                argument_list[i : i + CHUNK_SIZE]
+                for i in range(0, len(argument_list), CHUNK_SIZE)
+            ]
+        batches = plan_upload_batches(argument_list, upload_sizes)
+        log.info(
+            "Planned upload batches",
+            extra=dict(
+                repoid=commit.repoid,
+                commit=commit.commitid,
+                number_arguments=len(argument_list),
+                number_batches=len(batches),
+                batch_sizes=[len(b.arguments_list) for b in batches],
+                batch_bytes=[b.total_bytes for b in batches],
+                batch_unknown_sizes=[b.unknown_sizes for b in batches],
+                batch_estimated_seconds=[
+                    round(b.estimated_seconds, 1) for b in batches
+                ],
+            ),
+        )
+        metrics.gauge("worker.tasks.upload.batching.batches", len(batches))
+        for batch in batches:
+            metrics.gauge(
+                "worker.tasks.upload.batching.batch_size", len(batch.arguments_list)
+            )
+            metrics.gauge("worker.tasks.upload.batching.batch_bytes", batch.total_bytes)
+        return [batch.arguments_list for batch in batches]
+
     def _schedule_coverage_processing_task(
-        self, commit, commit_yaml, argument_list, commit_report, checkpoints=None
+        self,
+        commit,
+        commit_yaml,
+        argument_list,
+        commit_report,
+        checkpoints=None,
+        upload_sizes=None,
     ):
         chain_to_call = []
-        for i in range(0, len(argument_list), CHUNK_SIZE):
-            chunk = argument_list[i : i + CHUNK_SIZE]
+        batches = self._batch_uploads(commit, argument_list, upload_sizes)
+        defer_report_save = False
+        if len(batches) > 1:
+            defer_report_save = (
+                DEFER_REPORT_SAVE_IN_UPLOAD_CHAIN_BY_REPO_ID.check_value(
+                    repo_id=commit.repoid, default=False
+                )
+            )
+        for i, chunk in enumerate(batches):
             if chunk:
+                processor_kwargs = dict(
+                    repoid=commit.repoid,
+                    commitid=commit.commitid,
+                    commit_yaml=commit_yaml,
+                    arguments_list=chunk,
+                    report_code=commit_report.code,
+                )
+                if defer_report_save:
+                    # only the last link saves the report for good
+                    processor_kwargs["defer_report_save"] = i < len(batches) - 1
                 sig = upload_processor_task.signature(
                     args=({},) if i == 0 else (),
-                    kwargs=dict(
-                        repoid=commit.repoid,
-                        commitid=commit.commitid,
-                        commit_yaml=commit_yaml,
-                        arguments_list=chunk,
-                        report_code=commit_report.code,
-                    ),
+                    kwargs=processor_kwargs,
                 )
                 chain_to_call.append(sig)
         if chain_to_call:
@@ -704,10 +821,10 @@ class UploadTask(BaseCodecovTask, name=upload_task_name):
         commit_yaml,
         argument_list,
         commit_report,
+        upload_sizes=None,
     ):
         processor_task_group = []
-        for i in range(0, len(argument_list), CHUNK_SIZE):
-            chunk = argument_list[i : i + CHUNK_SIZE]
+        for chunk in self._batch_uploads(commit, argument_list, upload_sizes):
             if chunk:
                 sig = test_results_processor_task.signature(
                     args=(),
@@ -314,16 +314,19 @@ class UploadFinisherTask(BaseCodecovTask, name=upload_finisher_task_name):
         return True
 
     def invalidate_caches(self, redis_connection, commit: Commit):
-        redis_connection.delete("cache/{}/tree/{}".format(commit.repoid, commit.branch))
-        redis_connection.delete(
-            "cache/{0}/tree/{1}".format(commit.repoid, commit.commitid)
+        pipeline = redis_connection.pipeline(transaction=False)
+        pipeline.delete(
+            "cache/{}/tree/{}".format(commit.repoid, commit.branch),
+            "cache/{0}/tree/{1}".format(commit.repoid, commit.commitid),
         )
         repository = commit.repository
         key = ":".join((repository.service, repository.owner.username, repository.name))
         if commit.branch:
-            redis_connection.hdel("badge", ("%s:%s" % (key, (commit.branch))).lower())
+            badge_keys = [("%s:%s" % (key, (commit.branch))).lower()]
             if commit.branch == repository.branch:
-                redis_connection.hdel("badge", ("%s:" % key).lower())
+                badge_keys.append(("%s:" % key).lower())
+            pipeline.hdel("badge", *badge_keys)
+        pipeline.execute()
 
 
 RegisteredUploadTask = celery_app.register_task(UploadFinisherTask())
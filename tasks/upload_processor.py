@@ -20,9 +20,18 @@ from database.enums import CommitErrorTypes
 from database.models import Commit, Upload
 from helpers.metrics import metrics
 from helpers.save_commit_error import save_commit_error
+from rollouts import (
+    DEFER_REPORT_SAVE_IN_UPLOAD_CHAIN_BY_REPO_ID,
+    LAZY_EXISTING_REPORT_BY_REPO_ID,
+    PARSE_UPLOADS_OUTSIDE_LOCK_BY_REPO_ID,
+)
 from services.bots import RepositoryWithoutValidBotError
 from services.redis import get_redis_connection
 from services.report import ProcessingResult, Report, ReportService
+from services.report.in_progress import (
+    InProgressReport,
+    InProgressReportMissingError,
+)
 from services.repository import get_repo_provider_service
 from services.yaml import read_yaml_field
 from tasks.base import BaseCodecovTask
@@ -89,6 +98,18 @@ class UploadProcessorTask(BaseCodecovTask, name=upload_processor_task_name):
         )
         lock_name = UPLOAD_PROCESSING_LOCK_NAME(repoid, commitid)
         redis_connection = get_redis_connection()
+        parsing_results = None
+        if PARSE_UPLOADS_OUTSIDE_LOCK_BY_REPO_ID.check_value(
+            repo_id=repoid, default=False
+        ):
+            with metrics.timer(f"{self.metrics_prefix}.parse_uploads"):
+                parsing_results = self.parse_uploads(
+                    db_session,
+                    repoid=repoid,
+                    commitid=commitid,
+                    commit_yaml=commit_yaml,
+                    arguments_list=arguments_list,
+                )
         try:
             log.info(
                 "Acquiring upload processing lock",
@@ -114,6 +135,7 @@ class UploadProcessorTask(BaseCodecovTask, name=upload_processor_task_name):
                     commit_yaml=commit_yaml,
                     arguments_list=actual_arguments_list,
                     report_code=report_code,
+                    parsing_results=parsing_results,
                     parent_task=self.request.parent_id,
                     **kwargs,
                 )
@@ -132,6 +154,49 @@ class UploadProcessorTask(BaseCodecovTask, name=upload_processor_task_name):
             )
             self.retry(max_retries=5, countdown=retry_in)
 
+    def parse_uploads(
+        self, db_session, *, repoid, commitid, commit_yaml, arguments_list
+    ) -> dict:
+        """Runs the language processors over the uploads before the upload processing
+            lock is acquired, so uploads of the same commit can be parsed concurrently.
+
+        Only the merge of the results into the commit report happens inside the lock.
+            Uploads that fail here unexpectedly are left out of the result, so they go
+            through the regular processing (and error handling) inside the lock.
+
+        Returns:
+            dict: Mapping of upload id -> ProcessingResult from `ReportService.parse_upload`
+        """
+        report_service = ReportService(UserYaml(commit_yaml))
+        parsing_results = {}
+        for arguments in arguments_list:
+            upload_obj = (
+                db_session.query(Upload)
+                .filter_by(id_=arguments.get("upload_pk"))
+                .first()
+            )
+            if upload_obj is None:
+                continue
+            try:
+                with metrics.timer(f"{self.metrics_prefix}.parse_individual_report"):
+                    parsing_results[upload_obj.id_] = report_service.parse_upload(
+                        upload_obj
+                    )
+            except (CeleryError, SoftTimeLimitExceeded, SQLAlchemyError):
+                raise
+            except Exception:
+                log.warning(
+                    "Unable to parse report outside of lock. Will process it inside the lock",
+                    extra=dict(
+                        repoid=repoid,
+                        commit=commitid,
+                        upload=upload_obj.id_,
+                        parent_task=self.request.parent_id,
+                    ),
+                    exc_info=True,
+                )
+        return parsing_results
+
     def process_impl_within_lock(
         self,
         *,
@@ -142,9 +207,20 @@ class UploadProcessorTask(BaseCodecovTask, name=upload_processor_task_name):
         commit_yaml,
         arguments_list,
         report_code,
+        parsing_results=None,
+        defer_report_save=None,
         **kwargs,
     ):
+        """
+        Args:
+            defer_report_save (Optional[bool]): Set when the chain this task is part of
+                passes the commit report along as an `InProgressReport`. True for every
+                link but the last, which saves the report to storage and the database.
+                Tasks that don't get it (another chain for the same commit) still build
+                on top of an in-progress report left there, and save it for good
+        """
         commit_yaml = UserYaml(commit_yaml)
+        parsing_results = parsing_results or {}
         log.info(
             "Obtained upload processing lock, starting",
             extra=dict(
@@ -167,10 +243,72 @@ class UploadProcessorTask(BaseCodecovTask, name=upload_processor_task_name):
         try_later = []
         report_service = ReportService(commit_yaml)
 
-        with metrics.timer(f"{self.metrics_prefix}.build_original_report"):
-            report = report_service.get_existing_report_for_commit(
-                commit, report_code=report_code
+        report_class = None
+        if LAZY_EXISTING_REPORT_BY_REPO_ID.check_value(repo_id=repoid, default=False):
+            uploads = (
+                db_session.query(Upload)
+                .filter(
+                    Upload.id_.in_(
+                        [arguments.get("upload_pk") for arguments in arguments_list]
+                    )
+                )
+                .all()
             )
+            if not report_service.uploads_may_overwrite_carriedforward_sessions(
+                uploads
+            ):
+                # A plain `Report` only decodes the chunks of the files the uploads
+                # touch, and writes the other chunks back exactly as they were read.
+                # `EditableReport` would decode (and re-encode) every file
+                report_class = Report
+            log.info(
+                "Loading existing report",
+                extra=dict(
+                    repoid=repoid,
+                    commit=commitid,
+                    lazy=report_class is not None,
+                    parent_task=self.request.parent_id,
+                ),
+            )
+
+        in_progress_report = None
+        if (
+            defer_report_save is not None
+            or DEFER_REPORT_SAVE_IN_UPLOAD_CHAIN_BY_REPO_ID.check_value(
+                repo_id=repoid, default=False
+            )
+        ):
+            in_progress_report = InProgressReport(
+                get_redis_connection(), repoid, commitid, report_code
+            )
+
+        with metrics.timer(f"{self.metrics_prefix}.build_original_report"):
+            report = None
+            if in_progress_report is not None:
+                report = in_progress_report.load(
+                    report_service, report_class=report_class
+                )
+                if (
+                    report is None
+                    and previous_results.get("in_progress_report")
+                    and not in_progress_report.was_saved()
+                ):
+                    # Building on top of the saved report would drop the uploads the
+                    # previous links of the chain processed
+                    log.error(
+                        "In-progress report left by the previous link is gone",
+                        extra=dict(
+                            repoid=repoid,
+                            commit=commitid,
+                            key=in_progress_report.key,
+                            parent_task=self.request.parent_id,
+                        ),
+                    )
+                    raise InProgressReportMissingError(in_progress_report.key)
+            if report is None:
+                report = report_service.get_existing_report_for_commit(
+                    commit, report_class=report_class, report_code=report_code
+                )
             if report is None:
                 log.info(
                     "No existing report for commit", extra=dict(commit=commit.commitid)
@@ -205,7 +343,11 @@ class UploadProcessorTask(BaseCodecovTask, name=upload_processor_task_name):
                         f"{self.metrics_prefix}.process_individual_report"
                     ):
                         result = self.process_individual_report(
-                            report_service, commit, report, upload_obj
+                            report_service,
+                            commit,
+                            report,
+                            upload_obj,
+                            parsing_result=parsing_results.get(upload_obj.id_),
                         )
                     individual_info.update(result)
                 except (CeleryError, SoftTimeLimitExceeded, SQLAlchemyError):
@@ -241,16 +383,27 @@ class UploadProcessorTask(BaseCodecovTask, name=upload_processor_task_name):
                     parent_task=self.request.parent_id,
                 ),
             )
-            with metrics.timer(f"{self.metrics_prefix}.save_report_results"):
-                results_dict = self.save_report_results(
-                    db_session,
-                    report_service,
-                    repository,
-                    commit,
-                    report,
-                    pr,
-                    report_code,
-                )
+            task_result = {"processings_so_far": processings_so_far}
+            if defer_report_save:
+                with metrics.timer(f"{self.metrics_prefix}.save_in_progress_report"):
+                    in_progress_report.save(report)
+                db_session.commit()
+                results_dict = {}
+                # so the next link knows there has to be a report to build on
+                task_result["in_progress_report"] = True
+            else:
+                with metrics.timer(f"{self.metrics_prefix}.save_report_results"):
+                    results_dict = self.save_report_results(
+                        db_session,
+                        report_service,
+                        repository,
+                        commit,
+                        report,
+                        pr,
+                        report_code,
+                    )
+                if in_progress_report is not None:
+                    in_progress_report.clear()
             for processed_individual_report in processings_so_far:
                 deleted_archive = self._possibly_delete_archive(
                     processed_individual_report, report_service, commit
@@ -272,10 +425,20 @@ class UploadProcessorTask(BaseCodecovTask, name=upload_processor_task_name):
                     parent_task=self.request.parent_id,
                 ),
             )
-            return {"processings_so_far": processings_so_far}
+            return task_result
         except CeleryError:
             raise
         except Exception:
+            if in_progress_report is not None:
+                self._save_pending_in_progress_report(
+                    db_session,
+                    report_service,
+                    in_progress_report,
+                    repository,
+                    commit,
+                    pr,
+                    report_code,
+                )
             commit.state = "error"
             log.exception(
                 "Could not properly process commit",
@@ -283,11 +446,58 @@ class UploadProcessorTask(BaseCodecovTask, name=upload_processor_task_name):
             )
             raise
 
+    def _save_pending_in_progress_report(
+        self,
+        db_session,
+        report_service: ReportService,
+        in_progress_report: InProgressReport,
+        repository,
+        commit: Commit,
+        pr,
+        report_code,
+    ):
+        """Saves what the previous links of the chain (or another chain of the commit)
+        left in `in_progress_report`
+
+        The rest of the chain won't run after a failure, so that is the same report
+            that would have been saved if the previous links hadn't deferred saving it
+        """
+        try:
+            report = in_progress_report.load(report_service)
+            if report is not None:
+                self.save_report_results(
+                    db_session,
+                    report_service,
+                    repository,
+                    commit,
+                    report,
+                    pr,
+                    report_code,
+                )
+                in_progress_report.clear()
+        except Exception:
+            log.exception(
+                "Could not save in-progress report after failure",
+                extra=dict(
+                    repoid=commit.repoid,
+                    commit=commit.commitid,
+                    key=in_progress_report.key,
+                ),
+            )
+
     @sentry_sdk.trace
-    def process_individual_report(self, report_service, commit, report, upload_obj):
-        processing_result = self.do_process_individual_report(
-            report_service, report, upload=upload_obj
-        )
+    def process_individual_report(
+        self, report_service, commit, report, upload_obj, parsing_result=None
+    ):
+        if parsing_result is not None:
+            # The upload was already parsed outside the lock, only merging is left
+            processing_result = report_service.merge_parsed_upload_into_report(
+                report, parsing_result
+            )
+        else:
+            processing_result = self.do_process_individual_report(
+                report_service, report, upload=upload_obj
+            )
         if (
             processing_result.error is not None
             and processing_result.error.is_retryable
@@ -5,6 +5,7 @@ import shared.celery_config as shared_celery_config
 from shared.billing import BillingPlan
 
 from celery_task_router import (
+    UserPlanCache,
     _get_user_plan_from_comparison_id,
     _get_user_plan_from_label_request_id,
     _get_user_plan_from_org_ownerid,
@@ -14,6 +15,9 @@ from celery_task_router import (
     _get_user_plan_from_repoid,
     _get_user_plan_from_suite_id,
     _get_user_plan_from_task,
+    _missing,
+    get_user_plan_cache,
+    invalidate_user_plan,
     route_task,
 )
 from database.tests.factories.core import (
@@ -370,3 +374,86 @@ def test_route_task(mocker, dbsession, fake_repos):
     mock_route_tasks_shared.assert_called_with(
         shared_celery_config.upload_task_name, BillingPlan.pr_monthly.db_name
     )
+
+
+def test_get_user_plan_is_cached(dbsession, fake_repos):
+    (repo, _) = fake_repos
+    owner = repo.owner
+    assert (
+        _get_user_plan_from_repoid(dbsession, repo.repoid)
+        == BillingPlan.pr_monthly.db_name
+    )
+    owner.plan = BillingPlan.enterprise_cloud_yearly.db_name
+    dbsession.flush()
+    # the cached plan is used until it is invalidated
+    assert (
+        _get_user_plan_from_repoid(dbsession, repo.repoid)
+        == BillingPlan.pr_monthly.db_name
+    )
+    assert (
+        _get_user_plan_from_ownerid(dbsession, owner.ownerid)
+        == BillingPlan.enterprise_cloud_yearly.db_name
+    )
+    invalidate_user_plan(owner.ownerid)
+    owner.plan = BillingPlan.users_basic.db_name
+    dbsession.flush()
+    assert (
+        _get_user_plan_from_repoid(dbsession, repo.repoid)
+        == BillingPlan.users_basic.db_name
+    )
+
+
+def test_get_user_plan_not_found_is_not_cached(dbsession, fake_owners):
+    assert (
+        _get_user_plan_from_repoid(dbsession, 10000000)
+        == BillingPlan.users_basic.db_name
+    )
+    assert get_user_plan_cache().get_ownerid(("repoid", 10000000)) is _missing
+    repo = RepositoryFactory.create(repoid=10000000, owner=fake_owners[0])
+    dbsession.add(repo)
+    dbsession.flush()
+    assert (
+        _get_user_plan_from_repoid(dbsession, 10000000)
+        == BillingPlan.pr_monthly.db_name
+    )
+
+
+def test_get_user_plan_cache_disabled(
+    mocker, dbsession, fake_repos, mock_configuration
+):
+    mock_configuration.params["setup"]["task_routing"] = {"plan_cache": {"ttl": 0}}
+    (repo, _) = fake_repos
+    assert get_user_plan_cache() is None
+    assert (
+        _get_user_plan_from_repoid(dbsession, repo.repoid)
+        == BillingPlan.pr_monthly.db_name
+    )
+
+
+def test_user_plan_cache_expires(mocker):
+    monotonic = mocker.patch("celery_task_router.time.monotonic", return_value=100)
+    cache = UserPlanCache(max_size=10, ttl=30)
+    cache.set_ownerid(("repoid", 1), 2)
+    cache.set_plan(2, "users-basic")
+    monotonic.return_value = 120
+    assert cache.get_ownerid(("repoid", 1)) == 2
+    assert cache.get_plan(2) == "users-basic"
+    monotonic.return_value = 131
+    assert cache.get_ownerid(("repoid", 1)) is _missing
+    assert cache.get_plan(2) is _missing
+
+
+def test_user_plan_cache_redis(mocker, mock_redis):
+    cache = UserPlanCache(max_size=10, ttl=30, use_redis=True)
+    cache.set_plan(2, "users-basic")
+    mock_redis.set.assert_called_with("task_routing_plan/2", "users-basic", ex=30)
+    # plans cached by other processes are read from redis
+    mock_redis.get.return_value = b"users-pr-inappm"
+    assert cache.get_plan(3) == "users-pr-inappm"
+    mock_redis.get.assert_called_with("task_routing_plan/3")
+    cache.invalidate(3)
+    mock_redis.delete.assert_called_with("task_routing_plan/3")
+    # plans aren't kept in the process, so invalidating them in another process
+    # is seen right away
+    mock_redis.get.return_value = None
+    assert cache.get_plan(2) is _missing